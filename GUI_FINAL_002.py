@@ -1,7 +1,35 @@
 import tkinter as tk
-from tkinter import ttk
-from PIL import Image, ImageTk, ImageSequence
+from tkinter import ttk, filedialog
+from PIL import Image, ImageTk
 import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+import afm_analysis
+import bake_thermal
+import cv_analysis
+import ebeam_pec
+import ebeam_writetime
+import ellipsometry
+import etch_sim
+import gdsii
+import image_pyramid
+import imprint_flow
+import iv_analysis
+import layout
+import litho_cell
+import mask_view
+import measurement_io
+import pages
+import prefetch
+import process_yield
+import raman_analysis
+import wafer_map
+import xray_fresnel
+import xrd_analysis
 
 # Tooltip Class with auto-wrap
 class CreateToolTip(object):
@@ -38,57 +66,1047 @@ class CreateToolTip(object):
 def on_mousewheel(event, canvas):
     canvas.yview_scroll(int(-1*(event.delta/120)), "units")
 
-class AnimatedGIF:
-    def __init__(self, label, gif_path, width):
+class AnimatedFrames:
+    """Animates PIL frames on a label, pulling each frame from the iterator only
+    when it is first shown and replaying the cached frames afterwards."""
+    def __init__(self, label, frames, width):
         self.label = label
         self.width = width
-        self.gif_path = gif_path
+        self.source = iter(frames)
         self.frames = []
         self.current_frame = 0
         self.animation = None
-        
-        try:
-            img = Image.open(gif_path)
-            for frame in ImageSequence.Iterator(img):
-                frame = frame.copy()
-                frame = frame.resize((width, int(width * frame.height / frame.width)), Image.LANCZOS)
-                self.frames.append(ImageTk.PhotoImage(frame))
-        except Exception as e:
-            print(f"Error loading GIF: {e}")
-            self.frames = [None]
-            
         self.animate()
-    
+
+    def next_frame(self):
+        if self.source is not None:
+            try:
+                frame = next(self.source)
+                frame = frame.resize((self.width, int(self.width * frame.height / frame.width)), Image.LANCZOS)
+                self.frames.append(ImageTk.PhotoImage(frame))
+                self.current_frame = len(self.frames) - 1
+                return self.frames[-1]
+            except StopIteration:
+                self.source = None
+        if not self.frames:
+            return None
+        self.current_frame = (self.current_frame + 1) % len(self.frames)
+        return self.frames[self.current_frame]
+
     def animate(self):
-        if len(self.frames) > 1:
-            self.current_frame = (self.current_frame + 1) % len(self.frames)
-            self.label.configure(image=self.frames[self.current_frame])
+        frame = self.next_frame()
+        if frame is not None and (self.source is not None or len(self.frames) > 1):
+            self.label.configure(image=frame)
             self.animation = self.label.after(100, self.animate)
-    
+        elif frame is not None:
+            self.label.configure(image=frame)
+
     def stop(self):
         if self.animation:
             self.label.after_cancel(self.animation)
             self.animation = None
 
+class AnimatedGIF(AnimatedFrames):
+    def __init__(self, label, gif_path, width):
+        self.gif_path = gif_path
+        frames = []
+        try:
+            frames = page_prefetch.prefetcher.frames(gif_path, width, animated=True)
+        except Exception as e:
+            print(f"Error loading GIF: {e}")
+        super().__init__(label, frames, width)
+
+class TiledImageView:
+    """Pan/zoom view of an image pyramid. Only the tiles under the viewport are
+    composited, into one PhotoImage that is reused for every redraw.
+
+    Drag to pan, mouse wheel to zoom, Shift-drag to select a region and
+    Ctrl-drag to draw a line. Selections are reported in full-resolution
+    pixels: on_region((row0, row1, col0, col1)), on_line((r0, c0), (r1, c1)).
+    """
+    def __init__(self, parent, pyramid, width=600, height=450, on_region=None, on_line=None):
+        self.pyramid = pyramid
+        self.width = width
+        self.height = height
+        self.on_region = on_region
+        self.on_line = on_line
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg='black',
+                                highlightthickness=0, cursor='fleur')
+        self.photo = ImageTk.PhotoImage('RGB', (width, height))
+        self.canvas.create_image(0, 0, image=self.photo, anchor='nw')
+        self._drag = None
+        self._overlay = None
+        self._redraw_pending = False
+        self.fit()
+
+        self.canvas.bind('<ButtonPress-1>', lambda e: self.start_drag(e, 'pan'))
+        self.canvas.bind('<Shift-ButtonPress-1>', lambda e: self.start_drag(e, 'region'))
+        self.canvas.bind('<Control-ButtonPress-1>', lambda e: self.start_drag(e, 'line'))
+        self.canvas.bind('<B1-Motion>', self.drag)
+        self.canvas.bind('<ButtonRelease-1>', self.end_drag)
+        self.canvas.bind('<MouseWheel>', lambda e: self.zoom(e, 1.25 if e.delta > 0 else 0.8))
+        self.canvas.bind('<Button-4>', lambda e: self.zoom(e, 1.25))
+        self.canvas.bind('<Button-5>', lambda e: self.zoom(e, 0.8))
+
+    def fit(self):
+        rows, cols = self.pyramid.shape[:2]
+        self.scale = min(self.width / cols, self.height / rows)
+        self.x0 = -(self.width / self.scale - cols) / 2
+        self.y0 = -(self.height / self.scale - rows) / 2
+        self.redraw()
+
+    def to_pixel(self, event):
+        return self.y0 + event.y / self.scale, self.x0 + event.x / self.scale
+
+    def redraw(self):
+        # Coalesce bursts of motion/wheel events into one composite
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.canvas.after_idle(self.draw)
+
+    def draw(self):
+        self._redraw_pending = False
+        view = self.pyramid.render_view(self.x0, self.y0, self.scale, self.width, self.height)
+        self.photo.paste(Image.fromarray(view))
+
+    def clear_overlay(self):
+        if self._overlay:
+            self.canvas.delete(self._overlay)
+            self._overlay = None
+
+    def start_drag(self, event, mode):
+        self.clear_overlay()
+        self._drag = (mode, event.x, event.y, self.x0, self.y0)
+        if mode == 'region':
+            self._overlay = self.canvas.create_rectangle(event.x, event.y, event.x, event.y, outline='cyan')
+        elif mode == 'line':
+            self._overlay = self.canvas.create_line(event.x, event.y, event.x, event.y, fill='cyan', width=2)
+
+    def drag(self, event):
+        if not self._drag:
+            return
+        mode, x, y, x0, y0 = self._drag
+        if mode == 'pan':
+            self.x0 = x0 - (event.x - x) / self.scale
+            self.y0 = y0 - (event.y - y) / self.scale
+            self.redraw()
+        else:
+            self.canvas.coords(self._overlay, x, y, event.x, event.y)
+
+    def end_drag(self, event):
+        if not self._drag:
+            return
+        mode, x, y, _, _ = self._drag
+        self._drag = None
+        start = (self.y0 + y / self.scale, self.x0 + x / self.scale)
+        end = self.to_pixel(event)
+        rows, cols = self.pyramid.shape[:2]
+        if mode == 'region' and self.on_region:
+            row0, row1 = sorted(int(np.clip(r, 0, rows)) for r in (start[0], end[0]))
+            col0, col1 = sorted(int(np.clip(c, 0, cols)) for c in (start[1], end[1]))
+            if row1 - row0 > 1 and col1 - col0 > 1:
+                self.on_region((row0, row1, col0, col1))
+        elif mode == 'line' and self.on_line:
+            self.on_line(tuple(np.clip(start, 0, (rows - 1, cols - 1))), tuple(np.clip(end, 0, (rows - 1, cols - 1))))
+
+    def zoom(self, event, factor):
+        self.clear_overlay()
+        row, col = self.to_pixel(event)
+        self.scale = float(np.clip(self.scale * factor, 1e-4, 64))
+        self.x0 = col - event.x / self.scale
+        self.y0 = row - event.y / self.scale
+        self.redraw()
+        return "break"
+
 def load_local_image(image_path, width):
     try:
-        if image_path.lower().endswith('.gif'):
-            # For GIFs, we'll handle them separately
-            img = Image.open(image_path)
-            first_frame = next(ImageSequence.Iterator(img))
-            first_frame = first_frame.resize((width, int(width * first_frame.height / first_frame.width)), Image.LANCZOS)
-            return ImageTk.PhotoImage(first_frame)
-        else:
-            img = Image.open(image_path)
-            img = img.resize((width, int(width * img.height / img.width)), Image.LANCZOS)
-            return ImageTk.PhotoImage(img)
+        # First frame only for GIFs, scaled once and kept in the prefetch cache
+        return ImageTk.PhotoImage(page_prefetch.prefetcher.frames(image_path, width)[0])
     except Exception as e:
         print(f"Error loading image: {e}")
         return None
 
+def run_in_background(widget, work, on_done, on_error=None, poll_ms=100):
+    """Run work() on a worker thread and pass its result to on_done on the Tk
+    thread, or the exception it raised to on_error."""
+    result = {}
+    def target():
+        try:
+            result['value'] = work()
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+
+    def poll():
+        if not widget.winfo_exists():
+            return
+        if thread.is_alive():
+            widget.after(poll_ms, poll)
+        elif 'error' in result:
+            print(f"Error running simulation: {result['error']}")
+            if on_error:
+                on_error(result['error'])
+        else:
+            on_done(result['value'])
+    poll()
+
+def stream_in_background(widget, items, on_item, on_done=None, on_error=None, poll_ms=100):
+    """Iterate items on a worker thread, handing each one to on_item on the Tk
+    thread, then call on_done, or on_error with the exception that ended the
+    iteration early."""
+    results = queue.Queue()
+    finished = object()
+    failed = object()
+    def target():
+        try:
+            for item in items:
+                results.put(item)
+        except Exception as e:
+            print(f"Error running analysis: {e}")
+            results.put((failed, e))
+            return
+        results.put(finished)
+
+    threading.Thread(target=target, daemon=True).start()
+
+    def poll():
+        if not widget.winfo_exists():
+            return
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                widget.after(poll_ms, poll)
+                return
+            if item is finished:
+                if on_done:
+                    on_done()
+                return
+            if isinstance(item, tuple) and item and item[0] is failed:
+                if on_error:
+                    on_error(item[1])
+                return
+            on_item(item)
+    poll()
+
+def batch_status(status, counts):
+    """Status line updater of a streamed batch analysis with counts of new,
+    cached and failed files and the last failure."""
+    def show(suffix=""):
+        text = f"{counts['new']} analysed, {counts['cached']} from cache"
+        if counts['failed']:
+            text += f", {counts['failed']} failed (last: {counts['last_error']})"
+        status.configure(text=text + suffix)
+    return show
+
+class IdlePrefetch:
+    """Runs a prefetch.Prefetcher in short slices while Tk is idle and points
+    it at the pages whose buttons or dropdown entries have the pointer or
+    keyboard focus. Each slice is followed by a gap so input is handled
+    between slices."""
+    def __init__(self, root, prefetcher, status=None, slice_ms=10, gap_ms=20):
+        self.root = root
+        self.prefetcher = prefetcher
+        self.status = status
+        self.slice = slice_ms / 1000
+        self.gap_ms = gap_ms
+        self.pending = None
+
+    def schedule(self, delay_ms=0):
+        if self.pending is None:
+            self.pending = self.root.after(delay_ms, self.when_idle)
+
+    def when_idle(self):
+        self.pending = self.root.after_idle(self.run_slice)
+
+    def run_slice(self):
+        self.pending = None
+        wait = self.prefetcher.run(self.slice)
+        if wait is not None:
+            # Under memory pressure the prefetcher asks for a longer pause
+            self.schedule(max(self.gap_ms, int(wait * 1000)))
+
+    def hint(self, name):
+        self.prefetcher.hint(name)
+        self.schedule()
+
+    def opened(self, name):
+        if name in prefetch.PAGES:
+            self.prefetcher.opened(name)
+            # The page loads its images before Tk is idle again
+            self.root.after_idle(self.show_status)
+            self.schedule()
+
+    def show_status(self):
+        summary = self.prefetcher.summary()
+        if self.status is not None and summary["hit_rate"] is not None:
+            self.status.configure(text=f"Prefetch hit rate {summary['hit_rate']:.0%}, "
+                                       f"{summary['warm_pages']}/{summary['pages']} pages opened warm")
+
+    def bind_widget(self, widget, name):
+        for sequence in ("<Enter>", "<FocusIn>"):
+            widget.bind(sequence, lambda e: self.hint(name), add="+")
+
+    def bind_combobox(self, combo, names):
+        """Hint the entry under the pointer or keyboard cursor in the dropdown
+        list of a readonly combobox, or its current value on hover/focus."""
+        def current(event):
+            if combo.get() in names:
+                self.hint(combo.get())
+        for sequence in ("<Enter>", "<FocusIn>"):
+            combo.bind(sequence, current, add="+")
+        listbox = combo.tk.eval(f"ttk::combobox::PopdownWindow {combo}") + ".f.l"
+        def pointer(y):
+            self.hint(names[int(combo.tk.call(listbox, "nearest", y))])
+        def cursor():
+            self.hint(names[int(combo.tk.call(listbox, "index", "active"))])
+        combo.tk.call("bind", listbox, "<Motion>", "+" + combo.register(pointer) + " %y")
+        combo.tk.call("bind", listbox, "<KeyRelease>", "+" + combo.register(cursor))
+
+def draw_xy_plot(canvas, series, xlabel, ylabel, log_y=False):
+    """Draw line/point series on a Canvas; each series is a dict with x, y,
+    colour and style ('line' or 'points')."""
+    canvas.delete('all')
+    width = int(canvas.cget('width'))
+    height = int(canvas.cget('height'))
+    left, right, top, bottom = 70, 15, 15, 45
+
+    def transform(y):
+        y = np.asarray(y, dtype=float)
+        if log_y:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.log10(np.abs(y))
+        return y
+
+    xs = np.concatenate([np.asarray(s['x'], dtype=float) for s in series])
+    ys = np.concatenate([transform(s['y']) for s in series])
+    ok = np.isfinite(xs) & np.isfinite(ys)
+    if not ok.any():
+        return
+    x0, x1 = xs[ok].min(), xs[ok].max()
+    y0, y1 = ys[ok].min(), ys[ok].max()
+    x1 = x1 if x1 > x0 else x0 + 1
+    y1 = y1 if y1 > y0 else y0 + 1
+
+    def px(x):
+        return left + (x - x0) / (x1 - x0) * (width - left - right)
+
+    def py(y):
+        return height - bottom - (y - y0) / (y1 - y0) * (height - top - bottom)
+
+    canvas.create_rectangle(left, top, width - right, height - bottom, outline='black')
+    for k in range(5):
+        xv = x0 + k * (x1 - x0) / 4
+        yv = y0 + k * (y1 - y0) / 4
+        canvas.create_text(px(xv), height - bottom + 12, text=f"{xv:.3g}", font=("Arial", 8))
+        label = f"1e{yv:.1f}" if log_y else f"{yv:.3g}"
+        canvas.create_text(left - 5, py(yv), text=label, anchor='e', font=("Arial", 8))
+    canvas.create_text((left + width - right) / 2, height - 12, text=xlabel, font=("Arial", 9))
+    canvas.create_text(12, (top + height - bottom) / 2, text=ylabel, angle=90, font=("Arial", 9))
+
+    for s in series:
+        x = np.asarray(s['x'], dtype=float)
+        y = transform(s['y'])
+        keep = np.isfinite(x) & np.isfinite(y)
+        # Long traces are reduced to a min/max envelope of the plot width
+        x, y = measurement_io.decimate(x[keep], y[keep], 2 * width)
+        points = np.column_stack([px(x), py(y)])
+        if s.get('style', 'line') == 'points':
+            for cx, cy in points:
+                canvas.create_oval(cx - 2, cy - 2, cx + 2, cy + 2, outline=s['colour'])
+        elif len(points) > 1:
+            canvas.create_line(*points.ravel(), fill=s['colour'], width=2)
+
+def open_bake_simulation(profile_name):
+    """Wafer temperature uniformity for one of the bake profiles (steps 4, 6, 8)."""
+    sim_window = tk.Toplevel(root)
+    sim_window.title(f"{profile_name} Wafer Uniformity")
+    sim_window.geometry("750x480")
+    sim_window.configure(bg='white')
+
+    tk.Label(sim_window, 
+             text=f"{profile_name}: Wafer Temperature Uniformity", 
+             font=("Arial", 16, "bold"), 
+             bg='white').pack(pady=10)
+
+    body = tk.Frame(sim_window, bg='white')
+    body.pack(fill='both', expand=True, padx=20)
+
+    img_label = tk.Label(body, text="Simulating...", font=("Arial", 10), bg='white', width=40)
+    img_label.pack(side='left', padx=10)
+
+    text_widget = tk.Text(body, font=("Arial", 10), bg='white', wrap='word', 
+                          width=45, height=18, padx=5, pady=5, relief='flat')
+    text_widget.pack(side='left', fill='both', expand=True)
+
+    def show(result):
+        report = result.report()
+        img = ImageTk.PhotoImage(result.render(300))
+        img_label.configure(image=img, text='', width=300)
+        img_label.image = img  # Keep reference
+
+        lines = [f"Setpoint: {report['setpoint']:.1f}°C ±{report['tolerance']}°C",
+                 "",
+                 "Wafer at end of soak:",
+                 f"• Mean: {report['mean']:.2f}°C",
+                 f"• Min / Max: {report['min']:.2f}°C / {report['max']:.2f}°C",
+                 f"• Spatial spread: {report['spread']:.3f}°C",
+                 f"• Peak spread during soak: {report['peak_soak_spread']:.3f}°C",
+                 f"• Area within tolerance: {100 * report['in_tolerance']:.1f}%"]
+        if 'in_window' in report:
+            low, high = result.spec['window']
+            lines.append(f"• Process window {low:.0f}-{high:.0f}°C: "
+                         f"{'met' if report['in_window'] else 'NOT met'}")
+        lines += ["",
+                  "Map: deviation from setpoint at the end of the soak",
+                  f"(blue = -{report['tolerance']}°C, white = setpoint, red = +{report['tolerance']}°C)"]
+        text_widget.insert('end', "\n".join(lines))
+        text_widget.config(state='disabled')
+
+    run_in_background(sim_window, lambda: bake_thermal.simulate(profile_name), show,
+                      lambda e: img_label.configure(text=f"Simulation failed: {e}"))
+
+    ttk.Button(sim_window, 
+               text="Close", 
+               command=sim_window.destroy).pack(pady=10)
+
+def open_cell_simulation():
+    """Discrete-event throughput simulation of the track/scanner cell (steps 1-8)."""
+    sim_window = tk.Toplevel(root)
+    sim_window.title("Lithography Cell Throughput")
+    sim_window.geometry("900x720")
+    sim_window.configure(bg='white')
+
+    tk.Label(sim_window,
+             text="Lithography Cell: Throughput, Cycle Time and WIP",
+             font=("Arial", 16, "bold"),
+             bg='white').pack(pady=10)
+
+    controls = tk.Frame(sim_window, bg='white')
+    controls.pack(anchor='w', padx=20)
+    exposure = tk.StringVar(value=next(iter(litho_cell.EXPOSURE_TOOLS)))
+    ttk.Combobox(controls, textvariable=exposure, values=list(litho_cell.EXPOSURE_TOOLS),
+                 state="readonly", width=24).pack(side='left')
+    wafers_var = tk.StringVar(value="10000")
+    rate_var = tk.StringVar(value="140")
+    variability_var = tk.StringVar(value="0.2")
+    for label, var in (("Wafers:", wafers_var), ("Start rate (wph):", rate_var), ("Time CV:", variability_var)):
+        tk.Label(controls, text=label, bg='white').pack(side='left', padx=(10, 0))
+        ttk.Entry(controls, textvariable=var, width=7).pack(side='left', padx=5)
+    run_btn = ttk.Button(controls, text="Simulate")
+    run_btn.pack(side='left', padx=10)
+
+    grid = tk.Frame(sim_window, bg='white')
+    grid.pack(anchor='w', padx=20, pady=10)
+    headings = ("Step", "Time", "Batch", "Tools", "Capacity (wph)", "Utilization", "Mean wait (min)")
+    for column, heading in enumerate(headings):
+        tk.Label(grid, text=heading, font=("Arial", 9, "bold"), bg='white').grid(row=0, column=column, sticky='w', padx=6)
+    tool_vars, result_labels = {}, []
+    for row, step in enumerate(litho_cell.LITHO_FLOW, start=1):
+        tk.Label(grid, text=step["name"], bg='white').grid(row=row, column=0, sticky='w', padx=6)
+        time_text = "per tool" if step["name"] == "Exposure" else (
+            f"{step['time_s'] / 60:g} min" if step["time_s"] >= 600 else f"{step['time_s']:g} s")
+        tk.Label(grid, text=time_text, bg='white').grid(row=row, column=1, sticky='w', padx=6)
+        tk.Label(grid, text=step["batch"], bg='white').grid(row=row, column=2, sticky='w', padx=6)
+        tool_vars[step["name"]] = tk.StringVar(value=str(step["tools"]))
+        ttk.Spinbox(grid, from_=1, to=20, textvariable=tool_vars[step["name"]], width=4).grid(row=row, column=3, padx=6)
+        labels = [tk.Label(grid, text="", font=("Courier", 10), bg='white') for _ in range(3)]
+        for column, label in enumerate(labels, start=4):
+            label.grid(row=row, column=column, sticky='w', padx=6)
+        result_labels.append(labels)
+
+    status = tk.Label(sim_window, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w', padx=20)
+    plot = tk.Canvas(sim_window, width=620, height=260, bg='white', highlightthickness=0)
+    plot.pack(anchor='w', padx=20, pady=5)
+
+    def run():
+        try:
+            wafers = int(wafers_var.get())
+            rate = float(rate_var.get()) if rate_var.get().strip() else None
+            variability = float(variability_var.get())
+            tools = {name: int(var.get()) for name, var in tool_vars.items()}
+        except ValueError:
+            status.configure(text="Invalid wafer count, start rate, variability or tool count")
+            return
+        steps = litho_cell.flow(exposure.get(), tools)
+        status.configure(text=f"Simulating {wafers:,} wafers...")
+        run_btn.state(['disabled'])
+        def done(result):
+            run_btn.state(['!disabled'])
+            for labels, step in zip(result_labels, result['steps']):
+                colour = 'red' if step['name'] == result['bottleneck'] else 'black'
+                for label, text in zip(labels, (f"{step['capacity_wph']:.0f}", f"{step['utilization']:.0%}",
+                                                f"{step['mean_wait_min']:.1f}")):
+                    label.configure(text=text, fg=colour)
+            status.configure(text=f"Throughput {result['wph']:.1f} wph (steady state {result['steady_wph']:.1f}), "
+                                  f"bottleneck: {result['bottleneck']}\n"
+                                  f"Cycle time {result['cycle_time_min']:.0f} min mean, "
+                                  f"{result['cycle_time_p90_min']:.0f} min p90 · "
+                                  f"WIP {result['mean_wip']:.0f} mean, {result['max_wip']} max · "
+                                  f"{result['makespan_h']:.1f} h total")
+            hours, wip = result['wip_trace']
+            draw_xy_plot(plot, [{'x': hours, 'y': wip, 'colour': 'blue'}], "Time (h)", "Wafers in process")
+        def failed(error):
+            run_btn.state(['!disabled'])
+            status.configure(text=f"Simulation failed: {error}")
+        run_in_background(sim_window, lambda: litho_cell.simulate(steps, wafers, rate, variability=variability),
+                          done, failed)
+
+    run_btn.configure(command=run)
+    ttk.Button(sim_window,
+               text="Close",
+               command=sim_window.destroy).pack(pady=10)
+
+def open_yield_simulation():
+    """Monte Carlo yield and dose/focus process window from the step tolerances."""
+    yield_window = tk.Toplevel(root)
+    yield_window.title("Process Window and Yield")
+    yield_window.geometry("1000x760")
+    yield_window.configure(bg='white')
+
+    tk.Label(yield_window,
+             text="Monte Carlo Process Window and Yield",
+             font=("Arial", 16, "bold"),
+             bg='white').pack(pady=10)
+
+    controls = tk.Frame(yield_window, bg='white')
+    controls.pack(anchor='w', padx=20)
+    samples_var = tk.StringVar(value="1000000")
+    scale_var = tk.StringVar(value="1.0")
+    tolerance_var = tk.StringVar(value=f"{process_yield.SPEC['cd_tolerance'] * 100:g}")
+    overlay_var = tk.StringVar(value=f"{process_yield.SPEC['overlay_nm']:g}")
+    for label, var in (("Samples:", samples_var), ("Spread ×:", scale_var),
+                       ("CD tolerance (%):", tolerance_var), ("Overlay spec (nm):", overlay_var)):
+        tk.Label(controls, text=label, bg='white').pack(side='left', padx=(10, 0))
+        ttk.Entry(controls, textvariable=var, width=9).pack(side='left', padx=5)
+    run_btn = ttk.Button(controls, text="Run")
+    run_btn.pack(side='left', padx=10)
+
+    status = tk.Label(yield_window, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w', padx=20, pady=5)
+
+    body = tk.Frame(yield_window, bg='white')
+    body.pack(fill='both', expand=True, padx=20)
+    left = tk.Frame(body, bg='white')
+    left.pack(side='left', anchor='n')
+    tk.Label(left, text="Yield over dose (rows) × focus (columns)", font=("Arial", 9), bg='white').pack()
+    map_label = tk.Label(left, bg='white')
+    map_label.pack()
+    map_caption = tk.Label(left, text="", font=("Arial", 9), bg='white')
+    map_caption.pack()
+    right = tk.Frame(body, bg='white')
+    right.pack(side='left', padx=10)
+    tolerance_plot = tk.Canvas(right, width=520, height=260, bg='white', highlightthickness=0)
+    tolerance_plot.pack()
+    latitude_plot = tk.Canvas(right, width=520, height=260, bg='white', highlightthickness=0)
+    latitude_plot.pack()
+
+    def run():
+        try:
+            samples = int(samples_var.get())
+            scale = float(scale_var.get())
+            spec = {"cd_tolerance": float(tolerance_var.get()) / 100, "overlay_nm": float(overlay_var.get())}
+        except ValueError:
+            status.configure(text="Invalid sample count, spread or spec")
+            return
+        status.configure(text=f"Sampling {samples:,} dies...")
+        run_btn.state(['disabled'])
+        def work():
+            start = time.perf_counter()
+            result = process_yield.run(samples, scale, spec)
+            window = process_yield.process_window(scale=scale, spec=spec)
+            return result, window, time.perf_counter() - start
+        def done(outcome):
+            result, window, elapsed = outcome
+            run_btn.state(['!disabled'])
+            fails = "  ".join(f"{cause} {share:.2%}" for cause, share in result['fails'].items())
+            status.configure(text=f"Yield {result['yield']:.2%} of {samples:,} dies ({elapsed:.1f} s)\n"
+                                  f"Fails: {fails}\n"
+                                  f"Depth of focus {window['dof']:.0f} nm at ≥{window['min_latitude']:g}% "
+                                  f"exposure latitude, yield ≥{window['threshold']:.0%}")
+            tolerance, curve = result['tolerance_curve']
+            draw_xy_plot(tolerance_plot, [{'x': tolerance * 100, 'y': curve * 100, 'colour': 'blue'}],
+                         "CD tolerance (± %)", "Yield (%)")
+            draw_xy_plot(latitude_plot, [{'x': window['focus'], 'y': window['latitude'], 'colour': 'red'}],
+                         "Focus (nm)", "Exposure latitude (%)")
+            rows, cols = window['yield'].shape
+            scaled = (np.clip(window['yield'], 0, 1) * 255).astype(np.uint8)[::-1]
+            zoom = max(1, 360 // max(rows, cols))
+            image = Image.fromarray(image_pyramid.AFMHOT[scaled]).resize((cols * zoom, rows * zoom), Image.NEAREST)
+            photo = ImageTk.PhotoImage(image)
+            map_label.configure(image=photo)
+            map_label.image = photo
+            map_caption.configure(text=f"dose {window['dose'][0]:+g}…{window['dose'][-1]:+g}% (bottom to top), "
+                                       f"focus {window['focus'][0]:+g}…{window['focus'][-1]:+g} nm; "
+                                       f"peak yield {window['yield'].max():.1%}")
+        def failed(error):
+            run_btn.state(['!disabled'])
+            status.configure(text=f"Simulation failed: {error}")
+        run_in_background(yield_window, work, done, failed)
+
+    run_btn.configure(command=run)
+    ttk.Button(controls, text="Wafer map...", command=open_wafer_map).pack(side='left')
+    ttk.Button(yield_window,
+               text="Close",
+               command=yield_window.destroy).pack(pady=10)
+
+def open_wafer_map(wafer=None, title="Wafer Map"):
+    """Pan/zoom wafer map of per-die values; simulated CD or defects, a die
+    value file, or a given wafer_map.WaferMap."""
+    map_window = tk.Toplevel(root)
+    map_window.title(title)
+    map_window.geometry("960x680")
+    map_window.configure(bg='white')
+
+    tk.Label(map_window,
+             text=title,
+             font=("Arial", 16, "bold"),
+             bg='white').pack(pady=10)
+
+    controls = tk.Frame(map_window, bg='white')
+    controls.pack(anchor='w', padx=20)
+    sources = {"Simulated CD (nm)": "cd", "Simulated defects (/cm²)": "defects"}
+    source = tk.StringVar(value=next(iter(sources)))
+    ttk.Combobox(controls, textvariable=source, values=list(sources), state="readonly", width=22).pack(side='left')
+    die_var = tk.StringVar(value="10")
+    density_var = tk.StringVar(value=f"{process_yield.SPEC['defect_density_cm2']:g}")
+    for label, var in (("Die size (mm):", die_var), ("Defects/cm²:", density_var)):
+        tk.Label(controls, text=label, bg='white').pack(side='left', padx=(10, 0))
+        ttk.Entry(controls, textvariable=var, width=6).pack(side='left', padx=5)
+    generate_btn = ttk.Button(controls, text="Generate")
+    generate_btn.pack(side='left', padx=5)
+    open_btn = ttk.Button(controls, text="Open die values...")
+    open_btn.pack(side='left', padx=5)
+
+    bin_controls = tk.Frame(map_window, bg='white')
+    bin_controls.pack(anchor='w', padx=20, pady=5)
+    bins_var = tk.StringVar(value="16")
+    binning = tk.StringVar(value="Linear")
+    tk.Label(bin_controls, text="Colour bins:", bg='white').pack(side='left')
+    ttk.Spinbox(bin_controls, from_=2, to=64, textvariable=bins_var, width=4).pack(side='left', padx=5)
+    ttk.Combobox(bin_controls, textvariable=binning, values=("Linear", "Quantile"),
+                 state="readonly", width=9).pack(side='left', padx=5)
+    ttk.Button(bin_controls, text="Fit", command=lambda: view.fit()).pack(side='left', padx=5)
+
+    body = tk.Frame(map_window, bg='white')
+    body.pack(anchor='w', padx=20)
+    legend = tk.Canvas(body, width=150, height=450, bg='white', highlightthickness=0)
+    status = tk.Label(map_window, text="", justify='left', font=("Courier", 10), bg='white')
+    hover = tk.Label(map_window, text="", font=("Courier", 10), bg='white')
+    state = {"wafer": wafer}
+
+    def simulated(kind, die, density):
+        if kind == "defects":
+            return wafer_map.from_defects(*process_yield.wafer_defects(density=density), (die, die), reduce="max")
+        columns, rows = wafer_map.die_grid(die_size=(die, die))
+        return wafer_map.WaferMap(columns, rows, process_yield.wafer_cd(columns, rows, (die, die)), (die, die), 300.0)
+
+    def draw_legend():
+        legend.delete('all')
+        bins = state["wafer"].legend()
+        height = min(24, 420 // len(bins))
+        every = max(1, 14 // height)
+        for k, (low, high, colour) in enumerate(reversed(bins)):
+            top = 10 + k * height
+            legend.create_rectangle(10, top, 34, top + height, fill='#%02x%02x%02x' % colour, outline='')
+            if k % every == 0:
+                legend.create_text(40, top, text=f"{high:.4g}", anchor='w', font=("Arial", 8))
+        legend.create_text(40, 10 + len(bins) * height, text=f"{bins[0][0]:.4g}", anchor='w', font=("Arial", 8))
+
+    def rebin(*_):
+        try:
+            bins = int(bins_var.get())
+        except ValueError:
+            return
+        state["wafer"].set_bins(min(max(bins, 2), 64), binning.get().lower())
+        draw_legend()
+        view.redraw()
+
+    def show(new_wafer):
+        generate_btn.state(['!disabled'])
+        state["wafer"] = new_wafer
+        view.pyramid = new_wafer
+        rebin()
+        view.fit()
+        summary = new_wafer.summary()
+        if summary["measured"]:
+            status.configure(text=f"{summary['dies']:,} dies   mean {summary['mean']:.4g}   "
+                                  f"σ {summary['std']:.3g}   range {summary['min']:.4g} – {summary['max']:.4g}")
+        else:
+            status.configure(text=f"{summary['dies']:,} dies, no values")
+
+    def generate():
+        try:
+            die = float(die_var.get())
+            density = float(density_var.get())
+        except ValueError:
+            status.configure(text="Invalid die size or defect density")
+            return
+        if die <= 0:
+            status.configure(text="Die size must be positive")
+            return
+        status.configure(text="Generating...")
+        generate_btn.state(['disabled'])
+        def failed(error):
+            generate_btn.state(['!disabled'])
+            status.configure(text=f"Generation failed: {error}")
+        run_in_background(map_window, lambda: simulated(sources[source.get()], die, density), show, failed)
+
+    def open_values():
+        path = filedialog.askopenfilename(title="Select die values (column, row, value)",
+                                          filetypes=[("Text files", "*.csv *.txt *.dat"), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            die = float(die_var.get())
+            columns, rows, values = wafer_map.load(path)
+            show(wafer_map.WaferMap(columns, rows, values, (die, die)))
+        except (OSError, ValueError) as e:
+            status.configure(text=f"Could not read {os.path.basename(path)}: {e}")
+
+    if state["wafer"] is None:
+        state["wafer"] = simulated("cd", 10.0, 0.0)
+    view = TiledImageView(body, state["wafer"], width=720, height=450)
+    view.canvas.pack(side='left')
+    legend.pack(side='left', padx=10)
+    status.pack(anchor='w', padx=20, pady=(5, 0))
+    hover.pack(anchor='w', padx=20)
+
+    def on_motion(event):
+        row, col = view.to_pixel(event)
+        die = state["wafer"].die_at(row, col)
+        hover.configure(text=f"Die ({die[0]}, {die[1]}): {die[2]:.4g}" if die else "")
+
+    view.canvas.bind('<Motion>', on_motion)
+    bins_var.trace_add('write', rebin)
+    binning.trace_add('write', rebin)
+    generate_btn.configure(command=generate)
+    open_btn.configure(command=open_values)
+    show(state["wafer"])
+    ttk.Button(map_window,
+               text="Close",
+               command=map_window.destroy).pack(pady=10)
+
+def open_measurement_browser():
+    """Browse the devices and sweeps of a (possibly multi-GB) measurement log."""
+    path = filedialog.askopenfilename(title="Select measurement file",
+                                      filetypes=[("Measurement files", "*.csv *.txt *.dat *.mfb"),
+                                                 ("All files", "*.*")])
+    if not path:
+        return
+
+    browser_window = tk.Toplevel(root)
+    browser_window.title(f"Measurement Browser - {os.path.basename(path)}")
+    browser_window.geometry("1000x600")
+    browser_window.configure(bg='white')
+
+    tk.Label(browser_window, 
+             text=os.path.basename(path), 
+             font=("Arial", 16, "bold"), 
+             bg='white').pack(pady=10)
+
+    controls = tk.Frame(browser_window, bg='white')
+    controls.pack(pady=5)
+    x_column = tk.StringVar()
+    y_column = tk.StringVar()
+    tk.Label(controls, text="X:", bg='white').pack(side='left')
+    x_select = ttk.Combobox(controls, textvariable=x_column, state="readonly", width=12)
+    x_select.pack(side='left', padx=5)
+    tk.Label(controls, text="Y:", bg='white').pack(side='left')
+    y_select = ttk.Combobox(controls, textvariable=y_column, state="readonly", width=12)
+    y_select.pack(side='left', padx=5)
+    log_y = tk.BooleanVar(value=False)
+    ttk.Checkbutton(controls, text="Log Y", variable=log_y).pack(side='left', padx=5)
+    status = tk.Label(controls, text="Indexing (first open converts large CSV files)...", bg='white')
+    status.pack(side='left', padx=10)
+
+    body = tk.Frame(browser_window, bg='white')
+    body.pack(fill='both', expand=True, padx=10)
+
+    table = ttk.Treeview(body, columns=("rows",), height=20)
+    table.heading('#0', text="Device / sweep")
+    table.heading('rows', text="Rows")
+    table.column('#0', width=200)
+    table.column('rows', width=80)
+    table_scroll = ttk.Scrollbar(body, orient='vertical', command=table.yview)
+    table.configure(yscrollcommand=table_scroll.set)
+    table.pack(side='left', fill='both', expand=True)
+    table_scroll.pack(side='left', fill='y')
+
+    plot = tk.Canvas(body, width=560, height=420, bg='white', highlightthickness=0)
+    plot.pack(side='left', padx=10)
+
+    def show(measurement):
+        status.configure(text=f"{measurement.rows:,} rows, {len(measurement.devices):,} devices"
+                              + (f", {measurement.rejected:,} malformed rows skipped" if measurement.rejected else ""))
+        x_select.configure(values=measurement.columns)
+        y_select.configure(values=measurement.columns)
+        if measurement.columns:
+            x_column.set(measurement.columns[0])
+            y_column.set(measurement.columns[-1])
+        for device, spans in measurement.index.items():
+            for number, (start, stop) in enumerate(spans):
+                label = device or os.path.basename(path)
+                label = f"{label} #{number + 1}" if len(spans) > 1 else label
+                table.insert('', 'end', iid=f"{number}|{device}", text=label, values=(stop - start,))
+
+        def plot_selected(event=None):
+            selection = table.selection()
+            if not selection or not x_column.get():
+                return
+            number, _, device = selection[0].partition('|')
+            sweep = measurement.sweep(device, int(number))
+            draw_xy_plot(plot, [{'x': sweep[x_column.get()], 'y': sweep[y_column.get()], 'colour': 'blue'}],
+                         x_column.get(), y_column.get(), log_y=log_y.get())
+
+        table.bind('<<TreeviewSelect>>', plot_selected)
+        x_select.bind("<<ComboboxSelected>>", plot_selected)
+        y_select.bind("<<ComboboxSelected>>", plot_selected)
+        log_y.trace_add('write', lambda *args: plot_selected())
+        children = table.get_children()
+        if children:
+            table.selection_set(children[0])
+
+    run_in_background(browser_window, lambda: measurement_io.open_measurement(path), show,
+                      lambda e: status.configure(text=f"Could not read {os.path.basename(path)}: {e}"))
+
+    ttk.Button(browser_window, 
+               text="Close", 
+               command=browser_window.destroy).pack(pady=10)
+
+def open_iv_analysis():
+    """Load I-V sweep files, batch-fit the diode model and classify SCLC regimes."""
+    paths = filedialog.askopenfilenames(title="Select I-V sweep files",
+                                        filetypes=[("Sweep files", "*.csv *.txt *.dat"), ("All files", "*.*")])
+    if not paths:
+        return
+
+    analysis_window = tk.Toplevel(root)
+    analysis_window.title("I-V Analysis")
+    analysis_window.geometry("1100x600")
+    analysis_window.configure(bg='white')
+
+    title = tk.Label(analysis_window, 
+                     text="I-V Analysis", 
+                     font=("Arial", 16, "bold"), 
+                     bg='white')
+    title.pack(pady=10)
+    status = tk.Label(analysis_window, text="Loading sweeps...", bg='white')
+    status.pack()
+
+    body = tk.Frame(analysis_window, bg='white')
+    body.pack(fill='both', expand=True, padx=10)
+
+    columns = ("device", "n", "Is", "Rs", "regimes")
+    table = ttk.Treeview(body, columns=columns, show='headings', height=20)
+    for column, heading, width in zip(columns, ("Device", "n", "Is (A)", "Rs (Ω)", "SCLC regimes"),
+                                      (120, 50, 80, 70, 200)):
+        table.heading(column, text=heading)
+        table.column(column, width=width, anchor='w')
+    table_scroll = ttk.Scrollbar(body, orient='vertical', command=table.yview)
+    table.configure(yscrollcommand=table_scroll.set)
+    table.pack(side='left', fill='both', expand=True)
+    table_scroll.pack(side='left', fill='y')
+
+    plot = tk.Canvas(body, width=500, height=400, bg='white', highlightthickness=0)
+    plot.pack(side='left', padx=10)
+
+    sweeps = []
+
+    def show(results):
+        status.configure(text=f"{len(results)} devices fitted")
+        for row, result in enumerate(results):
+            regimes = " → ".join(name for name, _, _ in result['regimes'])
+            table.insert('', 'end', iid=str(row), values=(
+                result['device'], f"{result['n']:.2f}", f"{result['Is']:.2e}",
+                f"{result['Rs']:.3g}", regimes))
+
+        def plot_selected(event=None):
+            selection = table.selection()
+            row = int(selection[0]) if selection else 0
+            name, v, i = sweeps[row]
+            result = results[row]
+            v_fit = np.linspace(max(np.nanmin(v), 1e-3), np.nanmax(v), 200)
+            i_fit = iv_analysis.diode_current(v_fit, result['Is'], result['n'], result['Rs'])
+            draw_xy_plot(plot, [{'x': v, 'y': i, 'colour': 'blue', 'style': 'points'},
+                                {'x': v_fit, 'y': i_fit, 'colour': 'red'}],
+                         f"Voltage (V) - {name}", "|Current| (A)", log_y=True)
+
+        table.bind('<<TreeviewSelect>>', plot_selected)
+        plot_selected()
+
+        # Devices named by die (e.g. "X3Y-5") can be mapped across the wafer
+        columns, rows, found = wafer_map.die_coordinates([result['device'] for result in results])
+        if found.any():
+            ideality = np.array([result['n'] for result in results])
+            ttk.Button(analysis_window, text="Wafer map of ideality factor",
+                       command=lambda: open_wafer_map(wafer_map.WaferMap(columns[found], rows[found], ideality[found]),
+                                                      "I-V Wafer Map: ideality factor")).pack()
+
+    def load():
+        loaded = []
+        for path in paths:
+            try:
+                loaded.extend(iv_analysis.load_sweeps(path))
+            except Exception as e:
+                raise ValueError(f"Could not read {os.path.basename(path)}: {e}") from e
+        return loaded
+
+    def loaded(result):
+        if not result:
+            status.configure(text="No I-V sweeps found in the selected files")
+            return
+        sweeps.extend(result)
+        title.configure(text=f"I-V Analysis ({len(sweeps)} devices)")
+        status.configure(text="Fitting...")
+        run_in_background(analysis_window, lambda: iv_analysis.analyze(sweeps), show,
+                          lambda e: status.configure(text=f"Analysis failed: {e}"))
+
+    run_in_background(analysis_window, load, loaded, lambda e: status.configure(text=str(e)))
+
+    ttk.Button(analysis_window, 
+               text="Close", 
+               command=analysis_window.destroy).pack(pady=10)
+
+def open_cv_analysis():
+    """Doping profiles and flatband voltage for any number of C-V sweep files."""
+    paths = filedialog.askopenfilenames(title="Select C-V sweep files",
+                                        filetypes=[("Sweep files", "*.csv *.txt *.dat"), ("All files", "*.*")])
+    if not paths:
+        return
+
+    analysis_window = tk.Toplevel(root)
+    analysis_window.title("C-V Analysis")
+    analysis_window.geometry("1150x620")
+    analysis_window.configure(bg='white')
+
+    tk.Label(analysis_window, 
+             text=f"C-V Analysis ({len(paths)} files)", 
+             font=("Arial", 16, "bold"), 
+             bg='white').pack(pady=10)
+
+    settings = tk.Frame(analysis_window, bg='white')
+    settings.pack(pady=5)
+    area = tk.StringVar(value="1e-3")
+    phi_ms = tk.StringVar(value="0.0")
+    tk.Label(settings, text="Gate area (cm²):", bg='white').pack(side='left')
+    ttk.Entry(settings, textvariable=area, width=10).pack(side='left', padx=5)
+    tk.Label(settings, text="Φms (V):", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(settings, textvariable=phi_ms, width=8).pack(side='left', padx=5)
+    run_btn = ttk.Button(settings, text="Run")
+    run_btn.pack(side='left', padx=10)
+    status = tk.Label(settings, text="", bg='white')
+    status.pack(side='left')
+
+    body = tk.Frame(analysis_window, bg='white')
+    body.pack(fill='both', expand=True, padx=10)
+
+    columns = ("file", "frequency", "doping", "vfb", "cox", "qf")
+    table = ttk.Treeview(body, columns=columns, show='headings', height=20)
+    for column, heading, width in zip(columns, ("File", "f (Hz)", "N (cm⁻³)", "V_fb (V)", "C_ox (F)", "Q_f/q (cm⁻²)"),
+                                      (150, 70, 80, 70, 80, 90)):
+        table.heading(column, text=heading)
+        table.column(column, width=width, anchor='w')
+    table_scroll = ttk.Scrollbar(body, orient='vertical', command=table.yview)
+    table.configure(yscrollcommand=table_scroll.set)
+    table.pack(side='left', fill='both', expand=True)
+    table_scroll.pack(side='left', fill='y')
+
+    plot = tk.Canvas(body, width=480, height=400, bg='white', highlightthickness=0)
+    plot.pack(side='left', padx=10)
+
+    sweeps = {}
+    def plot_selected(event=None):
+        selection = table.selection()
+        if not selection:
+            return
+        sweep = sweeps[selection[0]]
+        draw_xy_plot(plot, [{'x': sweep['depth_um'], 'y': sweep['doping_cm3'], 'colour': 'blue'}],
+                     "Depth (µm)", "Doping (cm⁻³)", log_y=True)
+
+    table.bind('<<TreeviewSelect>>', plot_selected)
+
+    def run():
+        try:
+            params = {'area': float(area.get()), 'phi_ms': float(phi_ms.get())}
+        except ValueError:
+            status.configure(text="Invalid area or Φms")
+            return
+        table.delete(*table.get_children())
+        sweeps.clear()
+        counts = {'new': 0, 'cached': 0, 'failed': 0, 'last_error': ""}
+        show_counts = batch_status(status, counts)
+        run_btn.state(['disabled'])
+
+        def add(item):
+            path, result, cached = item
+            if 'error' in result:
+                print(f"Error analysing {path}: {result['error']}")
+                counts['failed'] += 1
+                counts['last_error'] = f"{os.path.basename(path)}: {result['error']}"
+            else:
+                counts['cached' if cached else 'new'] += 1
+            show_counts()
+            for sweep in result.get('sweeps', []):
+                iid = str(len(sweeps))
+                sweeps[iid] = sweep
+                frequency = f"{sweep['frequency']:g}" if sweep['frequency'] else "-"
+                table.insert('', 'end', iid=iid, values=(
+                    os.path.basename(path), frequency, f"{sweep['bulk_doping_cm3']:.2e}",
+                    f"{sweep['flatband_v']:.3f}", f"{sweep['c_ox_f']:.3g}", f"{sweep['fixed_charge_cm2']:.2e}"))
+
+        def done():
+            run_btn.state(['!disabled'])
+            if sweeps and not table.selection():
+                table.selection_set('0')
+
+        def stopped(error):
+            run_btn.state(['!disabled'])
+            show_counts(f"\nAnalysis stopped early: {error}")
+
+        stream_in_background(analysis_window, cv_analysis.analyze_files(paths, **params), add, done, stopped)
+
+    run_btn.configure(command=run)
+    run()
+
+    ttk.Button(analysis_window, 
+               text="Close", 
+               command=analysis_window.destroy).pack(pady=10)
+
+def add_etch_animation(parent, width):
+    """Step 9 illustration: level-set etch profile simulated frame by frame."""
+    sim_frame = tk.Frame(parent, bg='white')
+    sim_frame.pack(side='right', padx=10)
+
+    anim_label = tk.Label(sim_frame, bg='white')
+    anim_label.pack()
+
+    material = tk.StringVar(value="Si")
+    caption = tk.Label(sim_frame, font=("Arial", 9), bg='white')
+    caption.pack(pady=(5, 0))
+    selector = ttk.Combobox(sim_frame, textvariable=material, values=list(etch_sim.MATERIALS),
+                            state="readonly", width=8)
+    selector.pack(pady=5)
+
+    animation = []
+    def restart(event=None):
+        if animation:
+            animation.pop().stop()
+        recipe = etch_sim.MATERIALS[material.get()]
+        caption.configure(text=f"{recipe['chemistry']}, Resist:{material.get()} = 1:{recipe['selectivity']:g}")
+        frames = page_prefetch.prefetcher.etch_frames(material.get())
+        animation.append(AnimatedFrames(anim_label, frames or etch_sim.etch_frames(material.get()), width))
+
+    selector.bind("<<ComboboxSelected>>", restart)
+    restart()
+
 def open_litho_process():
+    page_prefetch.opened("Lithography")
     process_window = tk.Toplevel(root)
-    process_window.title("Detailed Lithography Process with Visual Guides")
+    process_window.title(pages.PROCESSES["Lithography"]["window"])
     process_window.geometry("1000x700")
     process_window.configure(bg='white')
     
@@ -117,176 +1135,27 @@ def open_litho_process():
     
     # Title
     tk.Label(content_frame, 
-             text="Comprehensive Lithography Process with Visual References", 
+             text=pages.PROCESSES["Lithography"]["title"], 
              font=("Arial", 16, "bold"), 
              bg='white').pack(pady=20)
     
 
-    steps = [
-        ("1. Substrate Preparation", 
-         """The lithography process begins with meticulous wafer cleaning - the foundation for all subsequent steps. Using the industry-standard RCA cleaning method, wafers undergo a two-stage purification process: first removing organic contaminants with an ammonia-peroxide solution, then eliminating metallic ions with a hydrochloric acid mixture. 
-
-The science behind this: These solutions create chemical reactions that lift contaminants from the silicon surface without damaging its crystalline structure. Megasonic cleaning (high-frequency sound waves) then removes nanoparticles, while spin-rinse-drying leaves an atomically smooth surface. 
-
-Why it matters: Even nanometer-scale impurities can disrupt circuit patterns. This cleaning ensures perfect photoresist adhesion and pattern fidelity in later steps.
-         
-         The substrate preparation begins with a thorough cleaning sequence:
-         • RCA Standard Clean 1 (SC-1): 5:1:1 H2O:H2O2:NH4OH at 75°C ±2°C for 10min
-         • Megasonic DI rinse: 1MHz frequency, 20°C ±1°C for 3min
-         • RCA Standard Clean 2 (SC-2): 6:1:1 H2O:H2O2:HCl at 75°C ±2°C for 10min
-         • Final rinse: Overflow DI water (18.2MΩ·cm) for 5min
-         • Spin-rinse-dry: 2000rpm for 60s with N2 purge""",
-         "step1_substrate.png"),
-
-        ("2. HMDS Priming", 
-         """Before photoresist application, wafers receive an HMDS primer that transforms the surface chemistry. In a vacuum chamber, HMDS vapor reacts with surface hydroxyl groups to create a hydrophobic monolayer.
-
-The chemistry at work: Si-OH + HMDS → Si-O-Si(CH₃)₃ + NH₃. This reaction changes the wafer from water-attracting to water-repelling, much like waxing a car. 
-
-Practical importance: This invisible layer (just 1-2 molecules thick) prevents resist beading and ensures uniform coating. Modern systems integrate this step with coating tracks to maintain cleanroom conditions throughout.
-         
-         HMDS vapor priming process details:
-         Equipment: SVG Coat Track with vacuum vapor prime module
-         Process Sequence:
-         1. Dehydration bake: 150°C ±1°C for 60s (hotplate)
-         2. Vacuum pump down: 30s to 50Torr ±5Torr
-         3. HMDS vapor dose: 5ml liquid HMDS vaporized at 23°C
-         4. Reaction time: 45s ±5s at 50Torr
-         5. Vent to N2 atmosphere: 20s ramp to 760Torr
-
-         Chemical Reaction:
-         Si-OH (surface) + (CH3)3Si-NH-Si(CH3)3 → 2 Si-O-Si(CH3)3 + NH3↑""",
-         "step2_hmds.png"),
-
-        ("3. Photoresist Coating", 
-         """A light-sensitive polymer solution is spin-coated onto the wafer, forming an ultra-thin, uniform film. The spinning process has two phases: initial low-speed spread (500-1000 rpm) followed by high-speed thinning (1000-5000 rpm).
-
-Physics principle: Centrifugal force (F=mω²r) distributes the resist outward while solvent evaporation leaves a solid film. The thickness follows t = kω^α, where faster spins create thinner films.
-
-Key considerations: Processing occurs under yellow light to prevent premature exposure. Resist is filtered to 0.1μm to remove particles that could cause defects in the nanoscale patterns.
-         
-         Spin coating specifications for i-line resist:
-         Resist: AZ® 5214E (positive tone)
-         Process Parameters:
-         • Dispense: 3ml resist at 500rpm (static dispense)
-         • Spread: 1000rpm for 3s (accel 10,000rpm/s²)
-         • Spin: 4000rpm for 30s (final thickness 1.4μm)
-         • Edge bead removal: 1mm edge, solvent spray""",
-         "step3_coating.gif"),
-
-        ("4. Soft Bake", 
-         """A gentle bake removes residual solvents and stabilizes the resist film. Modern systems use precisely controlled hotplates with proximity gap technology to ensure uniform heating.
-
-What happens at the molecular level: Polymer chains rearrange and condense, increasing the glass transition temperature (Tg). About 10-30% thickness is lost as solvents evaporate.
-
-Process balance: Temperature must be high enough to remove solvents but low enough to prevent premature degradation of the photosensitive compounds. The sweet spot is typically 90-110°C.
-         
-         Post-apply bake thermal profile:
-         Equipment: In-line hotplate with proximity gap
-         Temperature Zones:
-         1. Ramp-up: 23°C to 100°C in 30s (2.5°C/s)
-         2. Soak: 100°C ±0.3°C for 60s
-         3. Ramp-down: 100°C to 23°C in 45s
-
-         Process Window:
-         • Minimum temp: 95°C (incomplete solvent removal)
-         • Maximum temp: 105°C (resist degradation)
-         • Optimal range: 98-102°C""",
-         "step4_softbake.png"),
-
-        ("5. Exposure", 
-         """The magic of pattern transfer occurs here. Ultraviolet light projects the circuit design through a photomask onto the resist. Modern systems achieve incredible precision - aligning multiple wafer layers within nanometers.
-
-Optical science: Different wavelengths (g-line 436nm to EUV 13.5nm) enable various feature sizes. The aerial image quality depends on numerical aperture and coherence factor.
-
-Advanced techniques: Optical Proximity Correction (OPC) accounts for light diffraction effects, adding tiny adjustments to the mask pattern so it prints correctly on the wafer.
-         
-         """,
-         "step5_exposure.png"),
-
-        ("6. PEB", 
-         """For chemically amplified resists, this bake triggers the crucial chemical reactions that develop the latent image. Heat causes acid molecules to diffuse and catalyze polymer deprotection.
-
-Reaction dynamics: Acid concentration follows [H⁺]=[H⁺]₀e^(-Ea/RT), with diffusion length carefully controlled (typically 10-50nm). Temperature uniformity must be within ±0.1°C across the wafer.
-
-Critical timing: The "PEB delay" between exposure and baking must be minimized (<60s) to prevent atmospheric contaminants from neutralizing the active acid compounds.
-         
-         Post-exposure bake specifications:
-         Equipment: Track-mounted multi-zone hotplate
-         Thermal Profile:
-         • Ramp-up: 23°C to 110°C in 15s (5.8°C/s)
-         • Soak: 110°C ±0.1°C for 60s
-         • Ramp-down: 110°C to 23°C in 20s""",
-         "step6_peb.png"),
-
-        ("7. Development", 
-         """The developer solution washes away exposed resist areas (for positive tone), revealing the 3D circuit pattern. Standard developers use tetramethylammonium hydroxide (TMAH) in precise concentrations.
-
-Process control: Development rate follows R = R₀ + A[H⁺]ⁿ, highly sensitive to temperature (±0.5°C control needed). Megasonic agitation helps develop small features without pattern collapse.
-
-Visualization: Like photographic development, this transforms the invisible latent image into visible structures, creating the stencil for subsequent etching.
-         """,
-         "step7_develop.gif"),
-
-        ("8. Hard Bake", 
-         """A final bake strengthens the remaining resist pattern before etching. This crosslinks polymer chains, improving etch resistance by 20-50%.
-
-Thermal effects: While beneficial for stability, baking causes slight resist flow (5-20nm critical dimension change) that must be accounted for in mask design.
-
-Advanced solutions: Some processes use UV curing instead of thermal baking to minimize dimensional changes for the most advanced nodes.
-         
-         Final bake specifications:
-         Equipment: Convection oven with N2 purge
-         Thermal Profile:
-         • Ramp-up: 23°C to 125°C in 5min (0.34°C/s)
-         • Soak: 125°C ±1°C for 30min
-         • Ramp-down: 125°C to 23°C in 10min
-
-         """,
-         "step8_hardbake.png"),
-
-        ("9. Etching", 
-         """The resist pattern now guides the etching of underlying layers. Plasma etching uses energized ions (like CF₄⁺ or Cl⁺) to physically and chemically remove exposed material.
-
-Precision requirements: Etching must be anisotropic (vertical sidewalls), selective to the resist mask, and uniform across the wafer. Modern systems use real-time optical emission spectroscopy to detect endpoint.
-
-Visual analogy: Like sandblasting through a stencil, this permanently transfers the temporary resist pattern into the actual device layers.
-         
-         Pattern transfer etch process:
-         Equipment: Lam Research 2300 Kiyo
-         Etch Chemistry:
-         • Silicon: HBr/Cl2/O2 (40/20/5sccm)
-         • Oxide: C4F8/Ar/O2 (30/50/5sccm)
-         • Metal: Cl2/BCl3 (30/10sccm)
-
-
-         Selectivity:
-         • Resist:Si = 1:3
-         • Resist:SiO2 = 1:4
-         • Resist:Al = 1:5""",
-         "step9_etch.gif"),
-
-        ("10. Strip & Clean", 
-         """Finally, all remaining resist is completely removed. Options include wet chemical stripping or oxygen plasma ashing, often combined for best results.
-
-Cleaning science: Post-strip cleaning removes any residues that could interfere with subsequent processing. The water break test (observing how water beads on the surface) confirms perfect cleanliness.
-
-Finished result: The wafer now bears the precise circuit patterns and is ready for the next manufacturing steps, such as deposition of additional layers.
-         
-         Resist removal process:
-         Two-Stage Removal:
-         1. Plasma ash: O2 (500sccm) at 250°C, 300W for 2min
-         2. Wet clean: EKC265™ at 85°C for 10min
-
-         Final Cleaning:
-         • SC1: 5min at 70°C
-         • Megasonic: 1MHz for 3min
-         • Marangoni dry: IPA vapor + N2 knife""",
-         "step10_strip.png")
-    ]
+    steps = pages.PROCESSES["Lithography"]["steps"]
 
     # Base directory for images 
     image_dir = "litho_images"  
+
+    # Steps illustrated by a live simulation instead of a stored image
+    simulated_steps = {"9. Etching": add_etch_animation}
+
+    # Simulation tools offered under a step
+    step_tools = {
+        "4. Soft Bake": [("Simulate wafer uniformity", lambda: open_bake_simulation("Soft bake"))],
+        "5. Exposure": [("Simulate cell throughput", open_cell_simulation),
+                        ("Monte Carlo process window and yield", open_yield_simulation)],
+        "6. PEB": [("Simulate wafer uniformity", lambda: open_bake_simulation("PEB"))],
+        "8. Hard Bake": [("Simulate wafer uniformity", lambda: open_bake_simulation("Hard bake"))],
+    }
     
     for step_num, step_desc, img_filename in steps:
         step_frame = tk.Frame(content_frame, bg='white', padx=10, pady=5)
@@ -321,21 +1190,26 @@ Finished result: The wafer now bears the precise circuit patterns and is ready f
         text_widget.pack(fill='both', expand=True)
         
         # Load and display local image (now on right side)
-        img_path = os.path.join(image_dir, img_filename)
-        if os.path.exists(img_path):
+        img_path = os.path.join(image_dir, img_filename) if img_filename else None
+        if img_path is None:
+            simulated_steps[step_num](content_frame_inner, pages.STEP_IMAGE_WIDTH)
+        elif os.path.exists(img_path):
             if img_filename.lower().endswith('.gif'):
                 # Create a label for the GIF
                 gif_label = tk.Label(content_frame_inner, bg='white')
                 gif_label.pack(side='right', padx=10)
                 # Create the animated GIF
-                AnimatedGIF(gif_label, img_path, 350)
+                AnimatedGIF(gif_label, img_path, pages.STEP_IMAGE_WIDTH)
             else:
-                img = load_local_image(img_path, 350)  # Adjust width as needed
+                img = load_local_image(img_path, pages.STEP_IMAGE_WIDTH)
                 if img:
                     img_label = tk.Label(content_frame_inner, image=img, bg='white')
                     img_label.image = img  # Keep reference
                     img_label.pack(side='right', padx=10)
         
+        for tool_text, tool_command in step_tools.get(step_num, []):
+            ttk.Button(step_frame, text=tool_text, command=tool_command).pack(anchor='w', pady=(5, 0))
+        
         # Separator
         ttk.Separator(step_frame, orient='horizontal').pack(fill='x', pady=10)
     
@@ -351,8 +1225,9 @@ Finished result: The wafer now bears the precise circuit patterns and is ready f
 
 def open_char_process():
     """Detailed theoretical explanation of I-V and C-V characterization"""
+    page_prefetch.opened("Characterization")
     process_window = tk.Toplevel(root)
-    process_window.title("I-V & C-V Characterization Theory")
+    process_window.title(pages.PROCESSES["Characterization"]["window"])
     process_window.geometry("1200x850")
     process_window.configure(bg='white')
     
@@ -381,127 +1256,23 @@ def open_char_process():
     
     # Title
     tk.Label(content_frame, 
-             text="Comprehensive Characterization Techniques", 
+             text=pages.PROCESSES["Characterization"]["title"], 
              font=("Arial", 16, "bold"), 
              bg='white').pack(pady=20)
 
     # Characterization steps data
-    char_steps = [
-        ("1. I-V Characterization Fundamentals",
-         """PHYSICAL PRINCIPLES:
-Current-Voltage (I-V) measurements reveal the charge transport mechanisms governing device operation:
-
-1. Thermionic Emission (Forward Bias):
-   - Carriers gain sufficient thermal energy to overcome the potential barrier
-   - Exponential current increase with voltage (ideal diode equation)
-   - Non-idealities manifest through:
-     * Recombination in depletion region (n ≈ 2)
-     * Series resistance effects (high current roll-off)
-     * Tunneling contributions (high doping)
-
-2. Space-Charge Limited Current (SCLC):
-   - Dominates in low-mobility materials
-   - Current limited by injected charge screening
-   - Three regimes:
-     Ohmic (J ∝ V) → Trap-filled limit → Child's law (J ∝ V²)
-
-3. Reverse Bias Characteristics:
-   - Generation current in depletion region
-   - Trap-assisted tunneling (Poole-Frenkel effect)
-   - Avalanche breakdown at high fields
-
-MEASUREMENT CONSIDERATIONS:
-- Voltage sweep direction affects trap charging
-- Temperature dependence reveals activation energies
-- Light illumination separates photoconduction effects""",
-         "iv_theory.png"),
-
-        ("2. C-V Characterization Physics",
-         """CAPACITANCE MECHANISMS:
-Capacitance-Voltage (C-V) measurements probe charge distribution dynamics:
-
-1. Depletion Capacitance:
-   - Space charge region acts as dielectric
-   - Width varies with applied bias (C ∝ 1/√V)
-   - Doping profile extracted from C⁻² vs V slope
-
-2. Interface State Response:
-   - Traps follow AC signal at low frequencies
-   - Freeze out at high frequencies (1MHz)
-   - Conductance method measures trap time constants
-
-3. Deep Level Transients:
-   - Capacitance transients after voltage steps
-   - Emission rate depends on temperature:
-     eₙ = σₙvₜₕNₛexp(-ΔE/kT)""",
-         "cv_theory.png"),
-
-        ("3. Parameter Extraction Methodology",
-         """I-V ANALYSIS:
-1. Ideality Factor (n):
-   - Slope of ln(I) vs V plot
-   - n = (q/kT)(dV/dlnI)
-   - n=1: Pure thermionic emission
-   - n=2: Dominant recombination
-
-2. Series Resistance (Rₛ):
-   - High current deviation from ideal
-   - Rₛ = dV/dI - nkT/qI
-   - Corrected voltage V' = V - IRₛ
-
-C-V ANALYSIS:
-1. Doping Concentration:
-   - N = 2/(qεA²d(1/C²)/dV
-   - Depth profile from incremental analysis
-
-2. Flatband Voltage:
-   - V_fb = Φₘₛ - Qₜₜ/Cₒₓ
-   - Determines fixed charge density""",
-         "analysis_methods.png"),
-
-        ("4. Practical Measurement Considerations",
-         """SYSTEM REQUIREMENTS:
-1. I-V Measurement:
-   - Source-measure unit (SMU) with:
-     * Current resolution < 1pA
-     * Voltage resolution < 1mV
-   - Guarded connections for leakage control
-   - Temperature-controlled stage
-
-2. C-V Measurement:
-   - LCR meter with:
-     * 1mHz-10MHz frequency range
-     * 1fF capacitance resolution
-   - DC bias superposition capability
-   - RF shielding for low-noise
-
-ERROR SOURCES:
-1. I-V Artifacts:
-   - Self-heating at high currents
-   - Photocurrent from ambient light
-   - Non-equilibrium conditions (fast sweeps)
-
-2. C-V Artifacts:
-   - Series resistance effects
-   - Minority carrier response
-   - Deep level transient interference
-
-BEST PRACTICES:
-1. For I-V:
-   - Use 4-wire Kelvin connections
-   - Sweep rates < 100mV/s
-   - Temperature stabilization (±0.1K)
-
-2. For C-V:
-   - Start from accumulation
-   - Multiple frequency measurements
-   - Wait for steady-state (τ > 10×measurement)""",
-         "measurement_setup.png")
-    ]
+    char_steps = pages.PROCESSES["Characterization"]["steps"]
 
 
     # Base directory for characterization images
     char_image_dir = "char_images"  
+
+    # Analysis tools offered under a step
+    step_tools = {
+        "3. Parameter Extraction Methodology": [("Analyze I-V measurements", open_iv_analysis),
+                                                ("Analyze C-V measurements", open_cv_analysis)],
+        "4. Practical Measurement Considerations": [("Browse measurement file", open_measurement_browser)],
+    }
     
     for step_num, step_desc, img_filename in char_steps:
         step_frame = tk.Frame(content_frame, bg='white', padx=10, pady=5)
@@ -543,14 +1314,17 @@ BEST PRACTICES:
                 gif_label = tk.Label(content_frame_inner, bg='white')
                 gif_label.pack(side='right', padx=10)
                 # Create the animated GIF
-                AnimatedGIF(gif_label, img_path, 350)
+                AnimatedGIF(gif_label, img_path, pages.STEP_IMAGE_WIDTH)
             else:
-                img = load_local_image(img_path, 350)
+                img = load_local_image(img_path, pages.STEP_IMAGE_WIDTH)
                 if img:
                     img_label = tk.Label(content_frame_inner, image=img, bg='white')
                     img_label.image = img
                     img_label.pack(side='right', padx=10)
         
+        for tool_text, tool_command in step_tools.get(step_num, []):
+            ttk.Button(step_frame, text=tool_text, command=tool_command).pack(anchor='w', pady=(5, 0))
+        
         ttk.Separator(step_frame, orient='horizontal').pack(fill='x', pady=10)
     
     # Close button
@@ -564,7 +1338,8 @@ BEST PRACTICES:
                                  process_window.destroy()])
 
 
-def create_tech_window(title, description, image_name, image_dir="litho_images"):
+def create_tech_window(title, description, image_name, image_dir="litho_images", extra_panels=()):
+    page_prefetch.opened(title)
     tech_window = tk.Toplevel(root)
     tech_window.title(title)
     tech_window.geometry("900x650")  # Reduced window size
@@ -621,12 +1396,16 @@ def create_tech_window(title, description, image_name, image_dir="litho_images")
     # Load and display image on right
     img_path = os.path.join(image_dir, image_name)
     if os.path.exists(img_path):
-        img = load_local_image(img_path, 300)  # Reduced image size
+        img = load_local_image(img_path, pages.TECHNIQUE_IMAGE_WIDTH)
         if img:
             img_label = tk.Label(content_inner, image=img, bg='white')
             img_label.image = img
             img_label.pack(side='right', padx=10, anchor='ne')  # Anchored to northeast
     
+    # Interactive tools below the description, each built by panel(parent)
+    for panel in extra_panels:
+        panel(content_frame)
+    
     # Close button at bottom
     close_btn = ttk.Button(content_frame, 
                          text="Close", 
@@ -639,6 +1418,9 @@ def create_tech_window(title, description, image_name, image_dir="litho_images")
         canvas.unbind('<Configure>')  # Only need to do this once
     
     canvas.bind('<Configure>', update_scrollregion)
+    if extra_panels:
+        # Panels grow when data is loaded into them
+        content_frame.bind('<Configure>', lambda e: canvas.configure(scrollregion=canvas.bbox('all')))
     
     # Bind mousewheel for scrolling
     canvas.bind_all("<MouseWheel>", lambda e: on_mousewheel(e, canvas))
@@ -646,405 +1428,975 @@ def create_tech_window(title, description, image_name, image_dir="litho_images")
                        lambda: [canvas.unbind_all('<MouseWheel>'), 
                               tech_window.destroy()])
 
+def add_afm_viewer(parent):
+    """AFM height-map viewer with roughness, PSD and line profiles."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w')
+    load_btn = ttk.Button(controls, text="Load height map...")
+    load_btn.pack(side='left')
+    psd_btn = ttk.Button(controls, text="PSD")
+    psd_btn.pack(side='left', padx=5)
+    status = tk.Label(controls, text="Drag: pan · Wheel: zoom · Shift-drag: ROI · Ctrl-drag: line profile",
+                      font=("Arial", 9), bg='white')
+    status.pack(side='left', padx=10)
+
+    view_frame = tk.Frame(panel, bg='white')
+    view_frame.pack(fill='x', pady=5)
+    side = tk.Frame(view_frame, bg='white')
+    side.pack(side='right', fill='y', padx=10)
+    stats = tk.Label(side, text="", justify='left', font=("Courier", 10), bg='white')
+    stats.pack(anchor='nw')
+    plot = tk.Canvas(side, width=300, height=220, bg='white', highlightthickness=0)
+    plot.pack(anchor='nw', pady=10)
+
+    state = {}
+
+    def show_roughness(title, result):
+        stats.configure(text=f"{title}\n"
+                             f"Ra = {result['Ra']:.4g}\n"
+                             f"Rq = {result['Rq']:.4g}\n"
+                             f"Rz = {result['Rz']:.4g}\n"
+                             f"Rp = {result['Rp']:.4g}\n"
+                             f"Rv = {result['Rv']:.4g}\n"
+                             f"{result['pixels']:,} px (plane-levelled)")
+
+    def on_region(roi):
+        heights = state['heights']
+        stats.configure(text="Computing ROI...")
+        run_in_background(panel, lambda: afm_analysis.roughness(heights, roi),
+                          lambda r: show_roughness(f"ROI rows {roi[0]}-{roi[1]}, cols {roi[2]}-{roi[3]}", r),
+                          lambda e: stats.configure(text=f"ROI analysis failed: {e}"))
+        state['roi'] = roi
+
+    def on_line(start, end):
+        distance, heights = afm_analysis.line_profile(state['heights'], start, end,
+                                                      coefficients=state.get('plane'))
+        draw_xy_plot(plot, [{'x': distance * state['pixel_size'], 'y': heights, 'colour': 'blue'}],
+                     f"Distance ({state['unit']})", "Height")
+
+    def show_psd():
+        if 'heights' not in state:
+            return
+        heights = state['heights']
+        roi = state.get('roi')
+        def done(result):
+            freq, power = result
+            draw_xy_plot(plot, [{'x': np.log10(freq), 'y': power, 'colour': 'red'}],
+                         f"log10 f (1/{state['unit']})", "PSD", log_y=True)
+        run_in_background(panel, lambda: afm_analysis.power_spectral_density(
+            heights, roi, state['pixel_size']), done, lambda e: stats.configure(text=f"PSD failed: {e}"))
+
+    def load():
+        path = filedialog.askopenfilename(title="Select AFM height map",
+                                          filetypes=[("Height maps", "*.npy *.txt *.asc *.tif *.tiff *.raw *.bin"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        status.configure(text="Loading and building tile pyramid...")
+        def work():
+            heights, scan = afm_analysis.load_height_map(path)
+            pyramid = image_pyramid.ImagePyramid(heights, colormap=image_pyramid.AFMHOT)
+            return heights, scan, pyramid
+        run_in_background(panel, work, loaded, lambda e: status.configure(text=f"Could not load height map: {e}"))
+
+    def loaded(result):
+        heights, scan, pyramid = result
+        if 'view' in state:
+            state['view'].canvas.destroy()
+        state.clear()
+        state['heights'] = heights
+        state['pixel_size'] = scan[0] / heights.shape[1] if scan else 1.0
+        state['unit'] = "µm" if scan else "px"
+        state['view'] = TiledImageView(view_frame, pyramid, on_region=on_region, on_line=on_line)
+        state['view'].canvas.pack(side='left')
+        status.configure(text=f"{heights.shape[1]} × {heights.shape[0]} px · "
+                              "Drag: pan · Wheel: zoom · Shift-drag: ROI · Ctrl-drag: profile")
+        stats.configure(text="Computing roughness...")
+        def full_analysis():
+            return afm_analysis.plane_coefficients(heights), afm_analysis.roughness(heights)
+        def analysed(result):
+            state['plane'], roughness = result
+            show_roughness("Full scan", roughness)
+        run_in_background(panel, full_analysis, analysed,
+                          lambda e: stats.configure(text=f"Roughness analysis failed: {e}"))
+
+    load_btn.configure(command=load)
+    psd_btn.configure(command=show_psd)
+
+def add_sem_viewer(parent):
+    """Large SEM micrograph browser backed by a disk-cached tile pyramid."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w')
+    load_btn = ttk.Button(controls, text="Open micrograph...")
+    load_btn.pack(side='left')
+    status = tk.Label(controls, text="Drag: pan · Wheel: zoom", font=("Arial", 9), bg='white')
+    status.pack(side='left', padx=10)
+
+    view_frame = tk.Frame(panel, bg='white')
+    view_frame.pack(fill='x', pady=5)
+    state = {}
+
+    def watch_build(pyramid, view):
+        # Redraw as each pyramid level lands on disk
+        if not view.canvas.winfo_exists() or state.get('view') is not view:
+            return
+        ready = pyramid.ready_levels
+        if ready != state.get('ready'):
+            state['ready'] = ready
+            view.redraw()
+        rows, cols = pyramid.shape[:2]
+        if pyramid.complete:
+            status.configure(text=f"{cols:,} × {rows:,} px · Drag: pan · Wheel: zoom")
+        else:
+            status.configure(text=f"{cols:,} × {rows:,} px · Building tile pyramid "
+                                  f"({ready}/{len(pyramid.levels)} levels)...")
+            view.canvas.after(250, watch_build, pyramid, view)
+
+    def load():
+        path = filedialog.askopenfilename(title="Select SEM micrograph",
+                                          filetypes=[("Images", "*.tif *.tiff *.npy *.raw *.png *.jpg"),
+                                                     ("All files", "*.*")])
+        if not path:
+            return
+        status.configure(text="Opening...")
+        def work():
+            data = image_pyramid.open_image_memmap(path)
+            return image_pyramid.DiskPyramid(data, image_pyramid.pyramid_cache_dir(path))
+        run_in_background(panel, work, loaded, lambda e: status.configure(text=f"Could not open image: {e}"))
+
+    def loaded(pyramid):
+        if 'view' in state:
+            state['view'].canvas.destroy()
+        state.clear()
+        view = TiledImageView(view_frame, pyramid, width=760, height=520)
+        view.canvas.pack()
+        state['view'] = view
+        pyramid.build()
+        watch_build(pyramid, view)
+
+    load_btn.configure(command=load)
+
+def add_xrd_panel(parent):
+    """Batch XRD scan analysis: peaks, d-spacing, Scherrer and Williamson-Hall."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w')
+    run_btn = ttk.Button(controls, text="Analyze scans...")
+    run_btn.pack(side='left')
+    instrument = tk.StringVar(value="0.05")
+    tk.Label(controls, text="Instrument FWHM (°):", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(controls, textvariable=instrument, width=6).pack(side='left', padx=5)
+    status = tk.Label(controls, text="Cu Kα λ = 1.5406 Å", font=("Arial", 9), bg='white')
+    status.pack(side='left', padx=10)
+
+    body = tk.Frame(panel, bg='white')
+    body.pack(fill='x', pady=5)
+    tables = tk.Frame(body, bg='white')
+    tables.pack(side='left', fill='y')
+
+    scan_columns = ("file", "peaks", "size", "strain")
+    scan_table = ttk.Treeview(tables, columns=scan_columns, show='headings', height=8)
+    for column, heading, width in zip(scan_columns, ("File", "Peaks", "D W-H (nm)", "Strain"), (150, 50, 80, 80)):
+        scan_table.heading(column, text=heading)
+        scan_table.column(column, width=width, anchor='w')
+    scan_table.pack(anchor='w')
+
+    peak_columns = ("two_theta", "d", "fwhm", "size")
+    peak_table = ttk.Treeview(tables, columns=peak_columns, show='headings', height=8)
+    for column, heading, width in zip(peak_columns, ("2θ (°)", "d (Å)", "FWHM (°)", "D Scherrer (nm)"),
+                                      (70, 70, 70, 110)):
+        peak_table.heading(column, text=heading)
+        peak_table.column(column, width=width, anchor='w')
+    peak_table.pack(anchor='w', pady=(5, 0))
+
+    plot = tk.Canvas(body, width=480, height=340, bg='white', highlightthickness=0)
+    plot.pack(side='left', padx=10)
+
+    scans = {}
+    def show_selected(event=None):
+        selection = scan_table.selection()
+        if not selection:
+            return
+        scan = scans[selection[0]]
+        peak_table.delete(*peak_table.get_children())
+        for peak in scan['peaks']:
+            peak_table.insert('', 'end', values=(f"{peak['two_theta']:.3f}", f"{peak['d_spacing']:.4f}",
+                                                 f"{peak['fwhm']:.3f}", f"{peak['scherrer_nm']:.1f}"))
+        two_theta = np.asarray(scan['two_theta'])
+        background = np.asarray(scan['background'])
+        fitted = background.copy()
+        for peak in scan['peaks']:
+            fitted += xrd_analysis.pseudo_voigt(two_theta, peak['amplitude'], peak['two_theta'],
+                                                peak['fwhm'], peak['eta'])
+        draw_xy_plot(plot, [{'x': two_theta, 'y': scan['intensity'], 'colour': 'black'},
+                            {'x': two_theta, 'y': background, 'colour': 'grey'},
+                            {'x': two_theta, 'y': fitted, 'colour': 'red'}],
+                     "2θ (°)", "Intensity (counts)")
+
+    scan_table.bind('<<TreeviewSelect>>', show_selected)
+
+    def run():
+        try:
+            instrument_fwhm = float(instrument.get())
+        except ValueError:
+            status.configure(text="Invalid instrument FWHM")
+            return
+        paths = filedialog.askopenfilenames(title="Select XRD scans",
+                                            filetypes=[("Scan files", "*.xy *.csv *.txt *.dat"),
+                                                       ("All files", "*.*")])
+        if not paths:
+            return
+        scan_table.delete(*scan_table.get_children())
+        peak_table.delete(*peak_table.get_children())
+        scans.clear()
+        counts = {'new': 0, 'cached': 0, 'failed': 0, 'last_error': ""}
+        show_counts = batch_status(status, counts)
+        run_btn.state(['disabled'])
+
+        def add(item):
+            path, result, cached = item
+            if 'error' in result:
+                print(f"Error analysing {path}: {result['error']}")
+                counts['failed'] += 1
+                counts['last_error'] = f"{os.path.basename(path)}: {result['error']}"
+                show_counts()
+                return
+            counts['cached' if cached else 'new'] += 1
+            show_counts()
+            iid = str(len(scans))
+            scans[iid] = result
+            size = f"{result['wh_size_nm']:.1f}" if result['wh_size_nm'] else "-"
+            strain = f"{result['wh_strain']:.2e}" if result['wh_strain'] is not None else "-"
+            scan_table.insert('', 'end', iid=iid, values=(os.path.basename(path), len(result['peaks']),
+                                                          size, strain))
+
+        def done():
+            run_btn.state(['!disabled'])
+            if scans and not scan_table.selection():
+                scan_table.selection_set('0')
+
+        def stopped(error):
+            run_btn.state(['!disabled'])
+            show_counts(f"\nAnalysis stopped early: {error}")
+
+        stream_in_background(panel, xrd_analysis.analyze_files(paths, instrument_fwhm=instrument_fwhm),
+                             add, done, stopped)
+
+    run_btn.configure(command=run)
+
+def add_raman_panel(parent):
+    """Raman baseline, peaks and library identification for spectra and maps."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w')
+    library_btn = ttk.Button(controls, text="Reference library...")
+    library_btn.pack(side='left')
+    spectrum_btn = ttk.Button(controls, text="Open spectrum...")
+    spectrum_btn.pack(side='left', padx=5)
+    map_btn = ttk.Button(controls, text="Open map...")
+    map_btn.pack(side='left')
+    status = tk.Label(controls, text="No library loaded", font=("Arial", 9), bg='white')
+    status.pack(side='left', padx=10)
+
+    body = tk.Frame(panel, bg='white')
+    body.pack(fill='x', pady=5)
+    tables = tk.Frame(body, bg='white')
+    tables.pack(side='left', fill='y')
+
+    match_table = ttk.Treeview(tables, columns=("reference", "score"), show='headings', height=8)
+    match_table.heading("reference", text="Reference")
+    match_table.heading("score", text="r / pixels")
+    match_table.column("reference", width=160, anchor='w')
+    match_table.column("score", width=90, anchor='w')
+    match_table.pack(anchor='w')
+
+    peak_columns = ("shift", "fwhm", "amplitude")
+    peak_table = ttk.Treeview(tables, columns=peak_columns, show='headings', height=8)
+    for column, heading, width in zip(peak_columns, ("Shift (cm⁻¹)", "FWHM (cm⁻¹)", "Amplitude"), (90, 80, 80)):
+        peak_table.heading(column, text=heading)
+        peak_table.column(column, width=width, anchor='w')
+    peak_table.pack(anchor='w', pady=(5, 0))
+
+    display = tk.Frame(body, bg='white')
+    display.pack(side='left', padx=10)
+    plot = tk.Canvas(display, width=480, height=340, bg='white', highlightthickness=0)
+    map_label = tk.Label(display, bg='white')
+
+    state = {}
+
+    def choose_library():
+        path = filedialog.askdirectory(title="Select folder of reference spectra")
+        if path:
+            state['library'] = path
+            status.configure(text=f"Library: {os.path.basename(path)}")
+
+    def index_for(shift):
+        if 'library' not in state:
+            return None
+        return raman_analysis.library_index(state['library'], shift)
+
+    def open_spectrum():
+        path = filedialog.askopenfilename(title="Select Raman spectrum",
+                                          filetypes=[("Spectra", "*.csv *.txt *.dat *.xy"), ("All files", "*.*")])
+        if not path:
+            return
+        status.configure(text="Analysing spectrum...")
+        def work():
+            shift, intensity = raman_analysis.load_spectrum(path)
+            return raman_analysis.analyze_spectrum(shift, intensity, index_for(shift))
+        run_in_background(panel, work, show_spectrum, lambda e: status.configure(text=f"Analysis failed: {e}"))
+
+    def show_spectrum(result):
+        status.configure(text=f"{len(result['peaks'])} bands")
+        match_table.delete(*match_table.get_children())
+        peak_table.delete(*peak_table.get_children())
+        for name, score in result['matches']:
+            match_table.insert('', 'end', values=(name, f"{score:.3f}"))
+        for peak in result['peaks']:
+            peak_table.insert('', 'end', values=(f"{peak['shift']:.1f}", f"{peak['fwhm']:.1f}",
+                                                 f"{peak['amplitude']:.3g}"))
+        map_label.pack_forget()
+        plot.pack()
+        draw_xy_plot(plot, [{'x': result['shift'], 'y': result['intensity'], 'colour': 'black'},
+                            {'x': result['shift'], 'y': result['baseline'], 'colour': 'red'}],
+                     "Raman shift (cm⁻¹)", "Intensity")
+
+    def open_map():
+        if 'library' not in state:
+            status.configure(text="Choose a reference library first")
+            return
+        path = filedialog.askopenfilename(title="Select Raman map",
+                                          filetypes=[("Maps", "*.npz *.txt *.csv *.dat"), ("All files", "*.*")])
+        if not path:
+            return
+        status.configure(text="Classifying map...")
+        def work():
+            shift, cube = raman_analysis.load_map(path)
+            index = index_for(shift)
+            indices, scores = raman_analysis.classify_map(shift, cube, index)
+            return index.names, indices[..., 0], scores[..., 0]
+        run_in_background(panel, work, show_map, lambda e: status.configure(text=f"Classification failed: {e}"))
+
+    def show_map(result):
+        names, best, scores = result
+        rows, cols = best.shape
+        # Golden-ratio hues keep neighbouring references distinct; weak matches are dimmed
+        hsv = np.empty((rows, cols, 3), dtype=np.uint8)
+        hsv[..., 0] = (best * 0.618034 % 1 * 255).astype(np.uint8)
+        hsv[..., 1] = 200
+        hsv[..., 2] = (np.clip(scores, 0, 1) * 255).astype(np.uint8)
+        zoom = max(1, 360 // max(rows, cols))
+        image = Image.fromarray(hsv, 'HSV').convert('RGB').resize((cols * zoom, rows * zoom), Image.NEAREST)
+        photo = ImageTk.PhotoImage(image)
+        map_label.configure(image=photo)
+        map_label.image = photo
+        plot.pack_forget()
+        map_label.pack()
+
+        match_table.delete(*match_table.get_children())
+        peak_table.delete(*peak_table.get_children())
+        counts = np.bincount(best.ravel(), minlength=len(names))
+        for k in np.argsort(-counts):
+            if counts[k]:
+                match_table.insert('', 'end', values=(names[k], f"{counts[k]:,}"))
+        status.configure(text=f"{cols} × {rows} px classified")
+
+        def hover(event):
+            col, row = event.x // zoom, event.y // zoom
+            if 0 <= row < rows and 0 <= col < cols:
+                status.configure(text=f"({col}, {row}): {names[best[row, col]]}, r = {scores[row, col]:.3f}")
+        map_label.bind('<Motion>', hover)
+
+    library_btn.configure(command=choose_library)
+    spectrum_btn.configure(command=open_spectrum)
+    map_btn.configure(command=open_map)
+
+def add_ellipsometry_panel(parent):
+    """Film thickness and index fits for spectroscopic data and imaging maps."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w')
+    film = tk.StringVar(value="SiO2")
+    tk.Label(controls, text="Film on Si:", bg='white').pack(side='left')
+    ttk.Combobox(controls, textvariable=film, values=list(ellipsometry.FILMS),
+                 state="readonly", width=8).pack(side='left', padx=5)
+    spectrum_btn = ttk.Button(controls, text="Open Ψ/Δ data...")
+    spectrum_btn.pack(side='left', padx=5)
+    map_btn = ttk.Button(controls, text="Open map...")
+    map_btn.pack(side='left')
+    max_thickness = tk.StringVar(value="300")
+    tk.Label(controls, text="Map max d (nm):", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(controls, textvariable=max_thickness, width=6).pack(side='left', padx=5)
+
+    status = tk.Label(panel, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w', pady=5)
+    display = tk.Frame(panel, bg='white')
+    display.pack(anchor='w')
+    psi_plot = tk.Canvas(display, width=400, height=280, bg='white', highlightthickness=0)
+    delta_plot = tk.Canvas(display, width=400, height=280, bg='white', highlightthickness=0)
+    map_label = tk.Label(display, bg='white')
+
+    def open_spectrum():
+        path = filedialog.askopenfilename(title="Select ellipsometry data (λ, angle, Ψ, Δ)",
+                                          filetypes=[("Data files", "*.csv *.txt *.dat"), ("All files", "*.*")])
+        if not path:
+            return
+        model = ellipsometry.FilmModel(film.get())
+        status.configure(text="Fitting...")
+        def work():
+            wavelength, angle, psi, delta = ellipsometry.load_measurement(path)
+            result = ellipsometry.fit(model, wavelength, angle, psi, delta)
+            fitted = model.evaluate(result['thickness'], result['index'], wavelength, angle)
+            return wavelength, angle, psi, delta, result, fitted
+        run_in_background(panel, work, show_spectrum, lambda e: status.configure(text=f"Fit failed: {e}"))
+
+    def show_spectrum(outcome):
+        wavelength, angle, psi, delta, result, (psi_fit, delta_fit) = outcome
+        n_633 = result['index'] + ellipsometry.FILMS[film.get()][1] / 0.633 ** 2
+        status.configure(text=f"d = {float(result['thickness']):.2f} nm   n(633 nm) = {float(n_633):.4f}   "
+                              f"rms = {float(result['rms']):.3f}°")
+        map_label.pack_forget()
+        psi_plot.pack(side='left')
+        delta_plot.pack(side='left', padx=10)
+        for plot, measured, fitted, label in ((psi_plot, psi, psi_fit, "Ψ (°)"),
+                                              (delta_plot, delta, delta_fit, "Δ (°)")):
+            series = []
+            for k in range(len(angle)):
+                series.append({'x': wavelength, 'y': measured[:, k], 'colour': 'black', 'style': 'points'})
+                series.append({'x': wavelength, 'y': fitted[:, k], 'colour': 'red'})
+            draw_xy_plot(plot, series, "Wavelength (nm)", label)
+
+    def open_map():
+        try:
+            limit = float(max_thickness.get())
+        except ValueError:
+            status.configure(text="Invalid maximum thickness")
+            return
+        path = filedialog.askopenfilename(title="Select imaging ellipsometry map",
+                                          filetypes=[("Maps", "*.npz"), ("All files", "*.*")])
+        if not path:
+            return
+        model = ellipsometry.FilmModel(film.get())
+        status.configure(text="Fitting map...")
+        def work():
+            wavelength, angle, psi, delta = ellipsometry.load_map(path)
+            # A single wavelength and angle cannot separate index from thickness
+            fit_index = len(wavelength) * len(angle) > 1
+            return ellipsometry.fit_map(model, wavelength, angle, psi, delta, fit_index, limit)
+        run_in_background(panel, work, show_map, lambda e: status.configure(text=f"Map fit failed: {e}"))
+
+    def show_map(result):
+        thickness = result['thickness']
+        rows, cols = thickness.shape
+        low, high = np.percentile(thickness, [0.5, 99.5])
+        scaled = np.clip((thickness - low) / max(high - low, 1e-9) * 255, 0, 255).astype(np.uint8)
+        zoom = max(1, 400 // max(rows, cols))
+        image = Image.fromarray(image_pyramid.AFMHOT[scaled]).resize((cols * zoom, rows * zoom), Image.NEAREST)
+        photo = ImageTk.PhotoImage(image)
+        map_label.configure(image=photo)
+        map_label.image = photo
+        psi_plot.pack_forget()
+        delta_plot.pack_forget()
+        map_label.pack()
+        summary = (f"{cols} × {rows} px   d = {thickness.mean():.2f} ± {thickness.std():.2f} nm "
+                   f"({low:.1f}-{high:.1f} colour scale)")
+        status.configure(text=summary)
+
+        def hover(event):
+            col, row = event.x // zoom, event.y // zoom
+            if 0 <= row < rows and 0 <= col < cols:
+                status.configure(text=f"{summary}\n({col}, {row}): d = {thickness[row, col]:.2f} nm, "
+                                      f"A = {result['index'][row, col]:.4f}, rms = {result['rms'][row, col]:.3f}°")
+        map_label.bind('<Motion>', hover)
+
+    spectrum_btn.configure(command=open_spectrum)
+    map_btn.configure(command=open_map)
+
+def add_pec_panel(parent):
+    """Proximity effect simulation and per-shape dose correction."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+    tk.Label(panel, text="Proximity Effect Correction", font=("Arial", 12, "bold"), bg='white').pack(anchor='w')
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w', pady=5)
+    pattern = tk.StringVar(value="Pad with lines")
+    ttk.Combobox(controls, textvariable=pattern, values=list(layout.TEST_PATTERNS),
+                 state="readonly", width=18).pack(side='left')
+    beam = tk.StringVar(value="20 keV")
+    ttk.Combobox(controls, textvariable=beam, values=list(ebeam_pec.PSF_PRESETS),
+                 state="readonly", width=8).pack(side='left', padx=5)
+    pixel = tk.StringVar(value="0.02")
+    tk.Label(controls, text="Pixel (µm):", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(controls, textvariable=pixel, width=6).pack(side='left', padx=5)
+    base_dose = tk.StringVar(value="50")
+    tk.Label(controls, text="Pad dose (µC/cm²):", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(controls, textvariable=base_dose, width=6).pack(side='left', padx=5)
+    run_btn = ttk.Button(controls, text="Correct")
+    run_btn.pack(side='left', padx=10)
+
+    status = tk.Label(panel, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w')
+    images = tk.Frame(panel, bg='white')
+    images.pack(anchor='w', pady=5)
+    views = []
+    for caption in ("Absorbed energy, uniform dose", "Absorbed energy, corrected dose"):
+        frame = tk.Frame(images, bg='white')
+        frame.pack(side='left', padx=5)
+        tk.Label(frame, text=caption, font=("Arial", 9), bg='white').pack()
+        label = tk.Label(frame, bg='white')
+        label.pack()
+        views.append(label)
+
+    def show_energy(label, energy):
+        # Same 0-1.5 scale for both views; y increases upwards
+        index = np.clip(np.flipud(energy) * (255 / 1.5), 0, 255).astype(np.uint8)
+        image = Image.fromarray(index)
+        image.thumbnail((380, 380), Image.BILINEAR)
+        photo = ImageTk.PhotoImage(Image.fromarray(image_pyramid.AFMHOT[np.asarray(image)]))
+        label.configure(image=photo)
+        label.image = photo
+
+    def run():
+        try:
+            pixel_size = float(pixel.get())
+            dose = float(base_dose.get())
+        except ValueError:
+            status.configure(text="Invalid pixel size or dose")
+            return
+        polygons = layout.test_pattern(pattern.get())
+        psf = ebeam_pec.PSF_PRESETS[beam.get()]
+        status.configure(text="Correcting...")
+        run_btn.state(['disabled'])
+        def done(result):
+            run_btn.state(['!disabled'])
+            show_energy(views[0], result['uncorrected'])
+            show_energy(views[1], result['corrected'])
+            doses = result['doses'] * dose
+            rows, cols = result['labels'].shape
+            alpha, beta, eta = psf
+            status.configure(text=f"α = {alpha * 1000:.0f} nm, β = {beta:g} µm, η = {eta:g}; "
+                                  f"{len(polygons)} shapes on {cols} × {rows} px\n"
+                                  f"Worst shape error per pass: "
+                                  f"{', '.join(f'{e:.1%}' for e in result['errors'])}\n"
+                                  f"Dose {doses.min():.1f}-{doses.max():.1f} µC/cm²"
+                                  + (f", {result['undrawn']} shapes below pixel size" if result['undrawn'] else ""))
+        def work():
+            return ebeam_pec.correct(polygons, pixel_size, psf)
+        def failed(error):
+            run_btn.state(['!disabled'])
+            status.configure(text=f"Correction failed: {error}")
+        run_in_background(panel, work, done, failed)
+
+    run_btn.configure(command=run)
+
+def add_imprint_panel(parent):
+    """Residual layer thickness and cavity fill time from template pattern density."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+    tk.Label(panel, text="Residual Layer and Fill Time", font=("Arial", 12, "bold"), bg='white').pack(anchor='w')
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w', pady=5)
+    variant = tk.StringVar(value="UV-NIL")
+    ttk.Combobox(controls, textvariable=variant, values=list(imprint_flow.VARIANTS),
+                 state="readonly", width=12).pack(side='left')
+    template = tk.StringVar(value="Memory array")
+    ttk.Combobox(controls, textvariable=template, values=imprint_flow.TEST_TEMPLATES,
+                 state="readonly", width=15).pack(side='left', padx=5)
+    resist_var = tk.StringVar(value="100")
+    depth_var = tk.StringVar(value="100")
+    viscosity_var = tk.StringVar(value=f"{imprint_flow.VARIANTS['UV-NIL']['viscosity']:g}")
+    for label, var in (("Resist (nm):", resist_var), ("Cavity depth (nm):", depth_var),
+                       ("Viscosity (Pa·s):", viscosity_var)):
+        tk.Label(controls, text=label, bg='white').pack(side='left', padx=(10, 0))
+        ttk.Entry(controls, textvariable=var, width=7).pack(side='left', padx=5)
+    run_btn = ttk.Button(controls, text="Simulate")
+    run_btn.pack(side='left', padx=10)
+    compare_btn = ttk.Button(controls, text="Compare templates")
+    compare_btn.pack(side='left')
+    variant.trace_add('write', lambda *_: viscosity_var.set(f"{imprint_flow.VARIANTS[variant.get()]['viscosity']:g}"))
+
+    status = tk.Label(panel, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w')
+    results = tk.Frame(panel, bg='white')
+    results.pack(anchor='w', pady=5)
+    map_frame = tk.Frame(results, bg='white')
+    map_frame.pack(side='left', padx=5)
+    tk.Label(map_frame, text=f"Residual layer vs mean (±{imprint_flow.SPEC['rlt_uniformity_nm'] / 2:g} nm scale)",
+             font=("Arial", 9), bg='white').pack()
+    map_label = tk.Label(map_frame, bg='white')
+    map_label.pack()
+    plot = tk.Canvas(results, width=460, height=300, bg='white', highlightthickness=0)
+    plot.pack(side='left', padx=5)
+    columns = ("template", "fill", "mean", "range", "wph")
+    table = ttk.Treeview(panel, columns=columns, show='headings', height=4)
+    for column, heading, width in zip(columns, ("Template", "Fill time (s)", "RLT mean (nm)",
+                                                "RLT range (nm)", "Throughput (wph)"), (140, 100, 100, 100, 110)):
+        table.heading(column, text=heading)
+        table.column(column, width=width, anchor='w')
+    flows = {}
+
+    def settings():
+        try:
+            resist, depth = float(resist_var.get()), float(depth_var.get())
+            viscosity = float(viscosity_var.get())
+        except ValueError:
+            status.configure(text="Invalid resist thickness, cavity depth or viscosity")
+            return None
+        if not (resist > 0 and depth > 0 and viscosity > 0):
+            status.configure(text="Resist thickness, cavity depth and viscosity must be positive")
+            return None
+        return resist, depth, dict(imprint_flow.VARIANTS[variant.get()], viscosity=viscosity)
+
+    def fill_text(summary):
+        if summary["filled"]:
+            return f"{summary['fill_time_s']:.3g}"
+        return f"incomplete ({summary['fill_fraction']:.0%})"
+
+    def show(result, summary, name, cached):
+        run_btn.state(['!disabled'])
+        rlt = result['rlt_nm']
+        half = imprint_flow.SPEC['rlt_uniformity_nm'] / 2
+        image = Image.fromarray(bake_thermal.diverging_colormap(rlt - np.nanmean(rlt), half))
+        image = image.resize((300, int(300 * rlt.shape[0] / rlt.shape[1])), Image.NEAREST)
+        photo = ImageTk.PhotoImage(image)
+        map_label.configure(image=photo)
+        map_label.image = photo
+        time_s = np.maximum(summary['time_s'][1:], 1e-12)
+        draw_xy_plot(plot, [{'x': np.log10(time_s), 'y': result[key][1:], 'colour': colour}
+                            for key, colour in (('max_nm', 'red'), ('mean_nm', 'black'), ('min_nm', 'blue'))],
+                     "log10 time (s)", "Residual layer (nm): max / mean / min")
+        wph = (f"{summary['throughput_wph']:.1f} wph (spec >{imprint_flow.SPEC['throughput_wph']:g})"
+               if summary['filled'] else "no complete fill")
+        spec = "within" if summary['uniform'] else "outside"
+        status.configure(text=f"{name}: fill time {fill_text(summary)} s · {wph}"
+                              f"{' (cached run, time rescaled)' if cached else ''}\n"
+                              f"RLT {summary['rlt_mean_nm']:.1f} nm mean, {summary['rlt_range_nm']:.1f} nm range "
+                              f"({spec} the <{imprint_flow.SPEC['rlt_uniformity_nm']:g} nm spec), "
+                              f"{result['steps']} steps, {result['factorizations']} factorisations")
+
+    def run():
+        values = settings()
+        if values is None:
+            return
+        resist, depth, tool = values
+        name = template.get()
+        key = (name, depth)
+        if key not in flows:
+            flows[key] = imprint_flow.ImprintFlow(imprint_flow.test_template(name), depth_nm=depth)
+        flow = flows[key]
+        cached = (tool['pressure'], tool['stiffness'], resist, None) in flow.runs
+        status.configure(text="Simulating squeeze flow...")
+        run_btn.state(['disabled'])
+        def work():
+            result = flow.run(tool['pressure'], tool['stiffness'], resist)
+            return result, imprint_flow.summarize(result, tool)
+        def failed(error):
+            run_btn.state(['!disabled'])
+            status.configure(text=f"Simulation failed: {error}")
+        run_in_background(panel, work, lambda outcome: show(*outcome, name, cached), failed)
+
+    def compare():
+        values = settings()
+        if values is None:
+            return
+        resist, depth, tool = values
+        designs = {name: imprint_flow.test_template(name) for name in imprint_flow.TEST_TEMPLATES}
+        status.configure(text=f"Simulating {len(designs)} templates in parallel...")
+        compare_btn.state(['disabled'])
+        def done(outcomes):
+            compare_btn.state(['!disabled'])
+            table.delete(*table.get_children())
+            for name, (result, summary) in outcomes.items():
+                wph = f"{summary['throughput_wph']:.1f}" if summary['filled'] else "-"
+                table.insert('', 'end', values=(name, fill_text(summary), f"{summary['rlt_mean_nm']:.1f}",
+                                                f"{summary['rlt_range_nm']:.1f}", wph))
+            table.pack(anchor='w', pady=5)
+            status.configure(text=f"{variant.get()}: {len(outcomes)} templates compared")
+        def failed(error):
+            compare_btn.state(['!disabled'])
+            status.configure(text=f"Comparison failed: {error}")
+        run_in_background(panel, lambda: imprint_flow.compare(designs, tool, depth_nm=depth, initial_nm=resist),
+                          done, failed)
+
+    run_btn.configure(command=run)
+    compare_btn.configure(command=compare)
+
+def add_writetime_panel(parent):
+    """Shot count and write time of an arrayed test pattern for each beam preset."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+    tk.Label(panel, text="Write Time Estimate", font=("Arial", 12, "bold"), bg='white').pack(anchor='w')
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w', pady=5)
+    pattern = tk.StringVar(value="Line/space grating")
+    ttk.Combobox(controls, textvariable=pattern, values=list(layout.TEST_PATTERNS),
+                 state="readonly", width=18).pack(side='left')
+    columns_var = tk.StringVar(value="100")
+    rows_var = tk.StringVar(value="100")
+    tk.Label(controls, text="Array:", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(controls, textvariable=columns_var, width=5).pack(side='left', padx=2)
+    tk.Label(controls, text="×", bg='white').pack(side='left')
+    ttk.Entry(controls, textvariable=rows_var, width=5).pack(side='left', padx=2)
+    dose_var = tk.StringVar(value="50")
+    tk.Label(controls, text="Dose (µC/cm²):", bg='white').pack(side='left', padx=(10, 0))
+    ttk.Entry(controls, textvariable=dose_var, width=6).pack(side='left', padx=5)
+    run_btn = ttk.Button(controls, text="Estimate")
+    run_btn.pack(side='left', padx=10)
+    file_btn = ttk.Button(controls, text="Estimate GDSII...")
+    file_btn.pack(side='left')
+
+    status = tk.Label(panel, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w')
+    columns = ("setting", "beam", "figures", "pixels", "fields", "stitched", "exposure", "overhead", "total")
+    table = ttk.Treeview(panel, columns=columns, show='headings', height=4)
+    for column, heading, width in zip(columns, ("Setting", "Current / step / field", "Figures", "Beam pixels",
+                                                "Fields", "Stitched", "Exposure", "Overhead", "Total"),
+                                      (110, 150, 80, 90, 55, 60, 75, 75, 75)):
+        table.heading(column, text=heading)
+        table.column(column, width=width, anchor='w')
+    table.pack(anchor='w', pady=5)
+
+    def duration(seconds):
+        minutes, seconds = divmod(int(round(seconds)), 60)
+        hours, minutes = divmod(minutes, 60)
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+    def estimate(make_polygons, description):
+        try:
+            dose = float(dose_var.get())
+        except ValueError:
+            status.configure(text="Invalid dose")
+            return
+        status.configure(text=f"Fracturing {description}...")
+        run_btn.state(['disabled'])
+        file_btn.state(['disabled'])
+        def done(results):
+            run_btn.state(['!disabled'])
+            file_btn.state(['!disabled'])
+            table.delete(*table.get_children())
+            for name, result in results.items():
+                settings = ebeam_writetime.BEAM_PRESETS[name]
+                table.insert('', 'end', values=(
+                    name, f"{settings['current_na']:g} nA / {settings['step_nm']:g} nm / {settings['field_um']:g} µm",
+                    f"{result['figures']:,}", f"{result['pixels']:.3g}", result['fields'], result['stitched_shapes'],
+                    duration(result['beam_s']), duration(result['settle_s'] + result['stage_s']),
+                    duration(result['total_s'])))
+            limited = [name for name, result in results.items() if result['clock_limited']]
+            shapes = next(iter(results.values()))['shapes']
+            status.configure(text=f"{description}: {shapes:,} shapes"
+                                  + (f"\nDeflection clock limited: {', '.join(limited)}" if limited else ""))
+        def work():
+            return ebeam_writetime.compare(make_polygons(), ebeam_writetime.BEAM_PRESETS, dose)
+        def failed(error):
+            run_btn.state(['!disabled'])
+            file_btn.state(['!disabled'])
+            status.configure(text=f"Write-time estimate failed: {error}")
+        run_in_background(panel, work, done, failed)
+
+    def run():
+        try:
+            columns_count, rows_count = int(columns_var.get()), int(rows_var.get())
+        except ValueError:
+            status.configure(text="Invalid array size")
+            return
+        cell = layout.test_pattern(pattern.get())
+        xmin, ymin, xmax, ymax = layout.bounds(cell)
+        pitch_x, pitch_y = (xmax - xmin) * 1.2, (ymax - ymin) * 1.2
+        estimate(lambda: layout.repeat(cell, columns_count, rows_count, pitch_x, pitch_y),
+                 f"{columns_count} × {rows_count} array, "
+                 f"{columns_count * pitch_x / 1000:.2f} × {rows_count * pitch_y / 1000:.2f} mm")
+
+    def run_file():
+        path = filedialog.askopenfilename(title="Select GDSII layout",
+                                          filetypes=[("GDSII", "*.gds *.gds2 *.gdsii"), ("All files", "*.*")])
+        if path:
+            # Streamed straight from the cell hierarchy, never flattened into memory
+            estimate(lambda: gdsii.Library(path).flatten(), os.path.basename(path))
+
+    run_btn.configure(command=run)
+    file_btn.configure(command=run_file)
+
+def add_xray_panel(parent):
+    """Fresnel diffraction across the proximity gap: gap x wavelength sweep and
+    an animated resist dose cross-section as the gap opens."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+    tk.Label(panel, text="Proximity Gap Diffraction", font=("Arial", 12, "bold"), bg='white').pack(anchor='w')
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w', pady=5)
+    mask = tk.StringVar(value="1 µm isolated space")
+    ttk.Combobox(controls, textvariable=mask, values=list(xray_fresnel.MASKS),
+                 state="readonly", width=20).pack(side='left')
+    source = tk.StringVar(value="Synchrotron, 1 nm peak")
+    ttk.Combobox(controls, textvariable=source, values=list(xray_fresnel.SOURCES),
+                 state="readonly", width=22).pack(side='left', padx=5)
+    absorber = tk.StringVar(value="0.7")
+    tk.Label(controls, text=f"{xray_fresnel.ABSORBER['material']} absorber (µm):", bg='white').pack(side='left',
+                                                                                                   padx=(10, 0))
+    ttk.Entry(controls, textvariable=absorber, width=6).pack(side='left', padx=5)
+    run_btn = ttk.Button(controls, text="Simulate")
+    run_btn.pack(side='left', padx=10)
+
+    status = tk.Label(panel, text="", justify='left', font=("Courier", 10), bg='white')
+    status.pack(anchor='w')
+    results = tk.Frame(panel, bg='white')
+    results.pack(anchor='w', pady=5)
+    anim_label = tk.Label(results, bg='white')
+    anim_label.pack(side='left', padx=5)
+    plot = tk.Canvas(results, width=420, height=280, bg='white', highlightthickness=0)
+    plot.pack(side='left', padx=5)
+    animation = []
+
+    def run():
+        try:
+            thickness = float(absorber.get())
+        except ValueError:
+            status.configure(text="Invalid absorber thickness")
+            return
+        result = xray_fresnel.sweep(mask.get(), absorber_um=thickness)
+        colours = ('purple', 'blue', 'green', 'red')
+        draw_xy_plot(plot, [{'x': result['gaps'], 'y': width * 1000, 'colour': colour}
+                            for width, colour in zip(result['edge_width_um'], colours)],
+                     "Gap (µm)", "Edge width 10-90% (nm)")
+        lines = ["λ (nm)  edge @10/50 µm (nm)  CD error/edge (nm)  max resist (µm)  aspect"]
+        for k, wavelength in enumerate(result['wavelengths']):
+            lines.append(f"{wavelength:<6g}  {result['edge_width_um'][k, 0] * 1000:7.0f} / "
+                         f"{result['edge_width_um'][k, -1] * 1000:<7.0f}   "
+                         f"{result['cd_error_um'][k, 0] * 1000:+6.0f} … {result['cd_error_um'][k, -1] * 1000:+.0f}"
+                         f"      {result['max_resist_um'][k]:9.3g}   {result['aspect_ratio'][k]:6.3g}:1")
+        status.configure(text="\n".join(lines) + "\n(colours: " + ", ".join(
+            f"{colour} {w:g} nm" for w, colour in zip(result['wavelengths'], colours)) + ")")
+        if animation:
+            animation.pop().stop()
+        animation.append(AnimatedFrames(anim_label, xray_fresnel.exposure_frames(
+            mask.get(), source.get(), absorber_um=thickness), 400))
+
+    run_btn.configure(command=run)
+    run()
+
+def add_mask_viewer(parent):
+    """Photomask layout viewer: R-tree culled shapes rendered into one image."""
+    panel = tk.Frame(parent, bg='white')
+    panel.pack(fill='x', padx=10, pady=10)
+    tk.Label(panel, text="Mask Layout", font=("Arial", 12, "bold"), bg='white').pack(anchor='w')
+
+    controls = tk.Frame(panel, bg='white')
+    controls.pack(anchor='w', pady=5)
+    load_btn = ttk.Button(controls, text="Open GDSII...")
+    load_btn.pack(side='left')
+    pattern = tk.StringVar(value="Pad with lines")
+    ttk.Combobox(controls, textvariable=pattern, values=list(layout.TEST_PATTERNS),
+                 state="readonly", width=18).pack(side='left', padx=(10, 5))
+    pattern_btn = ttk.Button(controls, text="Show pattern")
+    pattern_btn.pack(side='left')
+    status = tk.Label(controls, text="Drag: pan · Wheel: zoom", font=("Arial", 9), bg='white')
+    status.pack(side='left', padx=10)
+
+    view_frame = tk.Frame(panel, bg='white')
+    view_frame.pack(fill='x', pady=5)
+    state = {}
+
+    def loaded(mask, name):
+        if 'view' in state:
+            state['view'].canvas.destroy()
+        adapter = mask_view.MaskView(mask)
+        view = TiledImageView(view_frame, adapter, width=760, height=520)
+        view.canvas.pack()
+        state['view'] = view
+        xmin, ymin, xmax, ymax = mask.bounds
+        summary = (f"{name}: {len(mask):,} polygons on {len(mask.layer_ids)} layer(s), "
+                   f"{xmax - xmin:,.1f} × {ymax - ymin:,.1f} µm")
+        status.configure(text=summary)
+
+        def hover(event):
+            x, y = adapter.to_layout(*view.to_pixel(event))
+            status.configure(text=f"{summary} · ({x:,.3f}, {y:,.3f}) µm")
+        view.canvas.bind('<Motion>', hover)
+
+    def load():
+        path = filedialog.askopenfilename(title="Select GDSII layout",
+                                          filetypes=[("GDSII", "*.gds *.gds2 *.gdsii"), ("All files", "*.*")])
+        if not path:
+            return
+        status.configure(text="Reading layout...")
+        run_in_background(panel, lambda: mask_view.MaskLayout.from_gds(path),
+                          lambda mask: loaded(mask, os.path.basename(path)),
+                          lambda e: status.configure(text=f"Could not read layout: {e}"))
+
+    def show_pattern():
+        name = pattern.get()
+        loaded(mask_view.MaskLayout.from_polygons(layout.test_pattern(name)), name)
+
+    load_btn.configure(command=load)
+    pattern_btn.configure(command=show_pattern)
+
 # Lithography Technique Windows
 def open_optical_litho():
-    description = """OPTICAL LITHOGRAPHY: The Workhorse of Semiconductor Patterning
-
-Fundamentals:
-Optical lithography uses light to transfer geometric patterns from a photomask to a light-sensitive photoresist. It's the dominant patterning technology in semiconductor manufacturing.
-
-Key Components:
-• Light Source: Mercury lamps (g-line 436nm, i-line 365nm) or excimer lasers (DUV 248nm, 193nm)
-• Photomask: Chrome patterns on quartz substrate (4x or 5x magnification)
-• Projection Optics: High-NA lenses (NA up to 1.35 with immersion)
-• Photoresist: Chemically amplified resists for advanced nodes
-
-Resolution Equation:
-R = k₁·λ/NA
-Where:
-R = minimum feature size
-λ = wavelength (nm)
-NA = numerical aperture
-k₁ = process factor (typically 0.25-0.4)
-
-Modern Advancements:
-• Immersion Lithography: Uses water between lens and wafer (NA > 1.0)
-• Multiple Patterning: LELE, SADP, SAQP for <20nm features
-• Computational Lithography: OPC, ILT, SMO for better pattern fidelity
-
-Process Parameters:
-• Alignment accuracy: <3nm (3σ)
-• Overlay control: <2nm
-• Depth of focus: 100-300nm
-• Throughput: 100-200 wafers/hour
-• Defect density: <0.01/cm²
-
-Applications:
-• CMOS logic devices
-• Memory chips (DRAM, NAND)
-• MEMS devices
-• Advanced packaging"""
-    create_tech_window("Optical Lithography", description, "optical_litho.png")
+    page = pages.TECHNIQUES["Optical Lithography"]
+    create_tech_window("Optical Lithography", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_mask_viewer])
 
 def open_ebeam_litho():
-    description = """ELECTRON-BEAM LITHOGRAPHY: Ultimate Resolution Patterning
-
-Fundamentals:
-E-beam lithography uses a focused electron beam to directly write patterns on resist-coated substrates, achieving ultra-high resolution (<10nm).
-
-Key Advantages:
-• No physical masks required (direct-write)
-• Exceptional resolution (5-10nm features)
-• Excellent overlay accuracy (<2nm)
-• Flexible pattern changes
-
-Challenges:
-• Very slow throughput (hours per wafer)
-• Proximity effects from electron scattering
-• High equipment and maintenance costs
-• Resist sensitivity limitations
-
-Technical Specifications:
-• Beam energy: 10-100keV
-• Beam current: 10pA-100nA
-• Spot size: 1-5nm
-• Positioning accuracy: <1nm
-• Field size: 100-500μm
-• Resist sensitivity: 10-100μC/cm²
-
-Resolution Factors:
-• Electron scattering (forward/backscatter)
-• Resist contrast and sensitivity
-• Beam blur and stability
-• Pattern density effects
-
-Applications:
-• Photomask fabrication
-• Research and development
-• Quantum devices
-• Photonic crystals
-• Nanotechnology structures"""
-    create_tech_window("Electron-beam Lithography", description, "ebeam_litho.png")
+    page = pages.TECHNIQUES["Electron-beam Lithography"]
+    create_tech_window("Electron-beam Lithography", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_pec_panel, add_writetime_panel])
 
 def open_nanoimprint_litho():
-    description = """NANOIMPRINT LITHOGRAPHY: High-Throughput Nanoscale Patterning
-
-Fundamentals:
-NIL physically molds resist using a rigid template, enabling high-resolution patterning without complex optics.
-
-Process Variants:
-1. Thermal NIL: Heat resist above Tg, imprint, then cool
-2. UV-NIL: UV-curable resist with transparent template
-3. Roll-to-Roll: Continuous imprinting for flexible substrates
-
-Key Advantages:
-• Sub-10nm resolution demonstrated
-• High throughput potential
-• Lower cost than optical/EUV
-• 3D patterning capability
-
-Technical Specifications:
-• Resolution: <10nm demonstrated
-• Alignment accuracy: <5nm
-• Throughput: >20 wafers/hour
-• Template life: >1000 imprints
-• Residual layer: <10nm uniformity
-
-Challenges:
-• Defect control
-• Template fabrication
-• Release agents required
-• Pattern fidelity maintenance
-
-Applications:
-• NAND flash memory
-• Bit-patterned media
-• Photonic devices
-• Biological applications
-• Flexible electronics"""
-    create_tech_window("Nanoimprint Lithography", description, "nanoimprint.png")
+    page = pages.TECHNIQUES["Nanoimprint Lithography"]
+    create_tech_window("Nanoimprint Lithography", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_imprint_panel, add_mask_viewer])
 
 def open_xray_litho():
-    description = """X-RAY LITHOGRAPHY: High-Energy Pattern Transfer
-
-Fundamentals:
-Uses synchrotron radiation (0.5-4nm wavelength) to pattern thick resists through proximity printing.
-
-Key Features:
-• Deep penetration through resist
-• Minimal diffraction effects
-• High aspect ratio patterns
-• Parallel exposure of entire wafer
-
-Technical Specifications:
-• Wavelength: 0.5-4nm (typically 1nm)
-• Mask-to-wafer gap: 10-50μm
-• Resist thickness: Up to 1mm
-• Aspect ratio: >50:1 demonstrated
-• Exposure dose: 100-1000mJ/cm²
-
-Advantages:
-• No optical distortions
-• High depth of focus
-• Suitable for 3D structures
-• Good for high-Z materials
-
-Challenges:
-• Mask fabrication difficulty
-• Synchrotron access required
-• Alignment challenges
-• Limited to certain applications
-
-Applications:
-• MEMS devices
-• LIGA process
-• High-aspect ratio structures
-• X-ray optics fabrication
-• Biomedical devices"""
-    create_tech_window("X-ray Lithography", description, "xray_litho.gif")
+    page = pages.TECHNIQUES["X-ray Lithography"]
+    create_tech_window("X-ray Lithography", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_xray_panel, add_mask_viewer])
 
 def open_uv_litho():
-    description = """UV LITHOGRAPHY: Versatile Mid-Range Patterning
-
-Fundamentals:
-Utilizes ultraviolet light (300-400nm) for resist exposure, balancing resolution and throughput.
-
-Key Features:
-• Mercury lamp sources (g-line 436nm, i-line 365nm)
-• Contact/proximity or projection modes
-• Mature, reliable technology
-• Cost-effective for many applications
-
-Technical Specifications:
-• Resolution: 0.5-1.0μm (projection)
-• Depth of focus: 1-2μm
-• Alignment accuracy: 50-100nm
-• Throughput: 50-100 wafers/hour
-• Resist thickness: 0.5-2.0μm
-
-Process Considerations:
-• Diffraction effects significant
-• Contact mode causes mask damage
-• Proximity gap affects resolution
-• Resist selection critical
-
-Advantages:
-• Lower cost than DUV/EUV
-• Simple operation
-• Good for non-critical layers
-• Wide resist compatibility
-
-Applications:
-• MEMS fabrication
-• Microfluidics
-• PCB manufacturing
-• Displays
-• Non-semiconductor patterning"""
-    create_tech_window("UV Lithography", description, "uv_litho.gif")
+    page = pages.TECHNIQUES["UV Lithography"]
+    create_tech_window("UV Lithography", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_mask_viewer])
 
 # Characterization Technique Windows
 def open_sem_analysis():
-    description = """SCANNING ELECTRON MICROSCOPY (SEM): High-Resolution Surface Imaging
-
-Fundamentals:
-SEM uses a focused electron beam to scan samples, producing high-resolution images from emitted secondary electrons.
-
-Key Capabilities:
-• Resolution: 0.5-5nm (depending on instrument)
-• Magnification: 10x-1,000,000x
-• Depth of field: 10-100× better than optical
-• Elemental analysis via EDS
-
-Operating Principles:
-1. Electron beam (1-30keV) scans sample surface
-2. Secondary electrons emitted from surface
-3. Signal intensity varies with surface topography
-4. Backscattered electrons provide Z-contrast
-
-Instrument Parameters:
-• Accelerating voltage: 1-30kV
-• Probe current: 1pA-100nA
-• Working distance: 2-10mm
-• Vacuum: 10⁻³ to 10⁻⁶ Pa
-• Detector types: SE, BSE, EDS
-
-Sample Requirements:
-• Conductivity: Conductive or coated
-• Size: Typically <1cm
-• Vacuum compatibility required
-• Dry, clean surface preferred
-
-Applications:
-• Semiconductor defect analysis
-• Nanomaterial characterization
-• Biological imaging (after preparation)
-• Failure analysis
-• Metrology"""
-    create_tech_window("Scanning Electron Microscopy", description, "sem_microscope.png", "char_images")
+    page = pages.TECHNIQUES["Scanning Electron Microscopy"]
+    create_tech_window("Scanning Electron Microscopy", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_sem_viewer])
 
 def open_afm_analysis():
-    description = """ATOMIC FORCE MICROSCOPY (AFM): Nanoscale Surface Profiling
-
-Fundamentals:
-AFM measures surface topography by scanning a sharp tip across the sample while monitoring tip-sample interactions.
-
-Operating Modes:
-1. Contact Mode: Tip in constant contact
-2. Tapping Mode: Tip oscillates near surface
-3. Non-contact Mode: Measures van der Waals forces
-
-Key Specifications:
-• Resolution: Atomic vertical, 1nm lateral
-• Scan range: 1μm to 100μm
-• Force sensitivity: <1nN
-• Environment: Air, liquid, or vacuum
-
-Measurement Capabilities:
-• Topography (3D surface profile)
-• Roughness (Ra, Rq, Rz)
-• Mechanical properties (modulus, adhesion)
-• Electrical properties (conductivity, potential)
-• Magnetic properties
-
-Advantages:
-• Atomic-level resolution
-• No sample coating required
-• Works in various environments
-• Quantitative height data
-
-Limitations:
-• Slow scan speed
-• Tip convolution effects
-• Limited field of view
-• Sample damage possible
-
-Applications:
-• Surface roughness measurement
-• Nanostructure characterization
-• Biological samples
-• Thin film analysis
-• Semiconductor metrology"""
-    create_tech_window("Atomic Force Microscopy", description, "afm_diagram.png", "char_images")
+    page = pages.TECHNIQUES["Atomic Force Microscopy"]
+    create_tech_window("Atomic Force Microscopy", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_afm_viewer])
 
 def open_xrd_analysis():
-    description = """X-RAY DIFFRACTION (XRD): Crystal Structure Analysis
-
-Fundamentals:
-XRD measures diffraction patterns from crystalline materials to determine atomic structure and phase composition.
-
-Key Techniques:
-1. Powder XRD: Polycrystalline samples
-2. Thin Film XRD: Grazing incidence
-3. High-Resolution XRD: Rocking curves
-4. XRR: Reflectivity for thin films
-
-Information Obtained:
-• Crystal structure identification
-• Lattice parameters
-• Crystallite size
-• Strain/stress analysis
-• Texture/preferred orientation
-
-Instrument Parameters:
-• X-ray source: Cu Kα (1.54Å) typical
-• Detector: Point, linear, or 2D
-• Angular range: 5-140° 2θ
-• Resolution: <0.01° 2θ
-
-Data Analysis:
-• Peak position → d-spacing
-• Peak width → crystallite size
-• Peak intensity → texture
-• Peak shifts → strain
-
-Applications:
-• Phase identification
-• Thin film characterization
-• Quality control
-• Semiconductor epitaxy
-• Materials research"""
-    create_tech_window("X-ray Diffraction", description, "xrd_equipment.png", "char_images")
+    page = pages.TECHNIQUES["X-ray Diffraction"]
+    create_tech_window("X-ray Diffraction", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_xrd_panel])
 
 def open_raman_analysis():
-    description = """RAMAN SPECTROSCOPY: Molecular Vibrational Fingerprinting
-
-Fundamentals:
-Measures inelastic scattering of light to probe molecular vibrations and crystal phonons.
-
-Key Features:
-• Chemical identification
-• Crystal structure analysis
-• Strain measurement
-• Temperature mapping
-• Non-destructive
-
-Technical Specifications:
-• Excitation wavelength: 325-785nm
-• Resolution: <1cm⁻¹
-• Spatial resolution: ~1μm
-• Depth profiling capability
-• Mapping/imaging possible
-
-Information Obtained:
-• Chemical bonds present
-• Crystal phases
-• Stress/strain state
-• Defect density
-• Layer thickness
-
-Advantages:
-• Minimal sample prep
-• Works through transparent media
-• No vacuum required
-• Complementary to FTIR
-
-Applications:
-• Material identification
-• Carbon nanotube characterization
-• Semiconductor strain analysis
-• Pharmaceutical analysis
-• Art conservation"""
-    create_tech_window("Raman Spectroscopy", description, "raman_spectrometer.png", "char_images")
+    page = pages.TECHNIQUES["Raman Spectroscopy"]
+    create_tech_window("Raman Spectroscopy", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_raman_panel])
 
 def open_ellipsometry_analysis():
-    description = """ELLIPSOMETRY: Thin Film Optical Characterization
-
-Fundamentals:
-Measures polarization changes in reflected light to determine thin film properties.
-
-Key Measurements:
-• Thickness (sub-nm to μm)
-• Refractive index (n and k)
-• Optical constants
-• Interface quality
-• Anisotropy
-
-Technique Variants:
-1. Spectroscopic Ellipsometry
-2. Imaging Ellipsometry
-3. In-situ Ellipsometry
-4. Mueller Matrix Ellipsometry
-
-Technical Specifications:
-• Wavelength range: 190-1700nm
-• Angle range: 45-90°
-• Thickness accuracy: <0.1nm
-• Measurement speed: ms to s
-• Spot size: 10μm to mm
-
-Data Analysis:
-• Optical model construction
-• Layer-by-layer fitting
-• Dispersion relations
-• Anisotropy modeling
-
-Applications:
-• Semiconductor thin films
-• Optical coatings
-• Organic layers
-• Surface roughness
-• Process monitoring"""
-    create_tech_window("Ellipsometry", description, "ellipsometer.png", "char_images")
+    page = pages.TECHNIQUES["Ellipsometry"]
+    create_tech_window("Ellipsometry", page["description"], page["image"], page["image_dir"],
+                       extra_panels=[add_ellipsometry_panel])
 
 # Main window creation
 root = tk.Tk()
@@ -1073,13 +2425,10 @@ lithography_label.pack(side='left')
 lithography_info = tk.Label(left_title_frame, text="ℹ️", font=("Arial", 12), bg='white', fg='blue', cursor="hand2")
 lithography_info.pack(side='left', padx=5)
 
-lithography_description = """Lithography is a microfabrication process used to pattern thin films and substrates.
-It involves using light to transfer a geometric pattern from a photomask to a light-sensitive chemical photoresist.
-Common types include optical lithography, electron-beam lithography, and nanoimprint lithography."""
+lithography_description = pages.LITHOGRAPHY_DESCRIPTION
 CreateToolTip(lithography_info, lithography_description)
 
-options1 = ["Optical Lithography", "Electron-beam Lithography", 
-            "Nanoimprint Lithography", "X-ray Lithography", "UV Lithography"]
+options1 = list(pages.LITHO_TECHNIQUES)
 selected_option1 = tk.StringVar()
 dropdown1 = ttk.Combobox(left_frame, textvariable=selected_option1, values=options1, state="readonly", width=25)
 dropdown1.pack(pady=10)
@@ -1102,13 +2451,10 @@ characterization_label.pack(side='left')
 characterization_info = tk.Label(right_title_frame, text="ℹ️", font=("Arial", 12), bg='white', fg='blue', cursor="hand2")
 characterization_info.pack(side='left', padx=5)
 
-characterization_description = """Characterization refers to the analysis of material properties and structures.
-It includes techniques to examine physical, chemical, and structural characteristics at various scales.
-Common methods include microscopy, spectroscopy, diffraction, and surface analysis."""
+characterization_description = pages.CHARACTERIZATION_DESCRIPTION
 CreateToolTip(characterization_info, characterization_description)
 
-options2 = ["Scanning Electron Microscopy", "Atomic Force Microscopy",
-            "X-ray Diffraction", "Raman Spectroscopy", "Ellipsometry"]
+options2 = list(pages.CHAR_TECHNIQUES)
 selected_option2 = tk.StringVar()
 dropdown2 = ttk.Combobox(right_frame, textvariable=selected_option2, values=options2, state="readonly", width=25)
 dropdown2.pack(pady=10)
@@ -1140,5 +2486,15 @@ def open_selected_char(technique):
     elif technique == "Ellipsometry":
         open_ellipsometry_analysis()
 
+# Warm the likely next pages while the main window is idle
+prefetch_status = tk.Label(root, font=("Arial", 8), bg='white', fg='gray')
+prefetch_status.place(relx=1.0, rely=1.0, anchor='se')
+page_prefetch = IdlePrefetch(root, prefetch.Prefetcher(), prefetch_status)
+page_prefetch.bind_widget(litho_process_btn, "Lithography")
+page_prefetch.bind_widget(char_process_btn, "Characterization")
+page_prefetch.bind_combobox(dropdown1, options1)
+page_prefetch.bind_combobox(dropdown2, options2)
+page_prefetch.schedule()
+
 # Start the GUI event loop
 root.mainloop()
\ No newline at end of file
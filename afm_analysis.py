@@ -0,0 +1,186 @@
+"""AFM height-map loading and roughness analysis.
+
+Roughness follows the usual areal definitions on the plane-levelled surface:
+Ra = mean |z|, Rq = rms z, and Rz = mean of the five highest peaks minus the
+mean of the five lowest valleys. Large scans are processed in row chunks so
+no full-size temporary array is created.
+"""
+import os
+import re
+
+import numpy as np
+from PIL import Image
+from scipy import fft
+
+
+def load_height_map(path, shape=None, dtype='<f4'):
+    """Load a height map and its scan size.
+
+    Supports NumPy .npy (memory-mapped), Gwyddion/SPM ASCII matrix exports
+    (.txt/.asc, "# Width: 10 um" style headers), TIFF height images and raw
+    binary files (square unless `shape` is given). Returns (heights,
+    scan size (width, height) in um or None).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return np.load(path, mmap_mode='r'), None
+    if ext in ('.txt', '.asc', '.xyz'):
+        return _load_ascii(path)
+    if ext in ('.tif', '.tiff', '.png'):
+        return np.asarray(Image.open(path), dtype=np.float32), None
+    data = np.memmap(path, dtype=dtype, mode='r')
+    if shape is None:
+        side = int(round(np.sqrt(data.size)))
+        if side * side != data.size:
+            raise ValueError(f"{path}: raw file is not square; pass shape=(rows, cols)")
+        shape = (side, side)
+    return data.reshape(shape), None
+
+
+def _load_ascii(path):
+    size = {}
+    header_lines = 0
+    with open(path, errors='replace') as f:
+        for line in f:
+            if not line.startswith('#'):
+                break
+            header_lines += 1
+            match = re.match(r"#\s*(Width|Height):\s*([-+\d.eE]+)\s*(\S*)", line)
+            if match:
+                scale = {'nm': 1e-3, 'mm': 1e3, 'm': 1e6}.get(match.group(3), 1.0)
+                size[match.group(1).lower()] = float(match.group(2)) * scale
+    heights = np.loadtxt(path, skiprows=header_lines, dtype=np.float32, ndmin=2)
+    scan = (size['width'], size.get('height', size['width'])) if 'width' in size else None
+    return heights, scan
+
+
+def _roi(z, roi):
+    if roi is None:
+        return z
+    row0, row1, col0, col1 = roi
+    return z[row0:row1, col0:col1]
+
+
+def plane_coefficients(z, chunk_rows=512):
+    """Least-squares plane z = a x + b y + c over the finite pixels of z."""
+    rows, cols = z.shape
+    x = np.arange(cols, dtype=float)
+    sums = np.zeros((3, 3))
+    rhs = np.zeros(3)
+    for start in range(0, rows, chunk_rows):
+        block = np.asarray(z[start:start + chunk_rows], dtype=float)
+        y = np.arange(start, start + len(block), dtype=float)[:, None]
+        ok = np.isfinite(block)
+        xs = np.broadcast_to(x, block.shape)[ok]
+        ys = np.broadcast_to(y, block.shape)[ok]
+        zs = block[ok]
+        basis = (xs, ys, np.ones_like(xs))
+        for i in range(3):
+            rhs[i] += basis[i] @ zs
+            for j in range(i, 3):
+                sums[i, j] += basis[i] @ basis[j]
+    sums = np.triu(sums) + np.triu(sums, 1).T
+    return np.linalg.lstsq(sums, rhs, rcond=None)[0]
+
+
+def _levelled_chunks(z, coefficients, chunk_rows):
+    a, b, c = coefficients
+    x = np.arange(z.shape[1], dtype=float)
+    for start in range(0, z.shape[0], chunk_rows):
+        block = np.asarray(z[start:start + chunk_rows], dtype=float)
+        y = np.arange(start, start + len(block), dtype=float)[:, None]
+        levelled = block - (a * x + b * y + c)
+        yield levelled[np.isfinite(levelled)]
+
+
+def roughness(z, roi=None, chunk_rows=512, extremes=5):
+    """Plane-levelled Ra, Rq, Rz (and peak Rp / valley Rv) of z or a ROI.
+
+    `roi` is (row0, row1, col0, col1) in pixels; results are in z units.
+    """
+    z = _roi(z, roi)
+    coefficients = plane_coefficients(z, chunk_rows)
+    count = 0
+    abs_sum = 0.0
+    square_sum = 0.0
+    peaks = np.empty(0)
+    valleys = np.empty(0)
+    for values in _levelled_chunks(z, coefficients, chunk_rows):
+        count += values.size
+        abs_sum += np.abs(values).sum()
+        square_sum += (values ** 2).sum()
+        k = min(extremes, values.size)
+        if k:
+            peaks = np.concatenate([peaks, np.partition(values, values.size - k)[-k:]])
+            valleys = np.concatenate([valleys, np.partition(values, k - 1)[:k]])
+            peaks = np.sort(peaks)[-extremes:]
+            valleys = np.sort(valleys)[:extremes]
+    if not count:
+        return {"Ra": np.nan, "Rq": np.nan, "Rz": np.nan, "Rp": np.nan, "Rv": np.nan, "pixels": 0}
+    return {
+        "Ra": abs_sum / count,
+        "Rq": np.sqrt(square_sum / count),
+        "Rz": peaks.mean() - valleys.mean(),
+        "Rp": peaks.max(),
+        "Rv": -valleys.min(),
+        "pixels": count,
+    }
+
+
+def power_spectral_density(z, roi=None, pixel_size=1.0, segment=1024):
+    """Radially averaged 2D PSD of the plane-levelled surface.
+
+    The region is split into square segments of at most `segment` pixels,
+    each Hann-windowed and transformed separately (Welch averaging), so the
+    full resolution is kept with bounded memory. Returns (spatial frequency
+    in 1/pixel_size units, PSD).
+    """
+    z = _roi(z, roi)
+    a, b, c = plane_coefficients(z)
+    size = min(segment, *z.shape)
+    window = np.outer(np.hanning(size), np.hanning(size)).astype(np.float32)
+    norm = (window ** 2).sum()
+    fy = fft.fftfreq(size, d=pixel_size)
+    fx = fft.rfftfreq(size, d=pixel_size)
+    radius = np.hypot(fy[:, None], fx[None, :])
+    bins = np.minimum((radius / fx[1]).round().astype(int), len(fx) - 1)
+    total = np.zeros(len(fx))
+    segments = 0
+    for row in range(0, z.shape[0] - size + 1, size):
+        for col in range(0, z.shape[1] - size + 1, size):
+            block = np.asarray(z[row:row + size, col:col + size], dtype=np.float32)
+            yy, xx = np.mgrid[row:row + size, col:col + size]
+            block = np.nan_to_num(block - (a * xx + b * yy + c).astype(np.float32))
+            spectrum = np.abs(fft.rfft2(block * window, workers=-1)) ** 2 / norm
+            total += np.bincount(bins.ravel(), weights=spectrum.ravel(), minlength=len(fx))
+            segments += 1
+    counts = np.bincount(bins.ravel(), minlength=len(fx))
+    return fx[1:], (total / np.maximum(counts, 1) / max(segments, 1) * pixel_size ** 2)[1:]
+
+
+def line_profile(z, start, end, samples=None, coefficients=None):
+    """Bilinear height profile between (row, col) points; returns (distance px, z).
+
+    Passing plane `coefficients` returns plane-levelled heights.
+    """
+    (row_start, col_start), (row_end, col_end) = start, end
+    length = np.hypot(row_end - row_start, col_end - col_start)
+    samples = samples or max(2, int(np.ceil(length)) + 1)
+    rows = np.linspace(row_start, row_end, samples)
+    cols = np.linspace(col_start, col_end, samples)
+    # Bilinear interpolation by fancy indexing reads only the pixels next to
+    # the line, even from a memory-mapped scan
+    rows = np.clip(rows, 0, z.shape[0] - 1)
+    cols = np.clip(cols, 0, z.shape[1] - 1)
+    r0 = np.minimum(np.floor(rows).astype(int), max(z.shape[0] - 2, 0))
+    c0 = np.minimum(np.floor(cols).astype(int), max(z.shape[1] - 2, 0))
+    r1 = np.minimum(r0 + 1, z.shape[0] - 1)
+    c1 = np.minimum(c0 + 1, z.shape[1] - 1)
+    fr = rows - r0
+    fc = cols - c0
+    heights = ((1 - fr) * ((1 - fc) * z[r0, c0] + fc * z[r0, c1]) +
+               fr * ((1 - fc) * z[r1, c0] + fc * z[r1, c1])).astype(float)
+    if coefficients is not None:
+        a, b, c = coefficients
+        heights = heights - (a * cols + b * rows + c)
+    return np.linspace(0, length, samples), heights
@@ -0,0 +1,185 @@
+"""2D wafer temperature uniformity simulator for the bake steps.
+
+Solves in-plane heat conduction in a wafer sitting over a multi-zone
+proximity-gap hotplate, driven by the soft bake, PEB and hard bake thermal
+profiles of steps 4, 6 and 8. Backward Euler with a constant time step keeps
+the sparse system matrix fixed, so it is factorised once per run.
+"""
+import numpy as np
+from PIL import Image
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+# Thermal profiles from the process page: (time s, plate setpoint degC) corners
+PROFILES = {
+    "Soft bake": {"profile": [(0, 23), (30, 100), (90, 100), (135, 23)],
+                  "setpoint": 100.0, "tolerance": 0.3, "window": (95.0, 105.0)},
+    "PEB": {"profile": [(0, 23), (15, 110), (75, 110), (95, 23)],
+            "setpoint": 110.0, "tolerance": 0.1, "window": None},
+    "Hard bake": {"profile": [(0, 23), (300, 125), (2100, 125), (2700, 23)],
+                  "setpoint": 125.0, "tolerance": 1.0, "window": None},
+}
+
+# Silicon wafer and air gap properties (SI units)
+SILICON = {"k": 150.0, "rho": 2330.0, "cp": 700.0}
+AIR_K = 0.026
+
+
+class WaferBake:
+    """Backward Euler heat solver on a square grid masked to the wafer disc.
+
+    Each hotplate zone is a concentric ring that tracks the profile with its own
+    offset; heat reaches the wafer across the proximity gap, and the top
+    surface and the wafer rim lose heat to ambient by convection.
+    """
+
+    def __init__(self, diameter=0.2, thickness=725e-6, gap=100e-6, dx=2e-3,
+                 zone_radii=(0.04, 0.08, 0.1), zone_offsets=(0.02, 0.0, 0.15),
+                 h_top=8.0, h_edge=25.0, ambient=23.0, dt=0.5):
+        self.dx = dx
+        self.dt = dt
+        self.ambient = ambient
+        n = int(np.ceil(diameter / dx))
+        centres = (np.arange(n) + 0.5) * dx - diameter / 2
+        x, y = np.meshgrid(centres, centres)
+        r = np.hypot(x, y)
+        self.mask = r <= diameter / 2
+        self.shape = self.mask.shape
+        self.radius = r[self.mask]
+        node = -np.ones(self.shape, dtype=int)
+        node[self.mask] = np.arange(self.mask.sum())
+        self.size = int(self.mask.sum())
+
+        self.zone = np.searchsorted(np.asarray(zone_radii), self.radius).clip(0, len(zone_radii) - 1)
+        self.zone_offsets = np.asarray(zone_offsets, dtype=float)
+
+        # Per-node areal heat capacity and conductances (W/m^2K)
+        capacity = SILICON["rho"] * SILICON["cp"] * thickness
+        g_lateral = SILICON["k"] * thickness / dx ** 2
+        g_gap = AIR_K / gap
+
+        # Lateral conduction between wafer neighbours; missing neighbours are
+        # adiabatic except for the rim convection added below
+        rows, cols = [], []
+        for shift in ((0, 1), (1, 0)):
+            a = node[:self.shape[0] - shift[0], :self.shape[1] - shift[1]]
+            b = node[shift[0]:, shift[1]:]
+            both = (a >= 0) & (b >= 0)
+            rows.append(a[both])
+            cols.append(b[both])
+        rows = np.concatenate(rows)
+        cols = np.concatenate(cols)
+        laplacian = sparse.coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(self.size, self.size))
+        laplacian = laplacian + laplacian.T
+        degree = np.asarray(laplacian.sum(axis=1)).ravel()
+        rim = degree < 4
+
+        self.g_gap = g_gap
+        self.h_top = h_top
+        self.g_loss = h_top + np.where(rim, h_edge * thickness / dx, 0.0)
+        diagonal = capacity / dt + g_lateral * degree + g_gap + self.g_loss
+        system = sparse.diags(diagonal) - g_lateral * laplacian
+        self._solver = splu(system.tocsc())
+        self._capacity_dt = capacity / dt
+
+    def plate_temperature(self, setpoint):
+        # Plate calibrated so a wafer centre in steady state sits at the setpoint
+        calibrated = setpoint + (setpoint - self.ambient) * self.h_top / self.g_gap
+        return calibrated + self.zone_offsets[self.zone]
+
+    def run(self, name, record_every=10.0):
+        """Simulate a named profile; returns a BakeResult."""
+        spec = PROFILES[name]
+        times, temps = zip(*spec["profile"])
+        steps = int(round(times[-1] / self.dt))
+        stride = max(1, int(round(record_every / self.dt)))
+        soak_start, soak_end = times[1], times[2]
+
+        T = np.full(self.size, self.ambient)
+        loss_source = self.g_loss * self.ambient
+        history_t, history_min, history_max = [], [], []
+        soak_max = np.full(self.size, -np.inf)
+        soak_spread = 0.0
+        soak_final = None
+        # Fallback for a soak window that no step lands in: the step nearest its middle
+        soak_mid = (soak_start + soak_end) / 2
+        nearest, nearest_gap = None, np.inf
+        for step in range(1, steps + 1):
+            t = step * self.dt
+            plate = self.plate_temperature(np.interp(t, times, temps))
+            rhs = self._capacity_dt * T + self.g_gap * plate + loss_source
+            T = self._solver.solve(rhs)
+            if abs(t - soak_mid) < nearest_gap:
+                nearest, nearest_gap = T, abs(t - soak_mid)
+            if soak_start <= t <= soak_end:
+                np.maximum(soak_max, T, out=soak_max)
+                soak_spread = max(soak_spread, T.max() - T.min())
+                soak_final = T.copy()
+            if step % stride == 0:
+                history_t.append(t)
+                history_min.append(T.min())
+                history_max.append(T.max())
+        if soak_final is None:
+            soak_final = nearest.copy()
+            soak_max = nearest.copy()
+            soak_spread = nearest.max() - nearest.min()
+        return BakeResult(self, name, spec, soak_final, soak_max, soak_spread,
+                          np.array(history_t), np.array(history_min), np.array(history_max))
+
+
+class BakeResult:
+    def __init__(self, bake, name, spec, soak_final, soak_max, soak_spread,
+                 times, t_min, t_max):
+        self.bake = bake
+        self.name = name
+        self.spec = spec
+        self.soak_final = soak_final
+        self.soak_max = soak_max
+        self.soak_spread = soak_spread
+        self.times = times
+        self.t_min = t_min
+        self.t_max = t_max
+
+    def report(self):
+        """Spatial spread at the end of the soak against the spec tolerance."""
+        setpoint = self.spec["setpoint"]
+        tolerance = self.spec["tolerance"]
+        deviation = self.soak_final - setpoint
+        summary = {
+            "profile": self.name,
+            "setpoint": setpoint,
+            "tolerance": tolerance,
+            "mean": float(self.soak_final.mean()),
+            "min": float(self.soak_final.min()),
+            "max": float(self.soak_final.max()),
+            "spread": float(self.soak_final.max() - self.soak_final.min()),
+            "in_tolerance": float(np.mean(np.abs(deviation) <= tolerance)),
+            "peak_soak_spread": float(self.soak_spread),
+        }
+        if self.spec["window"]:
+            # Settled soak inside the window and no overshoot past its upper edge
+            low, high = self.spec["window"]
+            summary["in_window"] = bool(self.soak_final.min() >= low and self.soak_max.max() <= high)
+        return summary
+
+    def render(self, size=300):
+        """Colour-mapped deviation from setpoint at the end of the soak."""
+        tolerance = self.spec["tolerance"]
+        grid = np.full(self.bake.shape, np.nan)
+        grid[self.bake.mask] = self.soak_final - self.spec["setpoint"]
+        image = Image.fromarray(diverging_colormap(grid, tolerance))
+        return image.resize((size, size), Image.NEAREST)
+
+
+def diverging_colormap(values, limit):
+    """Blue-white-red RGB image for values in [-limit, limit]; NaN is white."""
+    scaled = np.clip(np.nan_to_num(values / limit), -1.0, 1.0)
+    rgb = np.empty(values.shape + (3,), dtype=np.uint8)
+    rgb[..., 0] = np.where(scaled < 0, 255 * (1 + scaled), 255)
+    rgb[..., 1] = 255 * (1 - np.abs(scaled))
+    rgb[..., 2] = np.where(scaled > 0, 255 * (1 - scaled), 255)
+    return rgb
+
+
+def simulate(name, **kwargs):
+    return WaferBake(**kwargs).run(name)
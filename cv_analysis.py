@@ -0,0 +1,112 @@
+"""C-V analysis: Mott-Schottky doping profiles and flatband voltage.
+
+Implements the extraction steps of the characterization page,
+    N = 2 / (q eps A^2 d(1/C^2)/dV),   W = eps A / C,
+    V_fb = Phi_ms - Q_ox / C_ox,
+for every frequency of every sweep file, with results cached per file.
+"""
+import numpy as np
+from scipy.signal import savgol_filter
+
+import iv_analysis
+from result_cache import ResultCache, stream_analysis
+
+EPS0 = 8.8541878128e-12
+CHARGE = iv_analysis.CHARGE
+EPS_SILICON = 11.7
+
+
+def load_cv_sweeps(path):
+    """Read C-V sweeps as (frequency Hz or None, V, C) tuples.
+
+    Files hold (voltage, capacitance) columns, or (frequency, voltage,
+    capacitance) for multi-frequency sweeps.
+    """
+    sweeps = []
+    for name, v, c in iv_analysis.load_sweeps(path):
+        _, _, tag = name.partition(':')
+        try:
+            frequency = float(tag)
+        except ValueError:
+            frequency = None
+        order = np.argsort(v)
+        sweeps.append((frequency, v[order], c[order]))
+    return sweeps
+
+
+def smoothed_derivative(x, y, window=11, order=2):
+    """Savitzky-Golay dy/dx, resampling onto a uniform x grid when needed."""
+    n = len(x)
+    window = min(window, n - 1 if n % 2 == 0 else n)
+    if window <= order:
+        return np.gradient(y, x)
+    uniform = np.linspace(x[0], x[-1], n)
+    resampled = np.interp(uniform, x, y)
+    step = uniform[1] - uniform[0]
+    derivative = savgol_filter(resampled, window, order, deriv=1, delta=step)
+    return np.interp(x, uniform, derivative)
+
+
+def doping_profile(V, C, area, eps_r=EPS_SILICON):
+    """Depth (um) and doping (cm^-3) from a C-V sweep.
+
+    `area` is in cm^2 and C in farads.
+    """
+    eps = eps_r * EPS0
+    area_m2 = area * 1e-4
+    slope = smoothed_derivative(V, 1.0 / C ** 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        doping = 2.0 / (CHARGE * eps * area_m2 ** 2 * np.abs(slope)) * 1e-6
+    depth = eps * area_m2 / C * 1e6
+    return depth, doping
+
+
+def flatband_voltage(V, C, area, doping, eps_r=EPS_SILICON, T=300.0):
+    """Flatband voltage from the flatband capacitance of a MOS sweep.
+
+    C_ox is the accumulation (maximum) capacitance and the semiconductor
+    flatband capacitance is eps A / L_D with the extrinsic Debye length.
+    """
+    eps = eps_r * EPS0
+    c_ox = C.max()
+    debye = np.sqrt(eps * iv_analysis.thermal_voltage(T) / (CHARGE * doping * 1e6))
+    c_fbs = eps * area * 1e-4 / debye
+    c_fb = c_ox * c_fbs / (c_ox + c_fbs)
+    # Sweep from depletion towards accumulation so C rises through C_fb
+    order = np.argsort(C)
+    return float(np.interp(c_fb, C[order], V[order])), float(c_ox)
+
+
+def analyze_sweep(V, C, area, eps_r=EPS_SILICON, phi_ms=0.0, T=300.0):
+    depth, doping = doping_profile(V, C, area, eps_r)
+    # Depletion region: below accumulation and away from the flat inversion
+    # tail, where d(1/C^2)/dV vanishes and the apparent doping diverges
+    finite = np.isfinite(doping)
+    depletion = (C < 0.9 * C.max()) & finite & (doping < 2 * np.min(doping[finite], initial=np.inf))
+    bulk = float(np.median(doping[depletion])) if depletion.any() else float(np.nanmedian(doping))
+    v_fb, c_ox = flatband_voltage(V, C, area, bulk, eps_r, T)
+    fixed_charge = (phi_ms - v_fb) * c_ox / (area * CHARGE)
+    return {
+        "depth_um": depth.tolist(),
+        "doping_cm3": np.where(np.isfinite(doping), doping, 0.0).tolist(),
+        "bulk_doping_cm3": bulk,
+        "flatband_v": v_fb,
+        "c_ox_f": c_ox,
+        "fixed_charge_cm2": float(fixed_charge),
+    }
+
+
+def analyze_file(path, area=1e-3, eps_r=EPS_SILICON, phi_ms=0.0, T=300.0):
+    """Analyze every frequency in one C-V file (process-pool worker)."""
+    results = []
+    for frequency, V, C in load_cv_sweeps(path):
+        result = analyze_sweep(V, C, area, eps_r, phi_ms, T)
+        result.update({"frequency": frequency, "v": V.tolist(), "c": C.tolist()})
+        results.append(result)
+    return {"sweeps": results}
+
+
+def analyze_files(paths, area=1e-3, eps_r=EPS_SILICON, phi_ms=0.0, T=300.0, max_workers=None):
+    """Stream (path, result, from_cache) for any number of C-V files."""
+    params = {"area": area, "eps_r": eps_r, "phi_ms": phi_ms, "T": T}
+    return stream_analysis(paths, analyze_file, ResultCache("cv"), params, max_workers)
@@ -0,0 +1,312 @@
+"""E-beam write-time and shot-count estimation.
+
+Polygons are clipped to the write fields they touch and fractured into
+horizontal-band trapezoids (the figures the pattern generator writes). Each
+figure is exposed pixel by pixel at the beam step size, so the time to
+write a layout is
+    beam pixels x max(dwell, 1 / max deflection frequency)
+    + figures x settling time + fields x stage move time,
+with dwell = dose x step^2 / current. Polygons are consumed as a stream in
+chunks, rectangles and same-vertex-count shapes each fractured in one
+vectorized pass, so memory does not grow with layout size.
+"""
+import itertools
+import math
+
+import numpy as np
+
+import layout
+
+# Typical Gaussian-beam tool configurations
+BEAM_PRESETS = {
+    "High resolution": {"current_na": 0.1, "step_nm": 2.0, "field_um": 100.0,
+                        "max_frequency_mhz": 50.0, "settle_us": 1.0, "stage_s": 0.1},
+    "Standard": {"current_na": 2.0, "step_nm": 5.0, "field_um": 250.0,
+                 "max_frequency_mhz": 50.0, "settle_us": 1.0, "stage_s": 0.1},
+    "High current": {"current_na": 100.0, "step_nm": 20.0, "field_um": 500.0,
+                     "max_frequency_mhz": 50.0, "settle_us": 2.0, "stage_s": 0.15},
+}
+
+# 1 uC/cm^2 in C/um^2
+UC_PER_CM2 = 1e-14
+
+
+def fracture(points):
+    """Split a simple polygon into trapezoids with horizontal top and bottom.
+
+    Returns an (n, 6) array of (y0, y1, bottom x0, bottom x1, top x0, top x1),
+    one row per trapezoid; rectangles have equal bottom and top x.
+    Vertices are snapped to a 1e-6 um grid first so that rounding noise in
+    nominally equal y coordinates cannot split off sliver bands.
+    """
+    return fracture_batch(np.asarray(points, dtype=float)[None])[1]
+
+
+def fracture_batch(points, max_cells=1 << 22):
+    """fracture of k polygons with n vertices each, points (k, n, 2).
+
+    Returns (owner, trapezoids): the polygon index of every trapezoid and
+    the trapezoids in the layout of `fracture`, polygon by polygon. The
+    sorted vertex y of each polygon bound its n - 1 bands (empty where two
+    vertices share a level), and every band is crossed with all n edges at
+    once, for about `max_cells` band-edge pairs at a time.
+    """
+    k, n = points.shape[:2]
+    step = max(1, max_cells // (n * n))
+    owners, traps = [np.empty(0, dtype=np.int64)], [np.empty((0, 6))]
+    for first in range(0, k, step):
+        x, y = np.round(points[first:first + step], 6).transpose(2, 0, 1)
+        xn, yn = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+        levels = np.sort(y, axis=1)
+        y0, y1 = levels[:, :-1, None], levels[:, 1:, None]
+        low, high = np.minimum(y, yn)[:, None, :], np.maximum(y, yn)[:, None, :]
+        crosses = (low <= y0) & (high >= y1) & (high > low) & (y1 > y0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slope = np.where(high > low, ((xn - x) / (yn - y))[:, None, :], 0.0)
+        bottom = x[:, None, :] + (y0 - y[:, None, :]) * slope
+        top = x[:, None, :] + (y1 - y[:, None, :]) * slope
+        # Order each band's crossing edges left to right and pair them up
+        order = np.argsort(np.where(crosses, (bottom + top) / 2, np.inf), axis=2)
+        left, right = order[..., 0:n // 2 * 2:2], order[..., 1:n // 2 * 2:2]
+        owner, band, pair = np.nonzero(np.take_along_axis(crosses, right, axis=2))
+        left, right = left[owner, band, pair], right[owner, band, pair]
+        owners.append(owner + first)
+        traps.append(np.column_stack([levels[owner, band], levels[owner, band + 1],
+                                      bottom[owner, band, left], bottom[owner, band, right],
+                                      top[owner, band, left], top[owner, band, right]]))
+    return np.concatenate(owners), np.concatenate(traps)
+
+
+def trapezoid_area(traps):
+    return (traps[:, 1] - traps[:, 0]) * ((traps[:, 3] - traps[:, 2]) + (traps[:, 5] - traps[:, 4])) / 2
+
+
+def figure_stats(points):
+    """Areas of the non-empty figures of a polygon and how many are rectangles."""
+    return figure_stats_batch(np.asarray(points, dtype=float)[None])[0]
+
+
+def figure_stats_batch(points):
+    """figure_stats of each of k polygons with n vertices each, points (k, n, 2)."""
+    owner, traps = fracture_batch(points)
+    areas = trapezoid_area(traps)
+    keep = areas > 0
+    owner, traps, areas = owner[keep], traps[keep], areas[keep]
+    rectangles = np.bincount(owner, (traps[:, 2] == traps[:, 4]) & (traps[:, 3] == traps[:, 5]), len(points))
+    ends = np.cumsum(np.bincount(owner, minlength=len(points)))
+    return [(part, int(count)) for part, count in zip(np.split(areas, ends[:-1]), rectangles)]
+
+
+def _clip(points, axis, limit, keep_below):
+    """One Sutherland-Hodgman pass against the line points[:, axis] = limit."""
+    if not len(points):
+        return points
+    inside = points[:, axis] <= limit if keep_below else points[:, axis] >= limit
+    if inside.all():
+        return points
+    following = np.roll(points, -1, axis=0)
+    inside_next = np.roll(inside, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (limit - points[:, axis]) / (following[:, axis] - points[:, axis])
+        crossing = points + t[:, None] * (following - points)
+    # Each edge emits its crossing point (if any) and then its end point (if inside)
+    emitted = np.stack([crossing, following], axis=1)
+    mask = np.stack([inside != inside_next, inside_next], axis=1)
+    return emitted[mask]
+
+
+def clip_to_box(points, x0, y0, x1, y1):
+    for axis, limit, keep_below in ((0, x0, False), (0, x1, True), (1, y0, False), (1, y1, True)):
+        points = _clip(points, axis, limit, keep_below)
+    return points
+
+
+class _FieldTally:
+    """Running figure, area and pixel totals for one field size.
+
+    Polygons that fit in one field are only counted per cached shape on
+    the way in, and the pieces of stitched polygons are only clipped; their
+    figures are totalled in bulk when the counts flush, with the pieces
+    fractured together per vertex count.
+    """
+
+    def __init__(self, field, steps, pending_limit=4096):
+        self.field = field
+        self.steps = np.asarray(steps, dtype=float) / 1000
+        self.fields = set()
+        self.area = 0.0
+        self.figures = 0
+        self.rectangles = 0
+        self.pixels = np.zeros(len(steps))
+        self.stitched = 0
+        self.pending = {}
+        self.pieces = []
+        self.pending_limit = pending_limit
+
+    def add_figures(self, areas, rectangles, field_keys, count=1):
+        areas = np.asarray(areas, dtype=float)
+        self.area += count * areas.sum()
+        self.figures += count * len(areas)
+        self.rectangles += count * int(rectangles)
+        self.pixels += count * np.ceil(areas[:, None] / self.steps ** 2).sum(axis=0)
+        self.fields.update(field_keys)
+
+    def add_rectangles(self, boxes):
+        f = self.field
+        x0, y0, x1, y1 = np.minimum(boxes[:, 0], boxes[:, 2]), np.minimum(boxes[:, 1], boxes[:, 3]), \
+            np.maximum(boxes[:, 0], boxes[:, 2]), np.maximum(boxes[:, 1], boxes[:, 3])
+        fx0, fy0 = np.floor(x0 / f), np.floor(y0 / f)
+        single = (np.ceil(x1 / f) - 1 <= fx0) & (np.ceil(y1 / f) - 1 <= fy0)
+        keys = set(zip(fx0[single].astype(int).tolist(), fy0[single].astype(int).tolist()))
+        areas = ((x1 - x0) * (y1 - y0))[single]
+        self.add_figures(areas, len(areas), keys)
+        for box in np.column_stack([x0, y0, x1, y1])[~single]:
+            self.add_polygon(np.array([[box[0], box[1]], [box[2], box[1]], [box[2], box[3]], [box[0], box[3]]]),
+                             box)
+
+    def add_polygon(self, points, bounds, key=None, stats=None):
+        """Tally one polygon with bounds (xmin, ymin, xmax, ymax); `stats` are
+        its figure_stats, cached under `key`, used if it fits in one field."""
+        f = self.field
+        xmin, ymin, xmax, ymax = bounds
+        columns = range(math.floor(xmin / f), math.ceil(xmax / f))
+        rows = range(math.floor(ymin / f), math.ceil(ymax / f))
+        if len(columns) * len(rows) == 1:
+            if stats is None:
+                stats = figure_stats(points)
+            if key is None:
+                self.add_figures(*stats, [(columns[0], rows[0])])
+                return
+            self.fields.add((columns[0], rows[0]))
+            count, _ = self.pending.get(key, (0, stats))
+            self.pending[key] = (count + 1, stats)
+            if len(self.pending) >= self.pending_limit:
+                self.flush()
+            return
+        self.stitched += 1
+        for fx, fy in itertools.product(columns, rows):
+            piece = clip_to_box(points, fx * f, fy * f, (fx + 1) * f, (fy + 1) * f)
+            if len(piece) >= 3:
+                self.pieces.append((piece, (fx, fy)))
+        if len(self.pieces) >= self.pending_limit:
+            self.flush()
+
+    def flush(self):
+        totals = list(self.pending.values())
+        groups = {}
+        for piece, field_key in self.pieces:
+            groups.setdefault(len(piece), []).append((piece, field_key))
+        for group in groups.values():
+            pieces, field_keys = zip(*group)
+            for field_key, stats in zip(field_keys, figure_stats_batch(np.stack(pieces))):
+                # A piece that fractures to nothing does not make its field written
+                if len(stats[0]):
+                    self.fields.add(field_key)
+                    totals.append((1, stats))
+        self.pieces = []
+        self.pending = {}
+        if not totals:
+            return
+        counts, stats = zip(*totals)
+        areas = np.concatenate([shape_areas for shape_areas, _ in stats])
+        weights = np.repeat(counts, [len(shape_areas) for shape_areas, _ in stats])
+        self.area += weights @ areas
+        self.figures += int(weights.sum())
+        self.rectangles += sum(count * rectangles for count, (_, rectangles) in zip(counts, stats))
+        self.pixels += weights @ np.ceil(areas[:, None] / self.steps ** 2)
+
+    def summary(self):
+        self.flush()
+        return {"field_um": self.field, "area_um2": self.area, "figures": self.figures,
+                "rectangles": self.rectangles, "fields": len(self.fields), "stitched_shapes": self.stitched,
+                "pixels": dict(zip((self.steps * 1000).tolist(), self.pixels.tolist()))}
+
+
+def _add_polygons(tallies, polygons, cache, cache_size):
+    """Tally a chunk of non-rectangular polygons, fracturing the shapes not yet
+    in `cache` together per vertex count."""
+    # Offsets rounded well below any layout grid so repeated copies share a key
+    keys = [np.round(points - points[0], 6).tobytes() for points in polygons]
+    missing = {}
+    for points, key in zip(polygons, keys):
+        if key not in cache:
+            missing.setdefault(len(points), {}).setdefault(key, points)
+    found = {}
+    for shapes in missing.values():
+        found.update(zip(shapes, figure_stats_batch(np.stack(list(shapes.values())))))
+    if len(cache) + len(found) > cache_size:
+        cache.clear()
+    if len(found) <= cache_size:
+        cache.update(found)
+    for points, key in zip(polygons, keys):
+        stats = cache.get(key) or found[key]
+        low, high = points.min(axis=0), points.max(axis=0)
+        bounds = (low[0], low[1], high[0], high[1])
+        for tally in tallies:
+            tally.add_polygon(points, bounds, key, stats)
+
+
+def summarize(polygons, geometries, chunk=65536, cache_size=4096):
+    """Fracture a stream of (layer, points) polygons once for every write geometry.
+
+    `geometries` are (field size um, beam step nm) pairs. Returns
+    {field size: totals} where totals hold the exposed area, figure,
+    rectangle, field and stitched-shape counts and beam pixels per step.
+    Fracturing does not depend on position, so the figures of repeated
+    shapes are cached by their vertex offsets; other shapes are collected
+    into chunks and fractured together per vertex count.
+    """
+    steps = {}
+    for field, step in geometries:
+        steps.setdefault(field, []).append(step)
+    tallies = [_FieldTally(field, sorted(set(s))) for field, s in steps.items()]
+    shapes = 0
+    boxes = []
+    others = []
+    cache = {}
+    for _, points in polygons:
+        points = np.asarray(points, dtype=float)
+        shapes += 1
+        if layout.is_rectangle(points):
+            boxes.append((points[0, 0], points[0, 1], points[2, 0], points[2, 1]))
+            if len(boxes) >= chunk:
+                for tally in tallies:
+                    tally.add_rectangles(np.array(boxes))
+                boxes = []
+        else:
+            others.append(points)
+            if len(others) >= chunk:
+                _add_polygons(tallies, others, cache, cache_size)
+                others = []
+    if boxes:
+        for tally in tallies:
+            tally.add_rectangles(np.array(boxes))
+    if others:
+        _add_polygons(tallies, others, cache, cache_size)
+    return {tally.field: dict(tally.summary(), shapes=shapes) for tally in tallies}
+
+
+def write_time(summary, settings, dose):
+    """Write time breakdown (seconds) of a summarized layout for one beam setting.
+
+    `dose` is in uC/cm^2. When the dwell per pixel is shorter than the
+    deflection clock allows, the clock sets the pixel time instead.
+    """
+    totals = summary[settings["field_um"]]
+    step = settings["step_nm"] / 1000
+    pixels = totals["pixels"][settings["step_nm"]]
+    dwell = dose * UC_PER_CM2 * step ** 2 / (settings["current_na"] * 1e-9)
+    pixel_time = max(dwell, 1 / (settings["max_frequency_mhz"] * 1e6))
+    beam = pixels * pixel_time
+    settle = totals["figures"] * settings["settle_us"] * 1e-6
+    stage = totals["fields"] * settings["stage_s"]
+    return {"beam_s": beam, "settle_s": settle, "stage_s": stage, "total_s": beam + settle + stage,
+            "dwell_ns": dwell * 1e9, "clock_limited": dwell < pixel_time, "pixels": pixels,
+            "figures": totals["figures"], "fields": totals["fields"],
+            "stitched_shapes": totals["stitched_shapes"], "shapes": totals["shapes"]}
+
+
+def compare(polygons, settings, dose):
+    """Stream the layout once and estimate it for every named beam setting."""
+    summary = summarize(polygons, [(s["field_um"], s["step_nm"]) for s in settings.values()])
+    return {name: write_time(summary, s, dose) for name, s in settings.items()}
@@ -0,0 +1,343 @@
+"""Ellipsometry modelling and fitting with a vectorized transfer-matrix method.
+
+rho = r_p / r_s = tan(Psi) exp(i Delta) of a layer stack comes from the
+product of the characteristic matrices of its layers,
+    M_j = [[cos b_j, i sin b_j / eta_j], [i eta_j sin b_j, cos b_j]],
+    b_j = 2 pi n_j d_j cos(theta_j) / lambda,
+with eta = N cos(theta) for s and N / cos(theta) for p polarisation. Complex
+indices follow the ellipsometry convention N = n - ik, with the branch
+Im(N cos(theta)) <= 0 that decays into absorbing media. Every
+quantity broadcasts, so one call evaluates any grid of candidate thicknesses
+and indices at every wavelength and angle. Fits are seeded from a disk-cached
+lookup table of (thickness, index) -> (Psi, Delta) and refined by a batched
+Levenberg-Marquardt over all measurements (or map pixels) together.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import measurement_io
+from result_cache import CACHE_ROOT
+
+
+def cauchy(a, b=0.0, c=0.0):
+    """Transparent Cauchy dispersion n = A + B / lambda^2 + C / lambda^4 (lambda in um)."""
+    return lambda wavelength: a + b / (wavelength / 1000) ** 2 + c / (wavelength / 1000) ** 4
+
+
+def tabulated(wavelength_nm, n, k):
+    """Interpolated N = n - ik from tables of n and extinction coefficient k >= 0."""
+    def index(wavelength):
+        return np.interp(wavelength, wavelength_nm, n) - 1j * np.interp(wavelength, wavelength_nm, k)
+    return index
+
+
+# Crystalline silicon, approximate room-temperature optical constants
+SILICON = tabulated([400, 450, 500, 550, 600, 633, 700, 800, 900, 1000, 1100],
+                    [5.57, 4.67, 4.30, 4.08, 3.94, 3.88, 3.78, 3.69, 3.63, 3.57, 3.54],
+                    [0.387, 0.135, 0.073, 0.041, 0.020, 0.018, 0.009, 0.0065, 0.0025, 0.0010, 0.0001])
+
+MATERIALS = {
+    "Si": SILICON,
+    "SiO2": cauchy(1.458, 0.00354),
+    "Si3N4": cauchy(1.99, 0.0185),
+    "Resist": cauchy(1.60, 0.0100),
+    "Air": cauchy(1.0),
+}
+
+# Films whose thickness and Cauchy A are fitted (B is kept from MATERIALS)
+FILMS = {"SiO2": (1.458, 0.00354), "Si3N4": (1.99, 0.0185), "Resist": (1.60, 0.0100)}
+
+
+def refractive_index(material, wavelength):
+    """Complex index of a named material, a dispersion function or a constant."""
+    if isinstance(material, str):
+        material = MATERIALS[material]
+    if callable(material):
+        return np.asarray(material(wavelength), dtype=complex)
+    return np.asarray(material, dtype=complex)
+
+
+def _cos_angle(n, n0_sin):
+    cos = np.sqrt(1 - (n0_sin / n) ** 2 + 0j)
+    # Decaying branch in absorbing media (N = n - ik convention)
+    return np.where((n * cos).imag > 0, -cos, cos)
+
+
+def psi_delta(layers, substrate, wavelength, angle, ambient=1.0):
+    """Psi and Delta (degrees) of a stack.
+
+    `layers` lists (index, thickness nm) from the top. Indices are complex
+    arrays or scalars broadcastable against `wavelength` (nm) and `angle`
+    (degrees of incidence); thicknesses broadcast too. Delta lies in
+    (-180, 180] with Delta = 180 for a bare dielectric below Brewster.
+    """
+    wavelength = np.asarray(wavelength, dtype=float)
+    n0 = np.asarray(ambient, dtype=complex)
+    n0_sin = n0 * np.sin(np.radians(angle))
+    cos0 = _cos_angle(n0, n0_sin)
+    n_sub = np.asarray(substrate, dtype=complex)
+    cos_sub = _cos_angle(n_sub, n0_sin)
+
+    reflection = []
+    for polarisation in ('s', 'p'):
+        def admittance(n, cos):
+            return n * cos if polarisation == 's' else n / cos
+        m11, m12, m21, m22 = 1.0, 0.0, 0.0, 1.0
+        for n, thickness in layers:
+            n = np.asarray(n, dtype=complex)
+            cos = _cos_angle(n, n0_sin)
+            eta = admittance(n, cos)
+            phase = 2 * np.pi * n * np.asarray(thickness) * cos / wavelength
+            c, s = np.cos(phase), np.sin(phase)
+            m11, m12, m21, m22 = (m11 * c + m12 * 1j * eta * s, m11 * 1j * s / eta + m12 * c,
+                                  m21 * c + m22 * 1j * eta * s, m21 * 1j * s / eta + m22 * c)
+        eta0 = admittance(n0, cos0)
+        eta_sub = admittance(n_sub, cos_sub)
+        B = m11 + m12 * eta_sub
+        C = m21 + m22 * eta_sub
+        reflection.append((eta0 * B - C) / (eta0 * B + C))
+    r_s, r_p = reflection
+    # The admittance form gives -r_p of the Fresnel convention used by ellipsometers
+    rho = -r_p / r_s
+    return np.degrees(np.arctan(np.abs(rho))), np.degrees(np.angle(rho))
+
+
+class FilmModel:
+    """One Cauchy film of unknown thickness and A on known layers and substrate.
+
+    `below` lists fixed (material, thickness nm) layers under the film, for
+    example a native oxide. `evaluate` broadcasts thickness and index A to
+    shape (..., wavelengths, angles).
+    """
+
+    def __init__(self, film="SiO2", substrate="Si", below=()):
+        self.film = film
+        self.cauchy_a, self.cauchy_b = FILMS[film]
+        self.substrate = substrate
+        self.below = tuple(below)
+
+    def key(self):
+        return {"film": self.film, "substrate": self.substrate, "below": [list(layer) for layer in self.below]}
+
+    def evaluate(self, thickness, index, wavelength, angle):
+        wavelength = np.asarray(wavelength, dtype=float)[:, None]
+        angle = np.asarray(angle, dtype=float)[None, :]
+        thickness = np.asarray(thickness, dtype=float)[..., None, None]
+        film = np.asarray(index, dtype=float)[..., None, None] + self.cauchy_b / (wavelength / 1000) ** 2
+        layers = [(film, thickness)]
+        layers += [(refractive_index(material, wavelength), d) for material, d in self.below]
+        return psi_delta(layers, refractive_index(self.substrate, wavelength), wavelength, angle)
+
+
+def _features(psi, delta):
+    # Delta on a circle of radius 180/pi degrees: chord length ~ angle difference
+    delta = np.radians(delta)
+    radius = 180 / np.pi
+    flat = psi.shape[:-2] + (-1,)
+    return np.concatenate([psi.reshape(flat), (radius * np.cos(delta)).reshape(flat),
+                           (radius * np.sin(delta)).reshape(flat)], axis=-1)
+
+
+def _nearest(tree, features):
+    """Index of the nearest tree point to each feature row; rows with
+    missing (non-finite) features are compared on their finite ones only."""
+    complete = np.isfinite(features).all(axis=-1)
+    nearest = np.zeros(len(features), dtype=np.int64)
+    if complete.any():
+        nearest[complete] = tree.query(features[complete])[1]
+    for i in np.flatnonzero(~complete):
+        known = np.isfinite(features[i])
+        if known.any():
+            nearest[i] = ((tree.data[:, known] - features[i, known]) ** 2).sum(axis=1).argmin()
+    return nearest
+
+
+def _wrap(angle):
+    return (angle + 180) % 360 - 180
+
+
+class LookupTable:
+    """Psi/Delta of a FilmModel on a (thickness, index) grid with a k-d tree
+    over the measurement features for nearest-neighbour seeding."""
+
+    def __init__(self, thickness, index, wavelength, angle, psi, delta):
+        self.thickness = thickness
+        self.index = index
+        self.wavelength = wavelength
+        self.angle = angle
+        self.psi = psi
+        self.delta = delta
+        self.tree = cKDTree(_features(psi, delta).reshape(len(thickness) * len(index), -1))
+        self._column_trees = {}
+
+    @classmethod
+    def build(cls, model, wavelength, angle, thickness=None, index=None, chunk=32):
+        wavelength = np.asarray(wavelength, dtype=float)
+        angle = np.asarray(angle, dtype=float)
+        thickness = np.arange(0.0, 1000.1, 2.0) if thickness is None else np.asarray(thickness, dtype=float)
+        if index is None:
+            a = model.cauchy_a
+            index = np.round(np.arange(max(1.0, a - 0.3), a + 0.3001, 0.01), 4)
+        shape = (len(thickness), len(index), len(wavelength), len(angle))
+        psi = np.empty(shape, dtype=np.float32)
+        delta = np.empty(shape, dtype=np.float32)
+        for start in range(0, len(thickness), chunk):
+            d = thickness[start:start + chunk, None]
+            psi[start:start + chunk], delta[start:start + chunk] = model.evaluate(d, index[None, :], wavelength, angle)
+        return cls(thickness, index, wavelength, angle, psi, delta)
+
+    @classmethod
+    def cached(cls, model, wavelength, angle, root=None, **grid):
+        """Load the table for this model and measurement grid, building it once."""
+        wavelength = np.asarray(wavelength, dtype=float)
+        angle = np.asarray(angle, dtype=float)
+        key = json.dumps({"model": model.key(), "convention": "n-ik", "wavelength": wavelength.round(3).tolist(),
+                          "angle": angle.round(3).tolist(),
+                          "grid": {k: np.asarray(v).round(4).tolist() for k, v in grid.items()}}, sort_keys=True)
+        directory = root or os.path.join(CACHE_ROOT, "ellipsometry")
+        path = os.path.join(directory, hashlib.sha256(key.encode()).hexdigest()[:24] + ".npz")
+        if os.path.exists(path):
+            with np.load(path) as data:
+                return cls(data['thickness'], data['index'], data['wavelength'], data['angle'],
+                           data['psi'], data['delta'])
+        table = cls.build(model, wavelength, angle, **grid)
+        os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, thickness=table.thickness, index=table.index, wavelength=wavelength, angle=angle,
+                 psi=table.psi, delta=table.delta)
+        os.replace(tmp, path)
+        return table
+
+    def seed(self, psi, delta, index=None):
+        """Nearest table (thickness, index) for each measurement (..., W, A),
+        searching only the column nearest `index` when it is given."""
+        psi = np.asarray(psi)
+        features = _features(psi, np.asarray(delta)).reshape(-1, 3 * psi.shape[-2] * psi.shape[-1])
+        lead = psi.shape[:-2]
+        if index is None:
+            nearest = _nearest(self.tree, features).reshape(lead)
+            rows, cols = np.divmod(nearest, len(self.index))
+            return self.thickness[rows], self.index[cols]
+        col = int(np.abs(self.index - index).argmin())
+        if col not in self._column_trees:
+            self._column_trees[col] = cKDTree(_features(self.psi[:, col], self.delta[:, col]))
+        rows = _nearest(self._column_trees[col], features).reshape(lead)
+        return self.thickness[rows], np.full(np.shape(rows), float(index))
+
+
+def fit(model, wavelength, angle, psi, delta, table=None, fit_index=True, iterations=20):
+    """Fit thickness (and Cauchy A) to measured Psi/Delta of shape (..., W, A).
+
+    All measurements are refined together by Levenberg-Marquardt on the Psi
+    and wrapped Delta residuals (degrees), starting from the lookup table.
+    Without `fit_index` the film keeps the model's Cauchy A. Single-wavelength,
+    single-angle data repeat with every film period, so pass a `table` whose
+    thickness grid spans only the plausible range.
+    Missing (non-finite) Psi/Delta values are left out of the seed and the
+    fit; measurements without any values get NaN results.
+    Returns arrays of the leading shape: thickness, index and rms error.
+    """
+    psi = np.asarray(psi, dtype=float)
+    delta = np.asarray(delta, dtype=float)
+    lead = psi.shape[:-2]
+    psi = psi.reshape((-1,) + psi.shape[-2:])
+    delta = delta.reshape((-1,) + delta.shape[-2:])
+    valid = np.isfinite(psi) & np.isfinite(delta)
+    counts = valid.reshape(len(psi), -1).sum(axis=1)
+    table = table or LookupTable.cached(model, wavelength, angle)
+    thickness, index = table.seed(psi, delta, None if fit_index else model.cauchy_a)
+    params = np.stack([thickness, index], axis=1).astype(float)
+    low = np.array([0.0, table.index[0] - 0.2])
+    high = np.array([table.thickness[-1] * 1.2, table.index[-1] + 0.2])
+    free = [0, 1] if fit_index else [0]
+
+    def residual(p):
+        model_psi, model_delta = model.evaluate(p[:, 0], p[:, 1], wavelength, angle)
+        return np.concatenate([np.where(valid, model_psi - psi, 0.0).reshape(len(p), -1),
+                               np.where(valid, _wrap(model_delta - delta), 0.0).reshape(len(p), -1)], axis=1)
+
+    r = residual(params)
+    cost = (r ** 2).sum(axis=1)
+    damping = np.full(len(params), 1e-3)
+    steps = (1e-3, 1e-5)
+    for _ in range(iterations):
+        J = np.stack([(residual(params + np.eye(2)[k] * steps[k]) - r) / steps[k] for k in free], axis=-1)
+        JTJ = np.einsum('bmi,bmj->bij', J, J)
+        g = np.einsum('bmi,bm->bi', J, r)
+        diag = np.einsum('bii->bi', JTJ) + 1e-12
+        lhs = JTJ + damping[:, None, None] * diag[:, :, None] * np.eye(len(free))
+        trial = params.copy()
+        trial[:, free] -= np.linalg.solve(lhs, g[..., None])[..., 0]
+        trial = np.clip(trial, low, high)
+        r_trial = residual(trial)
+        cost_trial = (r_trial ** 2).sum(axis=1)
+        better = cost_trial < cost
+        params = np.where(better[:, None], trial, params)
+        r = np.where(better[:, None], r_trial, r)
+        cost = np.where(better, cost_trial, cost)
+        damping = np.where(better, damping / 3, damping * 3).clip(1e-9, 1e9)
+
+    params[counts == 0] = np.nan
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rms = np.sqrt(cost / (2 * counts))
+    return {"thickness": params[:, 0].reshape(lead), "index": params[:, 1].reshape(lead),
+            "rms": rms.reshape(lead)}
+
+
+def fit_map(model, wavelength, angle, psi, delta, fit_index=True, max_thickness=1000.0, chunk=65536):
+    """Per-pixel fit of an imaging ellipsometry map of shape (rows, cols, W, A)
+    with thicknesses up to `max_thickness` nm."""
+    table = LookupTable.cached(model, wavelength, angle,
+                               thickness=np.arange(0.0, max_thickness + 0.1, max(0.5, max_thickness / 500)))
+    rows, cols = psi.shape[:2]
+    psi = psi.reshape((rows * cols,) + psi.shape[2:])
+    delta = delta.reshape((rows * cols,) + delta.shape[2:])
+    result = {name: np.empty(rows * cols) for name in ("thickness", "index", "rms")}
+    for start in range(0, rows * cols, chunk):
+        part = fit(model, wavelength, angle, psi[start:start + chunk], delta[start:start + chunk], table, fit_index)
+        for name in result:
+            result[name][start:start + chunk] = part[name]
+    return {name: values.reshape(rows, cols) for name, values in result.items()}
+
+
+def load_measurement(path):
+    """(wavelength, angle, Psi (W, A), Delta (W, A)) from a table of
+    wavelength, angle, Psi, Delta rows (the last four columns)."""
+    measurement = measurement_io.open_measurement(path)
+    columns = [np.asarray(measurement.column(name), dtype=float) for name in measurement.columns]
+    if len(columns) >= 4:
+        wavelength_col, angle_col, psi_col, delta_col = columns[-4:]
+    else:
+        # Headerless files carry the wavelength in the device label column
+        angle_col, psi_col, delta_col = columns[-3:]
+        wavelength_col = np.empty(measurement.rows)
+        for device, start, stop in measurement.sweep_ranges():
+            wavelength_col[start:stop] = float(device)
+    # Rows without a wavelength or angle cannot be placed on the grid
+    placed = np.isfinite(wavelength_col) & np.isfinite(angle_col)
+    wavelength_col, angle_col = wavelength_col[placed], angle_col[placed]
+    psi_col, delta_col = psi_col[placed], delta_col[placed]
+    wavelength = np.unique(wavelength_col)
+    angle = np.unique(angle_col)
+    psi = np.full((len(wavelength), len(angle)), np.nan)
+    delta = np.full((len(wavelength), len(angle)), np.nan)
+    rows = np.searchsorted(wavelength, wavelength_col)
+    cols = np.searchsorted(angle, angle_col)
+    psi[rows, cols] = psi_col
+    delta[rows, cols] = delta_col
+    return wavelength, angle, psi, delta
+
+
+def load_map(path):
+    """(wavelength, angle, Psi, Delta (rows, cols, W, A)) of an imaging ellipsometry .npz."""
+    with np.load(path) as data:
+        psi = data['psi']
+        delta = data['delta']
+        wavelength = np.atleast_1d(data['wavelength']).astype(float)
+        angle = np.atleast_1d(data['angle']).astype(float)
+    shape = psi.shape[:2] + (len(wavelength), len(angle))
+    return wavelength, angle, psi.reshape(shape), delta.reshape(shape)
@@ -0,0 +1,254 @@
+"""GDSII stream reading and writing.
+
+A GDSII file is a flat sequence of records (2-byte length, record type, data
+type, payload). Records are read one at a time and cells keep their
+hierarchy; flattening expands cell references lazily, placing each polygon
+at many positions at once, so arrayed layouts with millions of shapes
+stream out without ever being held in memory. OASIS is a different,
+compressed format and is not read; export such layouts as GDSII.
+"""
+import struct
+
+import numpy as np
+
+# Record types
+HEADER, BGNLIB, LIBNAME, UNITS, ENDLIB = 0x00, 0x01, 0x02, 0x03, 0x04
+BGNSTR, STRNAME, ENDSTR = 0x05, 0x06, 0x07
+BOUNDARY, PATH, SREF, AREF, TEXT = 0x08, 0x09, 0x0A, 0x0B, 0x0C
+LAYER, DATATYPE, WIDTH, XY, ENDEL, SNAME, COLROW = 0x0D, 0x0E, 0x0F, 0x10, 0x11, 0x12, 0x13
+STRANS, MAG, ANGLE, PATHTYPE, BOX = 0x1A, 0x1B, 0x1C, 0x21, 0x2D
+
+# Payload data types
+NO_DATA, BIT_ARRAY, INT16, INT32, REAL8, ASCII = 0, 1, 2, 3, 5, 6
+
+ELEMENTS = (BOUNDARY, PATH, SREF, AREF, TEXT, BOX)
+
+
+def _real8_decode(data):
+    """GDSII 8-byte reals: sign bit, excess-64 base-16 exponent, 56-bit mantissa."""
+    raw = np.frombuffer(data, dtype='>u8')
+    sign = np.where(raw >> np.uint64(63), -1.0, 1.0)
+    exponent = ((raw >> np.uint64(56)) & np.uint64(0x7f)).astype(int) - 64
+    mantissa = (raw & np.uint64(0x00ffffffffffffff)).astype(float) / 2.0 ** 56
+    return sign * mantissa * 16.0 ** exponent
+
+
+def _real8_encode(value):
+    if value == 0:
+        return bytes(8)
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+    exponent = 64
+    while value >= 1:
+        value /= 16
+        exponent += 1
+    while value < 1 / 16:
+        value *= 16
+        exponent -= 1
+    mantissa = int(round(value * 2 ** 56))
+    if mantissa >= 2 ** 56:
+        mantissa //= 16
+        exponent += 1
+    return bytes([sign | exponent]) + mantissa.to_bytes(7, 'big')
+
+
+def _string(data):
+    return data.rstrip(b'\0').decode('ascii', 'replace')
+
+
+def records(path, buffer_size=1 << 20):
+    """Yield (record type, payload bytes) for each record of a GDSII file."""
+    with open(path, 'rb', buffering=buffer_size) as f:
+        head = f.read(4)
+        if head.startswith(b'%SEM'):
+            raise ValueError(f"{path}: OASIS layouts are not supported; export the layout as GDSII")
+        while len(head) == 4:
+            length, rectype, _ = struct.unpack('>HBB', head)
+            if length < 4:
+                raise ValueError(f"{path}: corrupt record of length {length}")
+            yield rectype, f.read(length - 4)
+            if rectype == ENDLIB:
+                return
+            head = f.read(4)
+
+
+def _path_polygons(xy, width, pathtype):
+    """Outline a path as one quadrilateral per segment.
+
+    Interior joints are extended by half the width so consecutive segments
+    overlap at bends; the ends are flush (type 0) or extended (types 1, 2).
+    """
+    if width == 0 or len(xy) < 2:
+        return []
+    half = abs(width) / 2
+    start, end = xy[:-1].astype(float), xy[1:].astype(float)
+    direction = end - start
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    keep = length > 0
+    start, end, direction = start[keep], end[keep], direction[keep] / length[keep, None]
+    if not len(start):
+        return []
+    normal = np.column_stack([-direction[:, 1], direction[:, 0]]) * half
+    extend_start = np.full(len(start), half)
+    extend_end = np.full(len(start), half)
+    if pathtype == 0:
+        extend_start[0] = extend_end[-1] = 0
+    start = start - direction * extend_start[:, None]
+    end = end + direction * extend_end[:, None]
+    quads = np.stack([start - normal, end - normal, end + normal, start + normal], axis=1)
+    return list(np.rint(quads))
+
+
+class Library:
+    """Cells of a GDSII file with their hierarchy intact.
+
+    Each cell holds its own polygons in database units, grouped by layer and
+    vertex count into (layer, (k, n, 2) array) stacks, and its references to
+    other cells; `unit` is the database unit in um.
+    """
+
+    def __init__(self, path):
+        self.name = ''
+        self.unit = 1e-3
+        self.cells = {}
+        cell = element = None
+        for rectype, data in records(path):
+            if rectype == UNITS:
+                self.unit = float(_real8_decode(data)[1]) * 1e6
+            elif rectype == LIBNAME:
+                self.name = _string(data)
+            elif rectype == STRNAME:
+                cell = self.cells.setdefault(_string(data), {"polygons": [], "refs": []})
+            elif rectype in ELEMENTS:
+                element = {"type": rectype, "layer": 0, "width": 0, "pathtype": 0,
+                           "reflect": False, "mag": 1.0, "angle": 0.0, "colrow": (1, 1)}
+            elif element is None:
+                continue
+            elif rectype == ENDEL:
+                if cell is not None:
+                    self._add(cell, element)
+                element = None
+            elif rectype == LAYER:
+                element["layer"] = int(np.frombuffer(data, '>i2')[0])
+            elif rectype == XY:
+                element["xy"] = np.frombuffer(data, '>i4').reshape(-1, 2).astype(np.int64)
+            elif rectype == WIDTH:
+                element["width"] = int(np.frombuffer(data, '>i4')[0])
+            elif rectype == PATHTYPE:
+                element["pathtype"] = int(np.frombuffer(data, '>i2')[0])
+            elif rectype == SNAME:
+                element["sname"] = _string(data)
+            elif rectype == COLROW:
+                element["colrow"] = tuple(int(v) for v in np.frombuffer(data, '>i2'))
+            elif rectype == STRANS:
+                element["reflect"] = bool(np.frombuffer(data, '>u2')[0] & 0x8000)
+            elif rectype == MAG:
+                element["mag"] = float(_real8_decode(data)[0])
+            elif rectype == ANGLE:
+                element["angle"] = float(_real8_decode(data)[0])
+        for cell in self.cells.values():
+            cell["polygons"] = self._stacks(cell["polygons"])
+
+    @staticmethod
+    def _stacks(polygons):
+        groups = {}
+        for layer, points in polygons:
+            groups.setdefault((layer, len(points)), []).append(points)
+        return [(layer, np.stack(group)) for (layer, _), group in groups.items()]
+
+    @staticmethod
+    def _add(cell, element):
+        kind, xy = element["type"], element.get("xy")
+        if xy is None or kind == TEXT:
+            return
+        if kind in (BOUNDARY, BOX):
+            if len(xy) > 1 and (xy[0] == xy[-1]).all():
+                xy = xy[:-1]
+            if len(xy) >= 3:
+                cell["polygons"].append((element["layer"], xy))
+        elif kind == PATH:
+            cell["polygons"].extend((element["layer"], quad)
+                                    for quad in _path_polygons(xy, element["width"], element["pathtype"]))
+        elif "sname" in element:
+            angle = np.radians(element["angle"])
+            matrix = element["mag"] * np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+            if element["reflect"]:
+                # Reflection about x is applied before magnification and rotation
+                matrix = matrix @ np.diag([1.0, -1.0])
+            cols, rows = element["colrow"] if kind == AREF else (1, 1)
+            origin = xy[0].astype(float)
+            col_step = (xy[1] - xy[0]) / cols if kind == AREF else np.zeros(2)
+            row_step = (xy[2] - xy[0]) / rows if kind == AREF else np.zeros(2)
+            cell["refs"].append({"name": element["sname"], "matrix": matrix, "origin": origin,
+                                 "cols": cols, "rows": rows, "col_step": col_step, "row_step": row_step})
+
+    def top_cells(self):
+        """Cells that no other cell references."""
+        referenced = {ref["name"] for cell in self.cells.values() for ref in cell["refs"]}
+        return [name for name in self.cells if name not in referenced]
+
+    def flatten_batches(self, top=None, batch=65536):
+        """Yield (layer, placements) with placements a (k, n, 2) array in
+        database units: k placements of one n-vertex polygon, k <= `batch`."""
+        for name in [top] if top else self.top_cells():
+            yield from self._walk(name, np.eye(2)[None], np.zeros((1, 2)), batch)
+
+    def _walk(self, name, matrices, offsets, batch):
+        cell = self.cells[name]
+        step = max(1, batch // len(matrices))
+        for layer, stack in cell["polygons"]:
+            for s0 in range(0, len(stack), step):
+                shapes = stack[s0:s0 + step]
+                placed = np.einsum('mij,knj->mkni', matrices, shapes) + offsets[:, None, None, :]
+                yield layer, placed.reshape(-1, *shapes.shape[1:])
+        for ref in cell["refs"]:
+            if ref["name"] not in self.cells:
+                continue
+            count = ref["cols"] * ref["rows"]
+            step = min(count, batch)
+            parents = max(1, batch // step)
+            for p0 in range(0, len(matrices), parents):
+                matrix, offset = matrices[p0:p0 + parents], offsets[p0:p0 + parents]
+                combined = np.einsum('kij,jl->kil', matrix, ref["matrix"])
+                for c0 in range(0, count, step):
+                    index = np.arange(c0, min(c0 + step, count))
+                    local = (ref["origin"] + (index % ref["cols"])[:, None] * ref["col_step"]
+                             + (index // ref["cols"])[:, None] * ref["row_step"])
+                    placed = offset[:, None, :] + np.einsum('kij,mj->kmi', matrix, local)
+                    yield from self._walk(ref["name"], np.repeat(combined, len(index), axis=0),
+                                          placed.reshape(-1, 2), batch)
+
+    def flatten(self, top=None):
+        """Yield every flattened polygon as (layer, points in um)."""
+        for layer, placements in self.flatten_batches(top):
+            for points in placements * self.unit:
+                yield layer, points
+
+
+def _record(rectype, datatype, payload=b''):
+    if len(payload) % 2:
+        payload += b'\0'
+    return struct.pack('>HBB', len(payload) + 4, rectype, datatype) + payload
+
+
+def write(path, polygons, cell="TOP", unit=1e-3):
+    """Write (layer, points in um) polygons as boundaries of a single cell.
+
+    `unit` is the database unit in um; coordinates are rounded to it.
+    """
+    with open(path, 'wb') as f:
+        f.write(_record(HEADER, INT16, struct.pack('>h', 600)))
+        f.write(_record(BGNLIB, INT16, bytes(24)))
+        f.write(_record(LIBNAME, ASCII, b'LIB'))
+        f.write(_record(UNITS, REAL8, _real8_encode(unit) + _real8_encode(unit * 1e-6)))
+        f.write(_record(BGNSTR, INT16, bytes(24)))
+        f.write(_record(STRNAME, ASCII, cell.encode('ascii')))
+        for layer, points in polygons:
+            xy = np.rint(np.asarray(points) / unit)
+            f.write(_record(BOUNDARY, NO_DATA))
+            f.write(_record(LAYER, INT16, struct.pack('>h', layer)))
+            f.write(_record(DATATYPE, INT16, struct.pack('>h', 0)))
+            f.write(_record(XY, INT32, np.concatenate([xy, xy[:1]]).astype('>i4').tobytes()))
+            f.write(_record(ENDEL, NO_DATA))
+        f.write(_record(ENDSTR, NO_DATA))
+        f.write(_record(ENDLIB, NO_DATA))
@@ -0,0 +1,285 @@
+"""Tiled multi-resolution image pyramids for pan/zoom viewers.
+
+Each level halves the previous one by 2x2 block averaging. Viewers ask for a
+viewport and get back one uint8 buffer composed from only the tiles that
+intersect it, taken from the coarsest level that still has at least one
+source pixel per screen pixel.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image
+
+from result_cache import CACHE_ROOT
+
+
+def _lut(stops):
+    positions, colours = zip(*stops)
+    colours = np.array(colours, dtype=float)
+    x = np.linspace(0, 1, 256)
+    return np.rint(np.stack([np.interp(x, positions, colours[:, k]) for k in range(3)], axis=1)).astype(np.uint8)
+
+
+# 256-entry RGB colour maps
+GRAY = _lut([(0, (0, 0, 0)), (1, (255, 255, 255))])
+AFMHOT = _lut([(0, (0, 0, 0)), (0.35, (150, 60, 10)), (0.65, (240, 160, 40)), (1, (255, 255, 230))])
+VIRIDIS = _lut([(0, (68, 1, 84)), (0.25, (59, 82, 139)), (0.5, (33, 145, 140)), (0.75, (94, 201, 98)),
+                (1, (253, 231, 37))])
+
+
+def downsample(a):
+    """2x2 block mean (odd edges repeat their last row/column) as float32."""
+    if a.shape[0] % 2:
+        a = np.concatenate([a, a[-1:]], axis=0)
+    if a.shape[1] % 2:
+        a = np.concatenate([a, a[:, -1:]], axis=1)
+    a = a.astype(np.float32, copy=False)
+    return 0.25 * (a[0::2, 0::2] + a[1::2, 0::2] + a[0::2, 1::2] + a[1::2, 1::2])
+
+
+class ImagePyramid:
+    """Mean pyramid of a 2D array with a cache of colour-mapped tiles.
+
+    Values are mapped to the colour map between the 0.5 and 99.5 percentiles
+    of the coarsest level unless `limits` is given. Level 0 is the array
+    itself, so a memory-mapped array is never copied whole.
+    """
+
+    def __init__(self, data, tile_size=256, colormap=GRAY, limits=None, cache_tiles=512):
+        self.tile_size = tile_size
+        self.colormap = colormap
+        self.levels = [data]
+        while max(self.levels[-1].shape) > tile_size:
+            self.levels.append(downsample(self.levels[-1]))
+        if limits is None:
+            coarse = self.levels[-1][np.isfinite(self.levels[-1])]
+            limits = np.percentile(coarse, [0.5, 99.5]) if coarse.size else (0.0, 1.0)
+        self.limits = (float(limits[0]), float(limits[1]) if limits[1] > limits[0] else float(limits[0]) + 1)
+        self._tiles = OrderedDict()
+        self._cache_tiles = cache_tiles
+
+    @property
+    def shape(self):
+        return self.levels[0].shape
+
+    def level_data(self, level):
+        return self.levels[level]
+
+    def tile(self, level, ty, tx):
+        """Colour-mapped (tile, tile, 3) uint8 tile, cached least-recently-used."""
+        key = (level, ty, tx)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+        size = self.tile_size
+        data = self.level_data(level)[ty * size:(ty + 1) * size, tx * size:(tx + 1) * size]
+        low, high = self.limits
+        index = np.clip((np.nan_to_num(np.asarray(data, dtype=np.float32), nan=low) - low) * (255.0 / (high - low)),
+                        0, 255).astype(np.uint8)
+        rgb = self.colormap[index]
+        self._tiles[key] = rgb
+        if len(self._tiles) > self._cache_tiles:
+            self._tiles.popitem(last=False)
+        return rgb
+
+    def level_for_scale(self, scale):
+        """Coarsest level with at least one source pixel per screen pixel."""
+        level = int(np.floor(np.log2(1.0 / scale))) if scale < 1 else 0
+        return int(np.clip(level, 0, len(self.levels) - 1))
+
+    def render_view(self, x0, y0, scale, width, height, background=(0, 0, 0)):
+        """Compose the viewport starting at level-0 pixel (x0, y0), shown at
+        `scale` screen pixels per level-0 pixel, into a (height, width, 3) buffer."""
+        level = self.level_for_scale(scale)
+        factor = 2 ** level
+        level_scale = scale * factor
+        rows, cols = self.level_data(level).shape[:2]
+        size = self.tile_size
+
+        # Source pixel of every screen row/column (nearest neighbour)
+        src_y = np.floor(y0 / factor + (np.arange(height) + 0.5) / level_scale).astype(int)
+        src_x = np.floor(x0 / factor + (np.arange(width) + 0.5) / level_scale).astype(int)
+        valid_y = (src_y >= 0) & (src_y < rows)
+        valid_x = (src_x >= 0) & (src_x < cols)
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        out[:] = background
+        if not valid_y.any() or not valid_x.any():
+            return out
+
+        ty_range = range(src_y[valid_y].min() // size, src_y[valid_y].max() // size + 1)
+        tx_range = range(src_x[valid_x].min() // size, src_x[valid_x].max() // size + 1)
+        for ty in ty_range:
+            screen_rows = np.nonzero(valid_y & (src_y // size == ty))[0]
+            for tx in tx_range:
+                screen_cols = np.nonzero(valid_x & (src_x // size == tx))[0]
+                tile = self.tile(level, ty, tx)
+                out[np.ix_(screen_rows, screen_cols)] = tile[np.ix_(src_y[screen_rows] - ty * size,
+                                                                    src_x[screen_cols] - tx * size)]
+        return out
+
+
+# Raw TIFF pixel layouts that can be memory-mapped directly
+_TIFF_DTYPES = {'L': '|u1', 'I;16': '<u2', 'I;16L': '<u2', 'I;16B': '>u2', 'I;16N': '=u2',
+                'F;32F': '<f4', 'F;32BF': '>f4'}
+
+
+def open_image_memmap(path, shape=None, dtype='|u1'):
+    """Memory-map the pixels of a .npy, raw or uncompressed grayscale TIFF.
+
+    Other images (compressed or colour TIFF, PNG, ...) are decoded into a
+    grayscale array. Raw files are square unless `shape` is given.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.npy':
+        return np.load(path, mmap_mode='r')
+    if ext in ('.raw', '.bin', '.dat'):
+        data = np.memmap(path, dtype=dtype, mode='r')
+        if shape is None:
+            side = int(round(np.sqrt(data.size)))
+            if side * side != data.size:
+                raise ValueError(f"{path}: raw image is not square; pass shape=(rows, cols)")
+            shape = (side, side)
+        return data.reshape(shape)
+
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None  # Wafer mosaics are legitimately huge
+    try:
+        with Image.open(path) as im:
+            tiles = im.tile
+            width, height = im.size
+            if tiles and all(t[0] == 'raw' and t[3][0] in _TIFF_DTYPES for t in tiles):
+                raw_dtype = np.dtype(_TIFF_DTYPES[tiles[0][3][0]])
+                row_bytes = width * raw_dtype.itemsize
+                # Strips must follow each other with no gaps to map as one array
+                contiguous = all(t[1][0] == 0 and t[1][2] == width and
+                                 t[2] == tiles[0][2] + t[1][1] * row_bytes for t in tiles)
+                if contiguous:
+                    return np.memmap(path, dtype=raw_dtype, mode='r', offset=tiles[0][2], shape=(height, width))
+            if im.mode not in ('L', 'I;16', 'I', 'F'):
+                im = im.convert('L')
+            return np.asarray(im)
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+class DiskPyramid(ImagePyramid):
+    """Image pyramid whose reduced levels are cached on disk as .npy files.
+
+    Level 0 stays the (memory-mapped) source image. The other levels are
+    built on a background thread, streaming bands of rows so that memory
+    use does not depend on image size, and are reused on later opens. Until
+    the level a view needs is ready, the view samples the finest ready level
+    directly, reading only the pixels it shows.
+    """
+
+    def __init__(self, data, cache_dir, tile_size=256, colormap=GRAY, limits=None,
+                 cache_tiles=512, band_rows=1024):
+        self.tile_size = tile_size
+        self.colormap = colormap
+        self.cache_dir = cache_dir
+        self.band_rows = band_rows
+        self._tiles = OrderedDict()
+        self._cache_tiles = cache_tiles
+        self._lock = threading.Lock()
+
+        shapes = [data.shape[:2]]
+        while max(shapes[-1]) > tile_size:
+            rows, cols = shapes[-1]
+            shapes.append(((rows + 1) // 2, (cols + 1) // 2))
+        self.level_shapes = shapes
+        self.levels = [data] + [None] * (len(shapes) - 1)
+        self.dtype = data.dtype if data.dtype.kind == 'f' else np.dtype(data.dtype.newbyteorder('='))
+        os.makedirs(cache_dir, exist_ok=True)
+        for level in range(1, len(shapes)):
+            path = self._level_path(level)
+            if os.path.exists(path + ".done"):
+                self.levels[level] = np.load(path, mmap_mode='r')
+
+        if limits is None:
+            if data.dtype == np.uint8:
+                limits = (0, 255)
+            else:
+                # Percentiles of a strided sample of the source
+                step = max(1, int(np.sqrt(data.shape[0] * data.shape[1] / 250_000)))
+                sample = np.asarray(data[::step, ::step], dtype=float)
+                limits = np.percentile(sample[np.isfinite(sample)], [0.5, 99.5])
+        self.limits = (float(limits[0]), float(limits[1]) if limits[1] > limits[0] else float(limits[0]) + 1)
+        self.thread = None
+
+    def _level_path(self, level):
+        return os.path.join(self.cache_dir, f"level{level}.npy")
+
+    @property
+    def ready_levels(self):
+        """Number of consecutive levels, from level 0, that can be read."""
+        count = 0
+        while count < len(self.levels) and self.levels[count] is not None:
+            count += 1
+        return count
+
+    @property
+    def complete(self):
+        return self.ready_levels == len(self.levels)
+
+    def build(self):
+        """Start building the missing levels on a daemon thread."""
+        if not self.complete and self.thread is None:
+            self.thread = threading.Thread(target=self._build_levels, daemon=True)
+            self.thread.start()
+        return self.thread
+
+    def _build_levels(self):
+        for level in range(self.ready_levels, len(self.levels)):
+            source = self.levels[level - 1]
+            path = self._level_path(level)
+            target = np.lib.format.open_memmap(path, mode='w+', dtype=self.dtype,
+                                               shape=self.level_shapes[level])
+            band = self.band_rows - self.band_rows % 2
+            for start in range(0, source.shape[0], band):
+                reduced = downsample(np.asarray(source[start:start + band]))
+                if self.dtype.kind != 'f':
+                    reduced = np.rint(reduced)
+                target[start // 2:start // 2 + len(reduced)] = reduced
+            target.flush()
+            del target
+            open(path + ".done", 'w').close()
+            with self._lock:
+                self.levels[level] = np.load(path, mmap_mode='r')
+
+    def level_data(self, level):
+        return self.levels[level]
+
+    def render_view(self, x0, y0, scale, width, height, background=(0, 0, 0)):
+        wanted = self.level_for_scale(scale)
+        ready = self.ready_levels
+        if wanted < ready:
+            return super().render_view(x0, y0, scale, width, height, background)
+
+        # Level not built yet: nearest-neighbour sample of the finest ready level
+        level = ready - 1
+        factor = 2 ** level
+        data = self.levels[level]
+        rows, cols = data.shape[:2]
+        src_y = np.floor((y0 + (np.arange(height) + 0.5) / scale) / factor).astype(int)
+        src_x = np.floor((x0 + (np.arange(width) + 0.5) / scale) / factor).astype(int)
+        valid_y = np.nonzero((src_y >= 0) & (src_y < rows))[0]
+        valid_x = np.nonzero((src_x >= 0) & (src_x < cols))[0]
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        out[:] = background
+        if len(valid_y) and len(valid_x):
+            sample = np.asarray(data[src_y[valid_y]][:, src_x[valid_x]], dtype=np.float32)
+            low, high = self.limits
+            index = np.clip((np.nan_to_num(sample, nan=low) - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+            out[np.ix_(valid_y, valid_x)] = self.colormap[index]
+        return out
+
+
+def pyramid_cache_dir(path, root=None):
+    """Cache directory for the pyramid of an image file (path, size and mtime)."""
+    root = root or os.path.join(CACHE_ROOT, "pyramids")
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return os.path.join(root, hashlib.sha256(key.encode()).hexdigest()[:24])
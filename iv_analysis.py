@@ -0,0 +1,197 @@
+"""Batch I-V analysis: diode fits with series resistance and SCLC regimes.
+
+Fits I = Is (exp((V - I Rs) / n Vt) - 1) in its closed Lambert W form,
+    I = (n Vt / Rs) W((Is Rs / n Vt) exp((V + Is Rs) / n Vt)) - Is,
+to every sweep of a batch at once, so a whole wafer map of devices is one
+set of array operations.
+"""
+import os
+
+import numpy as np
+from scipy.special import wrightomega
+
+import measurement_io
+
+BOLTZMANN = 1.380649e-23
+CHARGE = 1.602176634e-19
+
+# Local log-log slope bands of the space-charge limited current regimes
+REGIMES = ("Ohmic", "Child's law", "Trap-filled limit")
+REGIME_SLOPES = (1.5, 2.5)
+
+
+def thermal_voltage(T=300.0):
+    return BOLTZMANN * T / CHARGE
+
+
+def diode_current(V, Is, n, Rs, T=300.0):
+    """Diode current with series resistance via the Lambert W function.
+
+    W(exp(x)) is evaluated as the Wright omega function so large forward
+    biases do not overflow.
+    """
+    nvt = n * thermal_voltage(T)
+    x = np.log(Is * Rs / nvt) + (V + Is * Rs) / nvt
+    return nvt / Rs * wrightomega(x) - Is
+
+
+def load_sweeps(path):
+    """Read I-V sweeps from a CSV, text or binary measurement file.
+
+    The last two numeric columns are voltage and current. Files without a
+    device column make one sweep named after the file; otherwise each sweep
+    is named "file:device" (with "#k" for a device's later sweeps).
+    """
+    base = os.path.splitext(os.path.basename(path))[0]
+    measurement = measurement_io.open_measurement(path)
+    if len(measurement.columns) < 2:
+        return []
+    v_name, i_name = measurement.columns[-2:]
+    sweeps = []
+    for device, spans in measurement.index.items():
+        for number in range(len(spans)):
+            sweep = measurement.sweep(device, number)
+            name = f"{base}:{device}" if device else base
+            name = f"{name}#{number + 1}" if number else name
+            v, i = np.asarray(sweep[v_name]), np.asarray(sweep[i_name])
+            keep = np.isfinite(v) & np.isfinite(i)
+            sweeps.append((name, v[keep], i[keep]))
+    return sweeps
+
+
+def stack_sweeps(sweeps):
+    """Pad sweeps of different lengths into (devices, points) arrays with NaN."""
+    length = max(len(v) for _, v, _ in sweeps)
+    V = np.full((len(sweeps), length), np.nan)
+    I = np.full((len(sweeps), length), np.nan)
+    for row, (_, v, i) in enumerate(sweeps):
+        V[row, :len(v)] = v
+        I[row, :len(i)] = i
+    return [name for name, _, _ in sweeps], V, I
+
+
+def _batched_lstsq(A, b, ridge=1e-12):
+    ATA = np.einsum('bmi,bmj->bij', A, A)
+    ATb = np.einsum('bmi,bm->bi', A, b)
+    ATA += ridge * np.eye(A.shape[-1]) * np.trace(ATA, axis1=1, axis2=2)[:, None, None]
+    return np.linalg.solve(ATA, ATb[..., None])[..., 0]
+
+
+def fit_diode(V, I, T=300.0, iterations=40):
+    """Fit Is, n and Rs to each row of V, I (NaN entries are ignored).
+
+    The start point comes from the linear least squares fit of
+    V = Rs I + n Vt ln I - n Vt ln Is, then a batched Levenberg-Marquardt
+    refines all curves together on the log-current residual of the Lambert W
+    model. Only forward-bias points with positive current are used.
+    """
+    V = np.atleast_2d(np.asarray(V, dtype=float))
+    I = np.atleast_2d(np.asarray(I, dtype=float))
+    vt = thermal_voltage(T)
+    use = np.isfinite(V) & np.isfinite(I) & (V > 0) & (I > 0)
+    weight = use.astype(float)
+    Vu = np.where(use, V, 0.0)
+    lnI = np.log(np.where(use, I, 1.0))
+
+    A = np.stack([np.where(use, I, 0.0), lnI * weight, weight], axis=-1)
+    coef = _batched_lstsq(A, Vu)
+    nvt = np.clip(coef[:, 1], 0.5 * vt, 10 * vt)
+    Rs = np.clip(coef[:, 0], 1e-3, None)
+    lnIs = np.clip(-coef[:, 2] / nvt, -80.0, 0.0)
+    params = np.stack([lnIs, nvt / vt, np.log(Rs)], axis=1)
+
+    def residual(p):
+        model = diode_current(Vu, np.exp(p[:, :1]), p[:, 1:2], np.exp(p[:, 2:3]), T)
+        return np.where(use, np.log(np.maximum(model, 1e-300)) - lnI, 0.0)
+
+    def clamp(p):
+        return np.stack([np.clip(p[:, 0], -80.0, 0.0), np.clip(p[:, 1], 0.5, 10.0),
+                         np.clip(p[:, 2], -7.0, 15.0)], axis=1)
+
+    r = residual(params)
+    cost = (r ** 2).sum(axis=1)
+    damping = np.full(len(params), 1e-2)
+    steps = np.eye(3) * 1e-6
+    for _ in range(iterations):
+        J = np.stack([(residual(params + h) - r) / 1e-6 for h in steps], axis=-1)
+        JTJ = np.einsum('bmi,bmj->bij', J, J)
+        g = np.einsum('bmi,bm->bi', J, r)
+        diag = np.einsum('bii->bi', JTJ) + 1e-12
+        lhs = JTJ + damping[:, None, None] * diag[:, :, None] * np.eye(3)
+        trial = clamp(params - np.linalg.solve(lhs, g[..., None])[..., 0])
+        r_trial = residual(trial)
+        cost_trial = (r_trial ** 2).sum(axis=1)
+        better = cost_trial < cost
+        params = np.where(better[:, None], trial, params)
+        r = np.where(better[:, None], r_trial, r)
+        cost = np.where(better, cost_trial, cost)
+        damping = np.where(better, damping / 3, damping * 3).clip(1e-9, 1e9)
+
+    points = np.maximum(weight.sum(axis=1), 1)
+    return {
+        "Is": np.exp(params[:, 0]),
+        "n": params[:, 1],
+        "Rs": np.exp(params[:, 2]),
+        "rms_log_error": np.sqrt(cost / points),
+        "points": weight.sum(axis=1).astype(int),
+    }
+
+
+def local_ideality(V, I, T=300.0):
+    """n = (q/kT)(dV/dlnI) between consecutive points of each sweep."""
+    V = np.atleast_2d(V)
+    lnI = np.log(np.abs(np.atleast_2d(I)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(V, axis=1) / np.diff(lnI, axis=1) / thermal_voltage(T)
+
+
+def sclc_regimes(V, I, smooth=3):
+    """Label each interval of each sweep with its SCLC regime index.
+
+    The local slope m = dlnI/dlnV (moving-average smoothed) separates Ohmic
+    (m ~ 1), Child's law (m ~ 2) and trap-filled limit (m >> 2) conduction.
+    Returns (slopes, labels) with -1 labels where the slope is undefined.
+    """
+    V = np.abs(np.atleast_2d(V))
+    I = np.abs(np.atleast_2d(I))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes = np.diff(np.log(I), axis=1) / np.diff(np.log(V), axis=1)
+    if smooth > 1:
+        valid = np.isfinite(slopes)
+        kernel = np.ones(smooth)
+        total = np.apply_along_axis(np.convolve, 1, np.where(valid, slopes, 0.0), kernel, 'same')
+        count = np.apply_along_axis(np.convolve, 1, valid.astype(float), kernel, 'same')
+        with np.errstate(invalid='ignore'):
+            slopes = np.where(valid, total / count, np.nan)
+    labels = np.where(np.isfinite(slopes), np.digitize(np.nan_to_num(slopes), REGIME_SLOPES), -1)
+    return slopes, labels
+
+
+def regime_segments(V, labels, min_points=3):
+    """Contiguous regime runs of one sweep as (regime, V start, V end)."""
+    segments = []
+    start = 0
+    for k in range(1, len(labels) + 1):
+        if k == len(labels) or labels[k] != labels[start]:
+            if labels[start] >= 0 and k - start >= min_points:
+                segments.append((REGIMES[labels[start]], V[start], V[k]))
+            start = k
+    return segments
+
+
+def analyze(sweeps, T=300.0):
+    """Fit and classify a list of (name, V, I) sweeps; one result dict each."""
+    names, V, I = stack_sweeps(sweeps)
+    fit = fit_diode(V, I, T)
+    _, labels = sclc_regimes(V, I)
+    results = []
+    for row, name in enumerate(names):
+        results.append({
+            "device": name,
+            "Is": fit["Is"][row],
+            "n": fit["n"][row],
+            "Rs": fit["Rs"][row],
+            "rms_log_error": fit["rms_log_error"][row],
+            "regimes": regime_segments(V[row], labels[row]),
+        })
+    return results
@@ -0,0 +1,173 @@
+"""Layout polygons: test patterns and rasterization.
+
+A layout is a list of (layer, points) with points an (N, 2) float array of
+polygon vertices in um. Rasterization samples pixel centres, so a pixel
+belongs to a polygon when its centre lies inside (even-odd rule).
+"""
+import numpy as np
+
+
+def rectangle(x0, y0, x1, y1, layer=0):
+    return layer, np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=float)
+
+
+def bounds(polygons):
+    """(xmin, ymin, xmax, ymax) of a list of polygons."""
+    lows = np.array([points.min(axis=0) for _, points in polygons])
+    highs = np.array([points.max(axis=0) for _, points in polygons])
+    return (*lows.min(axis=0), *highs.max(axis=0))
+
+
+def _grating(pitch=0.2, width=0.1, length=20.0, count=50):
+    return [rectangle(k * pitch, 0, k * pitch + width, length) for k in range(count)]
+
+
+def _dots(pitch=0.5, diameter=0.2, count=40):
+    angles = np.linspace(0, 2 * np.pi, 17)[:-1]
+    circle = np.column_stack([np.cos(angles), np.sin(angles)]) * diameter / 2
+    return [(0, circle + [i * pitch, j * pitch]) for i in range(count) for j in range(count)]
+
+
+def _pad_and_lines():
+    # Classic proximity test: a large pad beside isolated and dense lines
+    shapes = [rectangle(0, 0, 40, 40)]
+    shapes += [rectangle(41 + k * 0.4, 0, 41.2 + k * 0.4, 40) for k in range(25)]
+    shapes += [rectangle(60 + k * 4, 0, 60.2 + k * 4, 40) for k in range(5)]
+    return shapes
+
+
+def _fan_out(count=24):
+    shapes = []
+    for k in range(count):
+        x = k * 2.0
+        shapes.append((0, np.array([[x, 0], [x + 0.5, 0], [x * 0.2 + 20.5, 30], [x * 0.2 + 20, 30]])))
+    shapes.append(rectangle(15, 30, 35, 50))
+    return shapes
+
+
+TEST_PATTERNS = {
+    "Line/space grating": _grating,
+    "Dot array": _dots,
+    "Pad with lines": _pad_and_lines,
+    "Fan-out": _fan_out,
+}
+
+
+def test_pattern(name):
+    return TEST_PATTERNS[name]()
+
+
+def repeat(polygons, columns, rows, pitch_x, pitch_y):
+    """Yield a pattern stepped over a columns x rows array, one polygon at a time.
+
+    Large arrays are generated lazily, so consumers that stream polygons
+    never hold the whole layout in memory.
+    """
+    for i in range(columns):
+        for j in range(rows):
+            offset = np.array([i * pitch_x, j * pitch_y])
+            for layer, points in polygons:
+                yield layer, points + offset
+
+
+def polygon_spans(points, origin, pixel, shape):
+    """Row indices and [start, stop) column spans of the pixels inside a polygon."""
+    x = (points[:, 0] - origin[0]) / pixel - 0.5
+    y = (points[:, 1] - origin[1]) / pixel - 0.5
+    row0 = max(int(np.ceil(y.min())), 0)
+    row1 = min(int(np.floor(y.max())), shape[0] - 1)
+    if row1 < row0:
+        return None
+    rows = np.arange(row0, row1 + 1, dtype=float)[:, None]
+    x0, y0 = x, y
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    crosses = (y0 <= rows) != (y1 <= rows)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xs = np.where(crosses, x0 + (rows - y0) * (x1 - x0) / (y1 - y0), np.inf)
+    xs = np.sort(xs, axis=1)
+    pairs = crosses.sum(axis=1).max() // 2
+    starts = np.clip(np.ceil(xs[:, 0:2 * pairs:2]), 0, shape[1]).astype(int)
+    stops = np.clip(np.ceil(xs[:, 1:2 * pairs:2]), 0, shape[1])
+    stops = np.where(np.isfinite(xs[:, 1:2 * pairs:2]), stops, 0).astype(int)
+    row_index = np.broadcast_to(rows.astype(int), starts.shape)
+    keep = stops > starts
+    return row_index[keep], starts[keep], stops[keep]
+
+
+def polygon_spans_batch(points, origin, pixel, shape, max_rows=1 << 18):
+    """polygon_spans of k polygons with n vertices each, points (k, n, 2),
+    concatenated over all of them. Every row of every polygon is intersected
+    with all n edges at once, about `max_rows` polygon rows at a time."""
+    x = (points[..., 0] - origin[0]) / pixel - 0.5
+    y = (points[..., 1] - origin[1]) / pixel - 0.5
+    row0 = np.maximum(np.ceil(y.min(axis=1)), 0).astype(np.int64)
+    row1 = np.minimum(np.floor(y.max(axis=1)), shape[0] - 1).astype(np.int64)
+    counts = np.maximum(row1 - row0 + 1, 0)
+    ends = np.cumsum(counts)
+    pieces = []
+    first = 0
+    while first < len(points):
+        last = max(int(np.searchsorted(ends, ends[first] - counts[first] + max_rows, side='right')), first + 1)
+        chunk = slice(first, last)
+        owner = np.repeat(np.arange(last - first), counts[chunk])
+        starts_at = np.cumsum(counts[chunk]) - counts[chunk]
+        rows = np.arange(len(owner)) - starts_at[owner] + row0[chunk][owner]
+        x0, y0 = x[chunk][owner], y[chunk][owner]
+        x1, y1 = np.roll(x0, -1, axis=1), np.roll(y0, -1, axis=1)
+        level = rows.astype(float)[:, None]
+        crosses = (y0 <= level) != (y1 <= level)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xs = np.sort(np.where(crosses, x0 + (level - y0) * (x1 - x0) / (y1 - y0), np.inf), axis=1)
+        pairs = points.shape[1] // 2
+        starts = np.clip(np.ceil(xs[:, 0:2 * pairs:2]), 0, shape[1]).astype(int)
+        stops = np.clip(np.ceil(xs[:, 1:2 * pairs:2]), 0, shape[1])
+        stops = np.where(np.isfinite(xs[:, 1:2 * pairs:2]), stops, 0).astype(int)
+        keep = stops > starts
+        pieces.append((np.broadcast_to(rows[:, None], starts.shape)[keep], starts[keep], stops[keep]))
+        first = last
+    if not pieces:
+        return np.empty(0, int), np.empty(0, int), np.empty(0, int)
+    return tuple(np.concatenate(parts) for parts in zip(*pieces))
+
+
+def rasterize(polygons, origin, pixel, shape, values=None, dtype=np.float32):
+    """Paint polygons into a (rows, cols) raster with pixel size `pixel` um.
+
+    Row r, column c covers the pixel whose lower-left corner is at
+    origin + (c, r) * pixel. Each polygon is painted with its entry of
+    `values` (1 by default); later polygons overwrite earlier ones.
+    Axis-aligned rectangles are filled with one slice assignment, other
+    polygons by vectorized scanline spans.
+    """
+    raster = np.zeros(shape, dtype=dtype)
+    for k, (_, points) in enumerate(polygons):
+        value = 1 if values is None else values[k]
+        if is_rectangle(points):
+            c0, r0 = np.ceil((points.min(axis=0) - origin) / pixel - 0.5).astype(int)
+            c1, r1 = np.ceil((points.max(axis=0) - origin) / pixel - 0.5).astype(int)
+            raster[max(r0, 0):max(r1, 0), max(c0, 0):max(c1, 0)] = value
+            continue
+        spans = polygon_spans(points, origin, pixel, shape)
+        if spans is None:
+            continue
+        rows, starts, stops = spans
+        if not len(rows):
+            continue
+        row0, col0 = rows.min(), starts.min()
+        # Fill spans through a running sum of +1/-1 span markers
+        marks = np.zeros((rows.max() + 1 - row0, stops.max() + 1 - col0), dtype=np.int32)
+        np.add.at(marks, (rows - row0, starts - col0), 1)
+        np.add.at(marks, (rows - row0, stops - col0), -1)
+        inside = np.cumsum(marks, axis=1)[:, :-1] > 0
+        raster[row0:row0 + len(marks), col0:col0 + inside.shape[1]][inside] = value
+    return raster
+
+
+def is_rectangle(points):
+    """True for a four-vertex polygon with axis-aligned edges."""
+    if len(points) != 4:
+        return False
+    x = points[:, 0]
+    y = points[:, 1]
+    return ((x[0] == x[1] and y[1] == y[2] and x[2] == x[3] and y[3] == y[0]) or
+            (y[0] == y[1] and x[1] == x[2] and y[2] == y[3] and x[3] == x[0]))
@@ -0,0 +1,169 @@
+"""Discrete-event simulation of a lithography cell.
+
+Wafers are released in lots and flow through the process steps in order.
+Each step is a group of identical tools; a tool processes `batch` wafers at
+once (wet benches and ovens) or one at a time (track modules, scanner).
+Wafers wait first-come first-served at every step. Batch tools start when a
+full batch is waiting, or with whatever is left once no more wafers can
+arrive. Only tool completions and lot releases are events on the heap:
+finished wafers join the next queue directly, so a run costs about one heap
+operation per wafer per step.
+"""
+import heapq
+from collections import deque
+
+import numpy as np
+
+# Step recipes of the process page (steps 1-8), times in seconds, with a
+# tool set sized so the scanner is the constraint
+LITHO_FLOW = [
+    {"name": "Clean (RCA)", "time_s": (10 + 3 + 10 + 5 + 1) * 60, "tools": 2, "batch": 50},
+    {"name": "HMDS prime", "time_s": 60 + 30 + 45 + 20, "tools": 1, "batch": 50},
+    {"name": "Coat", "time_s": 3 + 30, "tools": 2, "batch": 1},
+    {"name": "Soft bake", "time_s": 30 + 60 + 45, "tools": 6, "batch": 1},
+    {"name": "Exposure", "time_s": 24, "tools": 1, "batch": 1},
+    {"name": "PEB", "time_s": 15 + 60 + 20, "tools": 5, "batch": 1},
+    {"name": "Develop", "time_s": 60, "tools": 3, "batch": 1},
+    {"name": "Hard bake", "time_s": (5 + 30 + 10) * 60, "tools": 2, "batch": 150},
+]
+
+# Seconds per wafer at the exposure step, from the technique throughputs
+EXPOSURE_TOOLS = {
+    "Optical scanner (150 wph)": 3600 / 150,
+    "UV aligner (75 wph)": 3600 / 75,
+    "Nanoimprint (20 wph)": 3600 / 20,
+}
+
+
+def flow(exposure="Optical scanner (150 wph)", tools=None):
+    """The process flow with the given exposure tool and optional {step: tool count} overrides."""
+    steps = [dict(step) for step in LITHO_FLOW]
+    for step in steps:
+        if step["name"] == "Exposure":
+            step["time_s"] = EXPOSURE_TOOLS[exposure]
+        if tools and step["name"] in tools:
+            step["tools"] = int(tools[step["name"]])
+    return steps
+
+
+def capacity(step):
+    """Wafers per hour a step can sustain with every tool busy."""
+    return step["tools"] * step["batch"] * 3600 / step["time_s"]
+
+
+def simulate(steps, wafers=10000, start_rate=None, lot_size=25, max_wip=None, variability=0.0, seed=0):
+    """Run `wafers` wafers through `steps`.
+
+    Lots of `lot_size` are released every lot_size / start_rate hours
+    (all at once when start_rate is None). With `max_wip` a lot is held
+    back until it fits under the WIP cap. Process times are gamma
+    distributed with coefficient of variation `variability`.
+
+    Returns a dict with throughput (wafers/hour), cycle time, WIP and
+    per-step utilization, queueing and capacity; `bottleneck` is the most
+    utilized step.
+    """
+    if max_wip is not None and max_wip < max([lot_size] + [step["batch"] for step in steps]):
+        raise ValueError("max_wip must hold at least one lot and one full batch")
+    count = len(steps)
+    rng = np.random.default_rng(seed)
+    times = []
+    for step in steps:
+        # One draw per possible start: full batches plus a final partial one per tool
+        starts = -(-wafers // step["batch"]) + step["tools"]
+        if variability > 0:
+            shape = 1 / variability ** 2
+            times.append(rng.gamma(shape, step["time_s"] / shape, starts).tolist())
+        else:
+            times.append([float(step["time_s"])] * starts)
+    batch = [step["batch"] for step in steps]
+    free = [step["tools"] for step in steps]
+    queues = [deque() for _ in steps]
+    arrived = [0] * count
+    started = [0] * count
+    busy = [0.0] * count
+    waited = [0.0] * count
+    released = np.zeros(wafers)
+    finished = np.zeros(wafers)
+    interval = 0.0 if not start_rate else lot_size / start_rate * 3600
+
+    heap = []
+    sequence = 0
+    state = {"next": 0, "wip": 0, "max_wip": 0, "held": False}
+
+    def start_ready(k, now):
+        nonlocal sequence
+        queue = queues[k]
+        while free[k] and queue and (len(queue) >= batch[k] or arrived[k] == wafers):
+            size = min(batch[k], len(queue))
+            lot = []
+            wait = 0.0
+            for _ in range(size):
+                wafer, since = queue.popleft()
+                lot.append(wafer)
+                wait += now - since
+            waited[k] += wait
+            duration = times[k][started[k]]
+            started[k] += 1
+            busy[k] += duration
+            free[k] -= 1
+            sequence += 1
+            heapq.heappush(heap, (now + duration, sequence, k, lot))
+
+    def release(now):
+        nonlocal sequence
+        first = state["next"]
+        size = min(lot_size, wafers - first)
+        if max_wip is not None and state["wip"] + size > max_wip and state["wip"] > 0:
+            state["held"] = True
+            return
+        state["held"] = False
+        state["next"] = first + size
+        state["wip"] += size
+        state["max_wip"] = max(state["max_wip"], state["wip"])
+        released[first:first + size] = now
+        queues[0].extend((wafer, now) for wafer in range(first, first + size))
+        arrived[0] += size
+        start_ready(0, now)
+        if state["next"] < wafers:
+            sequence += 1
+            heapq.heappush(heap, (now + interval, sequence, -1, None))
+
+    release(0.0)
+    last = count - 1
+    now = 0.0
+    while heap:
+        now, _, k, lot = heapq.heappop(heap)
+        if k < 0:
+            release(now)
+            continue
+        free[k] += 1
+        if k < last:
+            queues[k + 1].extend((wafer, now) for wafer in lot)
+            arrived[k + 1] += len(lot)
+            start_ready(k + 1, now)
+        else:
+            finished[lot] = now
+            state["wip"] -= len(lot)
+            if state["held"]:
+                release(now)
+        start_ready(k, now)
+
+    makespan = max(now, 1e-9)
+    cycle = finished - released
+    # Steady state: skip the first and last tenth of the completions
+    done = np.sort(finished)
+    lo, hi = done[wafers // 10], done[-1 - wafers // 10]
+    steady = (wafers - 2 * (wafers // 10) - 1) / (hi - lo) * 3600 if hi > lo else wafers / makespan * 3600
+    per_step = [{"name": step["name"], "tools": step["tools"], "batch": step["batch"], "time_s": step["time_s"],
+                 "capacity_wph": capacity(step), "utilization": busy[k] / (step["tools"] * makespan),
+                 "mean_wait_min": waited[k] / wafers / 60, "mean_queue": waited[k] / makespan}
+                for k, step in enumerate(steps)]
+    grid = np.linspace(0, makespan, 200)
+    return {"wafers": wafers, "makespan_h": makespan / 3600, "wph": wafers / makespan * 3600,
+            "steady_wph": steady, "cycle_time_min": cycle.mean() / 60,
+            "cycle_time_p90_min": np.percentile(cycle, 90) / 60,
+            "mean_wip": cycle.sum() / makespan, "max_wip": state["max_wip"],
+            "wip_trace": (grid / 3600, np.searchsorted(np.sort(released), grid, side='right')
+                          - np.searchsorted(done, grid, side='right')),
+            "steps": per_step, "bottleneck": max(per_step, key=lambda s: s["utilization"])["name"]}
@@ -0,0 +1,273 @@
+"""Viewport rendering of large flattened layouts.
+
+Flattened polygons are held in flat arrays (vertices in database units,
+per-polygon vertex offsets, layer, bounding box and area) and indexed by a
+packed R-tree over their bounding boxes, so a redraw only visits the shapes
+that overlap the viewport. Shapes spanning fewer than a few screen pixels
+are not outlined; their area is accumulated into a per-layer density raster
+instead. Every layer is painted into one RGB buffer.
+"""
+import numpy as np
+
+import gdsii
+import layout
+
+# Layer fill colours, cycled through in layer number order
+LAYER_COLOURS = np.array([(80, 160, 255), (255, 110, 80), (90, 220, 120), (240, 200, 60),
+                          (200, 110, 230), (80, 220, 220), (255, 150, 190), (180, 180, 180)], dtype=np.float32)
+
+
+class PackedRTree:
+    """Static R-tree over bounding boxes, bulk-loaded by sort-tile-recursive packing.
+
+    Leaves are sorted into vertical slices by x and by y inside each slice.
+    Every level above groups `node_size` consecutive nodes, so the children
+    of node k are nodes k * node_size ... (k + 1) * node_size - 1 below it.
+    """
+
+    def __init__(self, boxes, node_size=16):
+        self.node_size = node_size
+        count = len(boxes)
+        cx = boxes[:, 0].astype(float) + boxes[:, 2]
+        cy = boxes[:, 1].astype(float) + boxes[:, 3]
+        leaves = -(-count // node_size)
+        per_slice = int(np.ceil(np.sqrt(max(leaves, 1)))) * node_size
+        by_x = np.argsort(cx, kind='stable')
+        self.order = by_x[np.lexsort((cy[by_x], np.arange(count) // per_slice))]
+        level = boxes[self.order]
+        self.levels = [level]
+        while len(level) > 1:
+            starts = np.arange(0, len(level), node_size)
+            level = np.column_stack([np.minimum.reduceat(level[:, 0], starts), np.minimum.reduceat(level[:, 1], starts),
+                                     np.maximum.reduceat(level[:, 2], starts), np.maximum.reduceat(level[:, 3], starts)])
+            self.levels.append(level)
+
+    def query(self, x0, y0, x1, y1):
+        """Indices of the boxes that overlap the window."""
+        candidates = np.arange(len(self.levels[-1]))
+        for depth in range(len(self.levels) - 1, 0, -1):
+            boxes = self.levels[depth][candidates]
+            hit = candidates[(boxes[:, 0] <= x1) & (boxes[:, 2] >= x0) & (boxes[:, 1] <= y1) & (boxes[:, 3] >= y0)]
+            below = len(self.levels[depth - 1])
+            starts = hit * self.node_size
+            counts = np.minimum(starts + self.node_size, below) - starts
+            candidates = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        boxes = self.levels[0][candidates]
+        return self.order[candidates[(boxes[:, 0] <= x1) & (boxes[:, 2] >= x0) &
+                                     (boxes[:, 1] <= y1) & (boxes[:, 3] >= y0)]]
+
+
+def _halve(density):
+    """2x2 block mean over the last two axes (odd edges padded with zeros)."""
+    rows, cols = density.shape[-2:]
+    padded = np.zeros(density.shape[:-2] + (rows + rows % 2, cols + cols % 2), dtype=density.dtype)
+    padded[..., :rows, :cols] = density
+    return 0.25 * (padded[..., 0::2, 0::2] + padded[..., 1::2, 0::2] + padded[..., 0::2, 1::2] + padded[..., 1::2, 1::2])
+
+
+class MaskLayout:
+    """Flattened layout in flat arrays with R-trees over the polygon bounding boxes.
+
+    Built from (layer, placements) batches as produced by
+    gdsii.Library.flatten_batches, in database units of `unit` um. Shapes
+    smaller than one cell of an `overview` x `overview` grid over the layout
+    are also binned into a per-layer density pyramid, which stands in for
+    them whenever a screen pixel is at least half a cell across; larger shapes
+    have their own tree so zoomed-out views never visit the small ones.
+    """
+
+    def __init__(self, batches, unit, overview=1024):
+        self.unit = unit
+        vertices, counts, layers, boxes, areas, rectangles = [], [], [], [], [], []
+        for layer, placed in batches:
+            k, n = placed.shape[:2]
+            points = np.rint(placed).astype(np.int32)
+            vertices.append(points.reshape(-1, 2))
+            counts.append(np.full(k, n, dtype=np.int64))
+            layers.append(np.full(k, layer, dtype=np.int16))
+            boxes.append(np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1))
+            x, y = points[..., 0].astype(float), points[..., 1].astype(float)
+            areas.append(np.abs((x * np.roll(y, -1, axis=1) - y * np.roll(x, -1, axis=1)).sum(axis=1)) / 2)
+            if n == 4:
+                px, py = points[..., 0], points[..., 1]
+                rectangles.append(((px[:, 0] == px[:, 1]) & (py[:, 1] == py[:, 2]) & (px[:, 2] == px[:, 3])
+                                   & (py[:, 3] == py[:, 0])) |
+                                  ((py[:, 0] == py[:, 1]) & (px[:, 1] == px[:, 2]) & (py[:, 2] == py[:, 3])
+                                   & (px[:, 3] == px[:, 0])))
+            else:
+                rectangles.append(np.zeros(k, dtype=bool))
+        if not vertices:
+            raise ValueError("Layout contains no polygons")
+        self.vertices = np.concatenate(vertices)
+        self.offsets = np.concatenate([[0], np.cumsum(np.concatenate(counts))])
+        self.layers = np.concatenate(layers)
+        self.boxes = np.concatenate(boxes)
+        self.areas = np.concatenate(areas).astype(np.float32)
+        self.rectangles = np.concatenate(rectangles)
+        self.layer_ids = np.unique(self.layers)
+
+        # Overview grid in database units
+        self.origin = self.boxes[:, :2].min(axis=0).astype(float)
+        span = (self.boxes[:, 2:].max(axis=0) - self.origin).max()
+        self.cell = max(span / overview, 1.0)
+        grid = (int(np.ceil(span / self.cell)) + 1,) * 2
+        extent = np.maximum(self.boxes[:, 2] - self.boxes[:, 0], self.boxes[:, 3] - self.boxes[:, 1])
+        self.small = np.nonzero(extent < self.cell)[0]
+        self.large = np.nonzero(extent >= self.cell)[0]
+        self.small_tree = PackedRTree(self.boxes[self.small])
+        self.large_tree = PackedRTree(self.boxes[self.large])
+
+        # Area fraction of each overview cell covered by small shapes, per layer, then halved level by level
+        centre = (self.boxes[self.small, :2] + self.boxes[self.small, 2:].astype(float)) / 2
+        col, row = np.floor((centre - self.origin) / self.cell).astype(int).T
+        layer_index = np.searchsorted(self.layer_ids, self.layers[self.small])
+        density = np.bincount((layer_index * grid[0] + row) * grid[1] + col,
+                              weights=self.areas[self.small] / self.cell ** 2,
+                              minlength=len(self.layer_ids) * grid[0] * grid[1])
+        self.density = [density.reshape(len(self.layer_ids), *grid).astype(np.float32)]
+        while max(self.density[-1].shape[1:]) > 1:
+            self.density.append(_halve(self.density[-1]))
+
+    @classmethod
+    def from_gds(cls, path, top=None):
+        library = gdsii.Library(path)
+        return cls(library.flatten_batches(top), library.unit)
+
+    @classmethod
+    def from_polygons(cls, polygons, unit=1e-3):
+        """Layout from (layer, points in um) polygons, e.g. layout.test_pattern().
+
+        Polygons are grouped by layer and vertex count into (k, n, 2) batches,
+        so they are stored in that order rather than the order given."""
+        groups = {}
+        for layer, points in polygons:
+            points = np.asarray(points, dtype=float)
+            groups.setdefault((layer, len(points)), []).append(points)
+        return cls(((layer, np.stack(group) / unit) for (layer, _), group in groups.items()), unit)
+
+    def __len__(self):
+        return len(self.layers)
+
+    @property
+    def bounds(self):
+        """(xmin, ymin, xmax, ymax) in um."""
+        return (*(self.boxes[:, :2].min(axis=0) * self.unit), *(self.boxes[:, 2:].max(axis=0) * self.unit))
+
+    def query(self, window, small=True):
+        """Indices of the polygons overlapping an (x0, y0, x1, y1) database-unit window."""
+        hits = self.large[self.large_tree.query(*window)]
+        if small:
+            hits = np.concatenate([hits, self.small[self.small_tree.query(*window)]])
+        return hits
+
+    def polygons(self, window=None):
+        """Yield (layer, points in um), optionally only those overlapping an (x0, y0, x1, y1) um window."""
+        index = range(len(self)) if window is None else np.sort(self.query(np.asarray(window) / self.unit))
+        for k in index:
+            yield int(self.layers[k]), self.vertices[self.offsets[k]:self.offsets[k + 1]] * self.unit
+
+    def _overview(self, x0, y0, pixel, width, height):
+        """Per-layer density of the small shapes sampled from the coarsest
+        pyramid level whose cells are no larger than a screen pixel (or the
+        finest level when zoomed in further)."""
+        level = int(np.clip(np.floor(np.log2(pixel / self.cell)), 0, len(self.density) - 1))
+        density = self.density[level]
+        cell = self.cell * 2 ** level
+        rows = np.floor((y0 + (np.arange(height) + 0.5) * pixel - self.origin[1]) / cell).astype(int)
+        cols = np.floor((x0 + (np.arange(width) + 0.5) * pixel - self.origin[0]) / cell).astype(int)
+        valid_rows = np.nonzero((rows >= 0) & (rows < density.shape[1]))[0]
+        valid_cols = np.nonzero((cols >= 0) & (cols < density.shape[2]))[0]
+        out = np.zeros((len(self.layer_ids), height, width), dtype=np.float32)
+        out[:, valid_rows[:, None], valid_cols] = density[:, rows[valid_rows][:, None], cols[valid_cols]]
+        return out
+
+    def render(self, x0, y0, pixel, width, height, background=(0, 0, 0), lod=3.0, alpha=0.6):
+        """(height, width, 3) uint8 image of the area whose lower-left corner is
+        (x0, y0) um, at `pixel` um per screen pixel; the top row is the highest y.
+
+        Rectangles are drawn at least one pixel wide; other polygons under
+        `lod` pixels across, and rectangles under one, become density.
+        """
+        scale = self.unit / pixel
+        origin = np.array([x0, y0]) / self.unit
+        window = np.concatenate([origin, origin + np.array([width, height]) / scale])
+        # Density cells up to two screen pixels across still look smooth
+        use_overview = 2 * pixel / self.unit >= self.cell
+        hits = self.query(window, small=not use_overview)
+        if use_overview:
+            cover = self._overview(origin[0], origin[1], 1 / scale, width, height)
+        else:
+            cover = np.zeros((len(self.layer_ids), height, width), dtype=np.float32)
+        boxes = self.boxes[hits].astype(float)
+        extent = np.maximum(boxes[:, 2] - boxes[:, 0], boxes[:, 3] - boxes[:, 1]) * scale
+        rectangle = self.rectangles[hits]
+        small = extent < np.where(rectangle, 1.0, lod)
+        layer_index = np.searchsorted(self.layer_ids, self.layers[hits])
+
+        # Sub-pixel shapes: area fraction added to the pixel under the box centre
+        pixels = np.floor(((boxes[small, :2] + boxes[small, 2:]) / 2 - origin) * scale).astype(int)
+        inside = (pixels[:, 0] >= 0) & (pixels[:, 0] < width) & (pixels[:, 1] >= 0) & (pixels[:, 1] < height)
+        np.add.at(cover, (layer_index[small][inside], pixels[inside, 1], pixels[inside, 0]),
+                  self.areas[hits[small]][inside] * scale ** 2)
+
+        out = np.empty((height, width, 3), dtype=np.float32)
+        out[:] = background
+        for index in range(len(self.layer_ids)):
+            on_layer = layer_index == index
+            layer_cover = cover[index]
+
+            # Rectangles: +1/-1 corner marks summed along both axes
+            pick = on_layer & ~small & rectangle
+            if pick.any():
+                edges = np.ceil((boxes[pick] - np.tile(origin, 2)) * scale - 0.5)
+                c0, r0 = np.clip(edges[:, 0], 0, width).astype(int), np.clip(edges[:, 1], 0, height).astype(int)
+                c1 = np.clip(np.maximum(edges[:, 2], edges[:, 0] + 1), 0, width).astype(int)
+                r1 = np.clip(np.maximum(edges[:, 3], edges[:, 1] + 1), 0, height).astype(int)
+                marks = np.zeros((height + 1, width + 1), dtype=np.int32)
+                for rows, cols, sign in ((r0, c0, 1), (r0, c1, -1), (r1, c0, -1), (r1, c1, 1)):
+                    np.add.at(marks, (rows, cols), sign)
+                layer_cover = np.maximum(layer_cover, marks.cumsum(axis=0).cumsum(axis=1)[:height, :width] > 0)
+
+            # Other polygons: scanline spans of each vertex-count group into one mark array
+            pick = on_layer & ~small & ~rectangle
+            if pick.any():
+                shapes = hits[pick]
+                counts = self.offsets[shapes + 1] - self.offsets[shapes]
+                spans = []
+                for n in np.unique(counts):
+                    group = shapes[counts == n]
+                    points = self.vertices[self.offsets[group][:, None] + np.arange(n)] * self.unit
+                    spans.append(layout.polygon_spans_batch(points, (x0, y0), pixel, (height, width)))
+                rows, starts, stops = (np.concatenate(parts) for parts in zip(*spans))
+                if len(rows):
+                    size = height * (width + 1)
+                    marks = (np.bincount(rows * (width + 1) + starts, minlength=size)
+                             - np.bincount(rows * (width + 1) + stops, minlength=size)).reshape(height, width + 1)
+                    layer_cover = np.maximum(layer_cover, marks.cumsum(axis=1)[:, :width] > 0)
+
+            if layer_cover.any():
+                colour = LAYER_COLOURS[index % len(LAYER_COLOURS)]
+                out += (colour - out) * (np.minimum(layer_cover, 1) * alpha)[..., None]
+        return np.flipud(out).astype(np.uint8)
+
+
+class MaskView:
+    """Presents a MaskLayout to the pan/zoom image viewers as a virtual image.
+
+    The longer side of the layout spans `resolution` virtual pixels; virtual
+    pixel (row, col) is the point (xmin + col * step, ymax - row * step) um.
+    """
+
+    def __init__(self, mask, resolution=4096):
+        self.mask = mask
+        self.xmin, self.ymin, xmax, self.ymax = mask.bounds
+        self.step = max(xmax - self.xmin, self.ymax - self.ymin) / resolution
+        self.shape = (max(1, int(np.ceil((self.ymax - self.ymin) / self.step))),
+                      max(1, int(np.ceil((xmax - self.xmin) / self.step))))
+
+    def to_layout(self, row, col):
+        return self.xmin + col * self.step, self.ymax - row * self.step
+
+    def render_view(self, x0, y0, scale, width, height, background=(0, 0, 0)):
+        x, y = self.to_layout(y0 + height / scale, x0)
+        return self.mask.render(x, y, self.step / scale, width, height, background)
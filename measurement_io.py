@@ -0,0 +1,299 @@
+"""Chunked, memory-mapped ingestion of instrument measurement files.
+
+CSV logs are streamed in fixed-size chunks; large ones are converted once into
+a compact binary columnar file (".mfb") next to the original. The binary file holds a
+JSON header, including an index of the sweeps of every device, followed by
+one contiguous little-endian float64 array per column, so opening it only
+memory-maps the columns and reading a sweep touches just its rows. Empty
+cells are read as NaN; rows with the wrong number of cells are skipped and
+counted in `MeasurementFile.rejected`.
+"""
+import csv
+import hashlib
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from result_cache import CACHE_ROOT
+
+MAGIC = b"MFBIN01\0"
+ALIGN = 64
+DTYPE = "<f8"
+# Columns that name the device or sweep a row belongs to rather than a value
+DEVICE_COLUMNS = ("device", "dut", "die", "frequency", "freq")
+SWEEP_COLUMNS = ("sweep", "sweep_id", "run")
+
+
+def _sniff(path):
+    with open(path, newline='') as f:
+        sample = f.read(4096)
+    if ',' in sample:
+        return ','
+    if '\t' in sample:
+        return '\t'
+    return None
+
+
+def _rows(f, delimiter):
+    reader = csv.reader(f, delimiter=delimiter) if delimiter else (line.split() for line in f)
+    for row in reader:
+        row = [cell.strip() for cell in row]
+        if any(row) and not row[0].startswith('#'):
+            yield row
+
+
+def _trimmed(row):
+    """Row without the empty cells a trailing delimiter leaves at its end."""
+    end = len(row)
+    while end and not row[end - 1]:
+        end -= 1
+    return row[:end]
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def iter_csv_chunks(path, chunk_rows=100_000):
+    """Yield (column names, device labels, sweep labels, values, rejected) per chunk.
+
+    `values` is a (rows, numeric columns) float array with NaN for empty
+    cells, and `rejected` the number of rows of the chunk skipped because
+    their width differs from the first data row. A column headed by one
+    of DEVICE_COLUMNS, a non-numeric first column, or the first of three or
+    more unnamed columns is the device label; a column named in SWEEP_COLUMNS
+    splits a device into sweeps.
+    """
+    delimiter = _sniff(path)
+    with open(path, newline='') as f:
+        rows = _rows(f, delimiter)
+        first = next(rows, None)
+        if first is None:
+            return
+        # Data rows always end in a number (or empty cells); anything else is the header
+        if _is_number(next((cell for cell in reversed(first) if cell), "")):
+            header = None
+            pending = [first]
+        else:
+            header = first
+            pending = []
+        names = device_at = sweep_at = None
+        chunk = pending
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                names, device_at, sweep_at, parsed = _parse_chunk(header, chunk, names, device_at, sweep_at)
+                yield parsed
+                chunk = []
+        if chunk:
+            yield _parse_chunk(header, chunk, names, device_at, sweep_at)[3]
+
+
+def _parse_chunk(header, chunk, names, device_at, sweep_at):
+    if names is None:
+        header = _trimmed(header) if header else header
+        # A header names the columns when the first row fits it up to trailing empty cells
+        named = bool(header) and len(_trimmed(chunk[0])) <= len(header) <= len(chunk[0])
+        width = len(header) if named else len(_trimmed(chunk[0]))
+        header = header if named else [f"col{k}" for k in range(width)]
+        lowered = [h.lower() for h in header]
+        device_at = next((k for k, h in enumerate(lowered) if h in DEVICE_COLUMNS), None)
+        # Unnamed (device, x, y) files label the device in their first column
+        if device_at is None and (not _is_number(chunk[0][0]) or (not named and width >= 3)):
+            device_at = 0
+        sweep_at = next((k for k, h in enumerate(lowered) if h in SWEEP_COLUMNS), None)
+        names = [h for k, h in enumerate(header) if k not in (device_at, sweep_at)]
+    width = len(names) + (device_at is not None) + (sweep_at is not None)
+    count = len(chunk)
+    chunk = [row[:width] if len(row) > width and not any(row[width:]) else row for row in chunk]
+    chunk = [row for row in chunk if len(row) == width]
+    devices = [row[device_at] for row in chunk] if device_at is not None else None
+    sweeps = [row[sweep_at] for row in chunk] if sweep_at is not None else None
+    skip = {device_at, sweep_at}
+    values = np.array([[float(cell) if cell else np.nan for k, cell in enumerate(row) if k not in skip]
+                       for row in chunk], dtype=float).reshape(len(chunk), len(names))
+    return names, device_at, sweep_at, (names, devices, sweeps, values, count - len(chunk))
+
+
+class _SweepIndex:
+    """Row ranges of every sweep, keyed by device, built chunk by chunk."""
+
+    def __init__(self):
+        self.index = {}
+        self.rows = 0
+        self._last = object()
+        self._device = None
+
+    def add(self, devices, sweeps, count):
+        # A new (device, sweep) label starts a new row range
+        labels = zip(devices or [None] * count, sweeps or [None] * count)
+        for offset, key in enumerate(labels):
+            if key != self._last:
+                self._device = key[0] if key[0] is not None else ""
+                self.index.setdefault(self._device, []).append([self.rows + offset] * 2)
+                self._last = key
+            self.index[self._device][-1][1] = self.rows + offset + 1
+        self.rows += count
+
+
+def convert_csv(path, out_path=None, chunk_rows=100_000):
+    """Convert a CSV/text log into the binary columnar format in bounded memory.
+
+    Every column is appended to its own temporary file while streaming, then
+    the header and the columns are concatenated into the output.
+    """
+    out_path = out_path or binary_path_for(path)
+    workdir = tempfile.mkdtemp(dir=os.path.dirname(out_path) or ".")
+    try:
+        names = []
+        column_files = []
+        index = _SweepIndex()
+        rejected = 0
+        for names, devices, sweeps, values, skipped in iter_csv_chunks(path, chunk_rows):
+            rejected += skipped
+            if not column_files:
+                column_files = [open(os.path.join(workdir, f"{k}.bin"), 'wb') for k in range(len(names))]
+            for k, column_file in enumerate(column_files):
+                column_file.write(np.ascontiguousarray(values[:, k], dtype=DTYPE).tobytes())
+            index.add(devices, sweeps, len(values))
+        for column_file in column_files:
+            column_file.close()
+
+        header = {"columns": names, "rows": index.rows, "dtype": DTYPE,
+                  "source": os.path.abspath(path), "index": index.index, "rejected": rejected}
+        encoded = json.dumps(header).encode()
+        data_start = _aligned(len(MAGIC) + 8 + len(encoded))
+        tmp = os.path.join(workdir, "out.mfb")
+        with open(tmp, 'wb') as out:
+            out.write(MAGIC)
+            out.write(struct.pack("<Q", len(encoded)))
+            out.write(encoded)
+            out.write(b"\0" * (data_start - out.tell()))
+            for k in range(len(column_files)):
+                with open(os.path.join(workdir, f"{k}.bin"), 'rb') as column:
+                    shutil.copyfileobj(column, out, 1 << 20)
+        os.replace(tmp, out_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return out_path
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def binary_path_for(path):
+    """Sidecar location of the binary copy of a CSV, falling back to the cache."""
+    sidecar = path + ".mfb"
+    if os.access(os.path.dirname(os.path.abspath(path)), os.W_OK):
+        return sidecar
+    directory = os.path.join(CACHE_ROOT, "measurements")
+    os.makedirs(directory, exist_ok=True)
+    name = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()
+    return os.path.join(directory, name + ".mfb")
+
+
+class MeasurementFile:
+    """Columns and sweep index of a measurement file.
+
+    Binary files are memory-mapped; small CSV files are parsed into memory.
+    `rejected` counts the source rows skipped for having the wrong width.
+    """
+
+    def __init__(self, path, columns, index, data, rejected=0):
+        self.path = path
+        self.columns = columns
+        self.index = index
+        self.devices = list(index)
+        self.rows = data.shape[1]
+        self._data = data
+        self.rejected = rejected
+
+    @classmethod
+    def from_binary(cls, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a binary measurement file")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+        columns = header["columns"]
+        if header["rows"] and columns:
+            data = np.memmap(path, dtype=header["dtype"], mode='r', offset=_aligned(len(MAGIC) + 8 + length),
+                             shape=(len(columns), header["rows"]))
+        else:
+            data = np.empty((len(columns), 0))
+        return cls(path, columns, header["index"], data, header.get("rejected", 0))
+
+    @classmethod
+    def from_csv(cls, path, chunk_rows=100_000):
+        names = []
+        blocks = []
+        index = _SweepIndex()
+        rejected = 0
+        for names, devices, sweeps, values, skipped in iter_csv_chunks(path, chunk_rows):
+            blocks.append(values)
+            index.add(devices, sweeps, len(values))
+            rejected += skipped
+        data = np.concatenate(blocks).T if blocks else np.empty((len(names), 0))
+        return cls(path, names, index.index, data, rejected)
+
+    def column(self, name):
+        return self._data[self.columns.index(name)]
+
+    def sweep_ranges(self):
+        """(device, start row, stop row) for every sweep in file order."""
+        ranges = [(device, start, stop) for device, spans in self.index.items() for start, stop in spans]
+        return sorted(ranges, key=lambda r: r[1])
+
+    def sweep(self, device, number=0):
+        """Column name -> memory-mapped row slice for one sweep of a device."""
+        start, stop = self.index[device][number]
+        return {name: self._data[k, start:stop] for k, name in enumerate(self.columns)}
+
+    def iter_sweeps(self):
+        for device, start, stop in self.sweep_ranges():
+            yield device, {name: self._data[k, start:stop] for k, name in enumerate(self.columns)}
+
+
+def is_binary(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def open_measurement(path, convert_above=8 << 20, chunk_rows=100_000):
+    """Open a CSV or binary measurement file.
+
+    CSV files larger than `convert_above` bytes are converted to the binary
+    format on first use (and again whenever the CSV is newer than its binary
+    copy) and memory-mapped from then on; smaller ones are parsed directly.
+    """
+    if is_binary(path):
+        return MeasurementFile.from_binary(path)
+    if os.path.getsize(path) <= convert_above:
+        return MeasurementFile.from_csv(path, chunk_rows)
+    binary = binary_path_for(path)
+    if not os.path.exists(binary) or os.path.getmtime(binary) < os.path.getmtime(path):
+        convert_csv(path, binary, chunk_rows)
+    return MeasurementFile.from_binary(binary)
+
+
+def decimate(x, y, max_points=2000):
+    """Min/max envelope of a long trace for plotting; short traces pass through."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+    buckets = max_points // 2
+    edges = np.linspace(0, len(x), buckets + 1).astype(int)
+    low = np.minimum.reduceat(y, edges[:-1])
+    high = np.maximum.reduceat(y, edges[:-1])
+    centres = x[(edges[:-1] + edges[1:]) // 2]
+    return np.repeat(centres, 2), np.column_stack([low, high]).ravel()
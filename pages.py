@@ -0,0 +1,747 @@
+"""Text and illustrations of the process and technique pages.
+
+The Tk windows and the web server (web_server.py) both build their pages
+from these constants, so every front end shows the same content. Image
+files are named relative to the package directory.
+"""
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Display widths (px) of the illustrations on the process and technique pages
+STEP_IMAGE_WIDTH = 350
+TECHNIQUE_IMAGE_WIDTH = 300
+
+LITHOGRAPHY_DESCRIPTION = """Lithography is a microfabrication process used to pattern thin films and substrates.
+It involves using light to transfer a geometric pattern from a photomask to a light-sensitive chemical photoresist.
+Common types include optical lithography, electron-beam lithography, and nanoimprint lithography."""
+
+CHARACTERIZATION_DESCRIPTION = """Characterization refers to the analysis of material properties and structures.
+It includes techniques to examine physical, chemical, and structural characteristics at various scales.
+Common methods include microscopy, spectroscopy, diffraction, and surface analysis."""
+
+# Process steps: (title, description, image file or None for a simulated illustration)
+LITHO_STEPS = [
+    ("1. Substrate Preparation", 
+     """The lithography process begins with meticulous wafer cleaning - the foundation for all subsequent steps. Using the industry-standard RCA cleaning method, wafers undergo a two-stage purification process: first removing organic contaminants with an ammonia-peroxide solution, then eliminating metallic ions with a hydrochloric acid mixture. 
+
+The science behind this: These solutions create chemical reactions that lift contaminants from the silicon surface without damaging its crystalline structure. Megasonic cleaning (high-frequency sound waves) then removes nanoparticles, while spin-rinse-drying leaves an atomically smooth surface. 
+
+Why it matters: Even nanometer-scale impurities can disrupt circuit patterns. This cleaning ensures perfect photoresist adhesion and pattern fidelity in later steps.
+         
+         The substrate preparation begins with a thorough cleaning sequence:
+         • RCA Standard Clean 1 (SC-1): 5:1:1 H2O:H2O2:NH4OH at 75°C ±2°C for 10min
+         • Megasonic DI rinse: 1MHz frequency, 20°C ±1°C for 3min
+         • RCA Standard Clean 2 (SC-2): 6:1:1 H2O:H2O2:HCl at 75°C ±2°C for 10min
+         • Final rinse: Overflow DI water (18.2MΩ·cm) for 5min
+         • Spin-rinse-dry: 2000rpm for 60s with N2 purge""",
+     "step1_substrate.png"),
+
+    ("2. HMDS Priming", 
+     """Before photoresist application, wafers receive an HMDS primer that transforms the surface chemistry. In a vacuum chamber, HMDS vapor reacts with surface hydroxyl groups to create a hydrophobic monolayer.
+
+The chemistry at work: Si-OH + HMDS → Si-O-Si(CH₃)₃ + NH₃. This reaction changes the wafer from water-attracting to water-repelling, much like waxing a car. 
+
+Practical importance: This invisible layer (just 1-2 molecules thick) prevents resist beading and ensures uniform coating. Modern systems integrate this step with coating tracks to maintain cleanroom conditions throughout.
+         
+         HMDS vapor priming process details:
+         Equipment: SVG Coat Track with vacuum vapor prime module
+         Process Sequence:
+         1. Dehydration bake: 150°C ±1°C for 60s (hotplate)
+         2. Vacuum pump down: 30s to 50Torr ±5Torr
+         3. HMDS vapor dose: 5ml liquid HMDS vaporized at 23°C
+         4. Reaction time: 45s ±5s at 50Torr
+         5. Vent to N2 atmosphere: 20s ramp to 760Torr
+
+         Chemical Reaction:
+         Si-OH (surface) + (CH3)3Si-NH-Si(CH3)3 → 2 Si-O-Si(CH3)3 + NH3↑""",
+     "step2_hmds.png"),
+
+    ("3. Photoresist Coating", 
+     """A light-sensitive polymer solution is spin-coated onto the wafer, forming an ultra-thin, uniform film. The spinning process has two phases: initial low-speed spread (500-1000 rpm) followed by high-speed thinning (1000-5000 rpm).
+
+Physics principle: Centrifugal force (F=mω²r) distributes the resist outward while solvent evaporation leaves a solid film. The thickness follows t = kω^α, where faster spins create thinner films.
+
+Key considerations: Processing occurs under yellow light to prevent premature exposure. Resist is filtered to 0.1μm to remove particles that could cause defects in the nanoscale patterns.
+         
+         Spin coating specifications for i-line resist:
+         Resist: AZ® 5214E (positive tone)
+         Process Parameters:
+         • Dispense: 3ml resist at 500rpm (static dispense)
+         • Spread: 1000rpm for 3s (accel 10,000rpm/s²)
+         • Spin: 4000rpm for 30s (final thickness 1.4μm)
+         • Edge bead removal: 1mm edge, solvent spray""",
+     "step3_coating.gif"),
+
+    ("4. Soft Bake", 
+     """A gentle bake removes residual solvents and stabilizes the resist film. Modern systems use precisely controlled hotplates with proximity gap technology to ensure uniform heating.
+
+What happens at the molecular level: Polymer chains rearrange and condense, increasing the glass transition temperature (Tg). About 10-30% thickness is lost as solvents evaporate.
+
+Process balance: Temperature must be high enough to remove solvents but low enough to prevent premature degradation of the photosensitive compounds. The sweet spot is typically 90-110°C.
+         
+         Post-apply bake thermal profile:
+         Equipment: In-line hotplate with proximity gap
+         Temperature Zones:
+         1. Ramp-up: 23°C to 100°C in 30s (2.5°C/s)
+         2. Soak: 100°C ±0.3°C for 60s
+         3. Ramp-down: 100°C to 23°C in 45s
+
+         Process Window:
+         • Minimum temp: 95°C (incomplete solvent removal)
+         • Maximum temp: 105°C (resist degradation)
+         • Optimal range: 98-102°C""",
+     "step4_softbake.png"),
+
+    ("5. Exposure", 
+     """The magic of pattern transfer occurs here. Ultraviolet light projects the circuit design through a photomask onto the resist. Modern systems achieve incredible precision - aligning multiple wafer layers within nanometers.
+
+Optical science: Different wavelengths (g-line 436nm to EUV 13.5nm) enable various feature sizes. The aerial image quality depends on numerical aperture and coherence factor.
+
+Advanced techniques: Optical Proximity Correction (OPC) accounts for light diffraction effects, adding tiny adjustments to the mask pattern so it prints correctly on the wafer.
+         
+         """,
+     "step5_exposure.png"),
+
+    ("6. PEB", 
+     """For chemically amplified resists, this bake triggers the crucial chemical reactions that develop the latent image. Heat causes acid molecules to diffuse and catalyze polymer deprotection.
+
+Reaction dynamics: Acid concentration follows [H⁺]=[H⁺]₀e^(-Ea/RT), with diffusion length carefully controlled (typically 10-50nm). Temperature uniformity must be within ±0.1°C across the wafer.
+
+Critical timing: The "PEB delay" between exposure and baking must be minimized (<60s) to prevent atmospheric contaminants from neutralizing the active acid compounds.
+         
+         Post-exposure bake specifications:
+         Equipment: Track-mounted multi-zone hotplate
+         Thermal Profile:
+         • Ramp-up: 23°C to 110°C in 15s (5.8°C/s)
+         • Soak: 110°C ±0.1°C for 60s
+         • Ramp-down: 110°C to 23°C in 20s""",
+     "step6_peb.png"),
+
+    ("7. Development", 
+     """The developer solution washes away exposed resist areas (for positive tone), revealing the 3D circuit pattern. Standard developers use tetramethylammonium hydroxide (TMAH) in precise concentrations.
+
+Process control: Development rate follows R = R₀ + A[H⁺]ⁿ, highly sensitive to temperature (±0.5°C control needed). Megasonic agitation helps develop small features without pattern collapse.
+
+Visualization: Like photographic development, this transforms the invisible latent image into visible structures, creating the stencil for subsequent etching.
+         """,
+     "step7_develop.gif"),
+
+    ("8. Hard Bake", 
+     """A final bake strengthens the remaining resist pattern before etching. This crosslinks polymer chains, improving etch resistance by 20-50%.
+
+Thermal effects: While beneficial for stability, baking causes slight resist flow (5-20nm critical dimension change) that must be accounted for in mask design.
+
+Advanced solutions: Some processes use UV curing instead of thermal baking to minimize dimensional changes for the most advanced nodes.
+         
+         Final bake specifications:
+         Equipment: Convection oven with N2 purge
+         Thermal Profile:
+         • Ramp-up: 23°C to 125°C in 5min (0.34°C/s)
+         • Soak: 125°C ±1°C for 30min
+         • Ramp-down: 125°C to 23°C in 10min
+
+         """,
+     "step8_hardbake.png"),
+
+    ("9. Etching", 
+     """The resist pattern now guides the etching of underlying layers. Plasma etching uses energized ions (like CF₄⁺ or Cl⁺) to physically and chemically remove exposed material.
+
+Precision requirements: Etching must be anisotropic (vertical sidewalls), selective to the resist mask, and uniform across the wafer. Modern systems use real-time optical emission spectroscopy to detect endpoint.
+
+Visual analogy: Like sandblasting through a stencil, this permanently transfers the temporary resist pattern into the actual device layers.
+         
+         Pattern transfer etch process:
+         Equipment: Lam Research 2300 Kiyo
+         Etch Chemistry:
+         • Silicon: HBr/Cl2/O2 (40/20/5sccm)
+         • Oxide: C4F8/Ar/O2 (30/50/5sccm)
+         • Metal: Cl2/BCl3 (30/10sccm)
+
+
+         Selectivity:
+         • Resist:Si = 1:3
+         • Resist:SiO2 = 1:4
+         • Resist:Al = 1:5""",
+     None),
+
+    ("10. Strip & Clean", 
+     """Finally, all remaining resist is completely removed. Options include wet chemical stripping or oxygen plasma ashing, often combined for best results.
+
+Cleaning science: Post-strip cleaning removes any residues that could interfere with subsequent processing. The water break test (observing how water beads on the surface) confirms perfect cleanliness.
+
+Finished result: The wafer now bears the precise circuit patterns and is ready for the next manufacturing steps, such as deposition of additional layers.
+         
+         Resist removal process:
+         Two-Stage Removal:
+         1. Plasma ash: O2 (500sccm) at 250°C, 300W for 2min
+         2. Wet clean: EKC265™ at 85°C for 10min
+
+         Final Cleaning:
+         • SC1: 5min at 70°C
+         • Megasonic: 1MHz for 3min
+         • Marangoni dry: IPA vapor + N2 knife""",
+     "step10_strip.png")
+]
+
+CHAR_STEPS = [
+    ("1. I-V Characterization Fundamentals",
+     """PHYSICAL PRINCIPLES:
+Current-Voltage (I-V) measurements reveal the charge transport mechanisms governing device operation:
+
+1. Thermionic Emission (Forward Bias):
+   - Carriers gain sufficient thermal energy to overcome the potential barrier
+   - Exponential current increase with voltage (ideal diode equation)
+   - Non-idealities manifest through:
+     * Recombination in depletion region (n ≈ 2)
+     * Series resistance effects (high current roll-off)
+     * Tunneling contributions (high doping)
+
+2. Space-Charge Limited Current (SCLC):
+   - Dominates in low-mobility materials
+   - Current limited by injected charge screening
+   - Three regimes:
+     Ohmic (J ∝ V) → Trap-filled limit → Child's law (J ∝ V²)
+
+3. Reverse Bias Characteristics:
+   - Generation current in depletion region
+   - Trap-assisted tunneling (Poole-Frenkel effect)
+   - Avalanche breakdown at high fields
+
+MEASUREMENT CONSIDERATIONS:
+- Voltage sweep direction affects trap charging
+- Temperature dependence reveals activation energies
+- Light illumination separates photoconduction effects""",
+     "iv_theory.png"),
+
+    ("2. C-V Characterization Physics",
+     """CAPACITANCE MECHANISMS:
+Capacitance-Voltage (C-V) measurements probe charge distribution dynamics:
+
+1. Depletion Capacitance:
+   - Space charge region acts as dielectric
+   - Width varies with applied bias (C ∝ 1/√V)
+   - Doping profile extracted from C⁻² vs V slope
+
+2. Interface State Response:
+   - Traps follow AC signal at low frequencies
+   - Freeze out at high frequencies (1MHz)
+   - Conductance method measures trap time constants
+
+3. Deep Level Transients:
+   - Capacitance transients after voltage steps
+   - Emission rate depends on temperature:
+     eₙ = σₙvₜₕNₛexp(-ΔE/kT)""",
+     "cv_theory.png"),
+
+    ("3. Parameter Extraction Methodology",
+     """I-V ANALYSIS:
+1. Ideality Factor (n):
+   - Slope of ln(I) vs V plot
+   - n = (q/kT)(dV/dlnI)
+   - n=1: Pure thermionic emission
+   - n=2: Dominant recombination
+
+2. Series Resistance (Rₛ):
+   - High current deviation from ideal
+   - Rₛ = dV/dI - nkT/qI
+   - Corrected voltage V' = V - IRₛ
+
+C-V ANALYSIS:
+1. Doping Concentration:
+   - N = 2/(qεA²d(1/C²)/dV
+   - Depth profile from incremental analysis
+
+2. Flatband Voltage:
+   - V_fb = Φₘₛ - Qₜₜ/Cₒₓ
+   - Determines fixed charge density""",
+     "analysis_methods.png"),
+
+    ("4. Practical Measurement Considerations",
+     """SYSTEM REQUIREMENTS:
+1. I-V Measurement:
+   - Source-measure unit (SMU) with:
+     * Current resolution < 1pA
+     * Voltage resolution < 1mV
+   - Guarded connections for leakage control
+   - Temperature-controlled stage
+
+2. C-V Measurement:
+   - LCR meter with:
+     * 1mHz-10MHz frequency range
+     * 1fF capacitance resolution
+   - DC bias superposition capability
+   - RF shielding for low-noise
+
+ERROR SOURCES:
+1. I-V Artifacts:
+   - Self-heating at high currents
+   - Photocurrent from ambient light
+   - Non-equilibrium conditions (fast sweeps)
+
+2. C-V Artifacts:
+   - Series resistance effects
+   - Minority carrier response
+   - Deep level transient interference
+
+BEST PRACTICES:
+1. For I-V:
+   - Use 4-wire Kelvin connections
+   - Sweep rates < 100mV/s
+   - Temperature stabilization (±0.1K)
+
+2. For C-V:
+   - Start from accumulation
+   - Multiple frequency measurements
+   - Wait for steady-state (τ > 10×measurement)""",
+     "measurement_setup.png")
+]
+
+PROCESSES = {
+    "Lithography": {"window": "Detailed Lithography Process with Visual Guides",
+                    "title": "Comprehensive Lithography Process with Visual References",
+                    "steps": LITHO_STEPS, "image_dir": "litho_images"},
+    "Characterization": {"window": "I-V & C-V Characterization Theory",
+                         "title": "Comprehensive Characterization Techniques",
+                         "steps": CHAR_STEPS, "image_dir": "char_images"},
+}
+
+TECHNIQUES = {
+    "Optical Lithography": {
+        "image": "optical_litho.png",
+        "image_dir": "litho_images",
+        "description": """OPTICAL LITHOGRAPHY: The Workhorse of Semiconductor Patterning
+
+Fundamentals:
+Optical lithography uses light to transfer geometric patterns from a photomask to a light-sensitive photoresist. It's the dominant patterning technology in semiconductor manufacturing.
+
+Key Components:
+• Light Source: Mercury lamps (g-line 436nm, i-line 365nm) or excimer lasers (DUV 248nm, 193nm)
+• Photomask: Chrome patterns on quartz substrate (4x or 5x magnification)
+• Projection Optics: High-NA lenses (NA up to 1.35 with immersion)
+• Photoresist: Chemically amplified resists for advanced nodes
+
+Resolution Equation:
+R = k₁·λ/NA
+Where:
+R = minimum feature size
+λ = wavelength (nm)
+NA = numerical aperture
+k₁ = process factor (typically 0.25-0.4)
+
+Modern Advancements:
+• Immersion Lithography: Uses water between lens and wafer (NA > 1.0)
+• Multiple Patterning: LELE, SADP, SAQP for <20nm features
+• Computational Lithography: OPC, ILT, SMO for better pattern fidelity
+
+Process Parameters:
+• Alignment accuracy: <3nm (3σ)
+• Overlay control: <2nm
+• Depth of focus: 100-300nm
+• Throughput: 100-200 wafers/hour
+• Defect density: <0.01/cm²
+
+Applications:
+• CMOS logic devices
+• Memory chips (DRAM, NAND)
+• MEMS devices
+• Advanced packaging"""
+,
+    },
+    "Electron-beam Lithography": {
+        "image": "ebeam_litho.png",
+        "image_dir": "litho_images",
+        "description": """ELECTRON-BEAM LITHOGRAPHY: Ultimate Resolution Patterning
+
+Fundamentals:
+E-beam lithography uses a focused electron beam to directly write patterns on resist-coated substrates, achieving ultra-high resolution (<10nm).
+
+Key Advantages:
+• No physical masks required (direct-write)
+• Exceptional resolution (5-10nm features)
+• Excellent overlay accuracy (<2nm)
+• Flexible pattern changes
+
+Challenges:
+• Very slow throughput (hours per wafer)
+• Proximity effects from electron scattering
+• High equipment and maintenance costs
+• Resist sensitivity limitations
+
+Technical Specifications:
+• Beam energy: 10-100keV
+• Beam current: 10pA-100nA
+• Spot size: 1-5nm
+• Positioning accuracy: <1nm
+• Field size: 100-500μm
+• Resist sensitivity: 10-100μC/cm²
+
+Resolution Factors:
+• Electron scattering (forward/backscatter)
+• Resist contrast and sensitivity
+• Beam blur and stability
+• Pattern density effects
+
+Applications:
+• Photomask fabrication
+• Research and development
+• Quantum devices
+• Photonic crystals
+• Nanotechnology structures"""
+,
+    },
+    "Nanoimprint Lithography": {
+        "image": "nanoimprint.png",
+        "image_dir": "litho_images",
+        "description": """NANOIMPRINT LITHOGRAPHY: High-Throughput Nanoscale Patterning
+
+Fundamentals:
+NIL physically molds resist using a rigid template, enabling high-resolution patterning without complex optics.
+
+Process Variants:
+1. Thermal NIL: Heat resist above Tg, imprint, then cool
+2. UV-NIL: UV-curable resist with transparent template
+3. Roll-to-Roll: Continuous imprinting for flexible substrates
+
+Key Advantages:
+• Sub-10nm resolution demonstrated
+• High throughput potential
+• Lower cost than optical/EUV
+• 3D patterning capability
+
+Technical Specifications:
+• Resolution: <10nm demonstrated
+• Alignment accuracy: <5nm
+• Throughput: >20 wafers/hour
+• Template life: >1000 imprints
+• Residual layer: <10nm uniformity
+
+Challenges:
+• Defect control
+• Template fabrication
+• Release agents required
+• Pattern fidelity maintenance
+
+Applications:
+• NAND flash memory
+• Bit-patterned media
+• Photonic devices
+• Biological applications
+• Flexible electronics"""
+,
+    },
+    "X-ray Lithography": {
+        "image": "xray_litho.gif",
+        "image_dir": "litho_images",
+        "description": """X-RAY LITHOGRAPHY: High-Energy Pattern Transfer
+
+Fundamentals:
+Uses synchrotron radiation (0.5-4nm wavelength) to pattern thick resists through proximity printing.
+
+Key Features:
+• Deep penetration through resist
+• Minimal diffraction effects
+• High aspect ratio patterns
+• Parallel exposure of entire wafer
+
+Technical Specifications:
+• Wavelength: 0.5-4nm (typically 1nm)
+• Mask-to-wafer gap: 10-50μm
+• Resist thickness: Up to 1mm
+• Aspect ratio: >50:1 demonstrated
+• Exposure dose: 100-1000mJ/cm²
+
+Advantages:
+• No optical distortions
+• High depth of focus
+• Suitable for 3D structures
+• Good for high-Z materials
+
+Challenges:
+• Mask fabrication difficulty
+• Synchrotron access required
+• Alignment challenges
+• Limited to certain applications
+
+Applications:
+• MEMS devices
+• LIGA process
+• High-aspect ratio structures
+• X-ray optics fabrication
+• Biomedical devices"""
+,
+    },
+    "UV Lithography": {
+        "image": "uv_litho.gif",
+        "image_dir": "litho_images",
+        "description": """UV LITHOGRAPHY: Versatile Mid-Range Patterning
+
+Fundamentals:
+Utilizes ultraviolet light (300-400nm) for resist exposure, balancing resolution and throughput.
+
+Key Features:
+• Mercury lamp sources (g-line 436nm, i-line 365nm)
+• Contact/proximity or projection modes
+• Mature, reliable technology
+• Cost-effective for many applications
+
+Technical Specifications:
+• Resolution: 0.5-1.0μm (projection)
+• Depth of focus: 1-2μm
+• Alignment accuracy: 50-100nm
+• Throughput: 50-100 wafers/hour
+• Resist thickness: 0.5-2.0μm
+
+Process Considerations:
+• Diffraction effects significant
+• Contact mode causes mask damage
+• Proximity gap affects resolution
+• Resist selection critical
+
+Advantages:
+• Lower cost than DUV/EUV
+• Simple operation
+• Good for non-critical layers
+• Wide resist compatibility
+
+Applications:
+• MEMS fabrication
+• Microfluidics
+• PCB manufacturing
+• Displays
+• Non-semiconductor patterning"""
+,
+    },
+    "Scanning Electron Microscopy": {
+        "image": "sem_microscope.png",
+        "image_dir": "char_images",
+        "description": """SCANNING ELECTRON MICROSCOPY (SEM): High-Resolution Surface Imaging
+
+Fundamentals:
+SEM uses a focused electron beam to scan samples, producing high-resolution images from emitted secondary electrons.
+
+Key Capabilities:
+• Resolution: 0.5-5nm (depending on instrument)
+• Magnification: 10x-1,000,000x
+• Depth of field: 10-100× better than optical
+• Elemental analysis via EDS
+
+Operating Principles:
+1. Electron beam (1-30keV) scans sample surface
+2. Secondary electrons emitted from surface
+3. Signal intensity varies with surface topography
+4. Backscattered electrons provide Z-contrast
+
+Instrument Parameters:
+• Accelerating voltage: 1-30kV
+• Probe current: 1pA-100nA
+• Working distance: 2-10mm
+• Vacuum: 10⁻³ to 10⁻⁶ Pa
+• Detector types: SE, BSE, EDS
+
+Sample Requirements:
+• Conductivity: Conductive or coated
+• Size: Typically <1cm
+• Vacuum compatibility required
+• Dry, clean surface preferred
+
+Applications:
+• Semiconductor defect analysis
+• Nanomaterial characterization
+• Biological imaging (after preparation)
+• Failure analysis
+• Metrology"""
+,
+    },
+    "Atomic Force Microscopy": {
+        "image": "afm_diagram.png",
+        "image_dir": "char_images",
+        "description": """ATOMIC FORCE MICROSCOPY (AFM): Nanoscale Surface Profiling
+
+Fundamentals:
+AFM measures surface topography by scanning a sharp tip across the sample while monitoring tip-sample interactions.
+
+Operating Modes:
+1. Contact Mode: Tip in constant contact
+2. Tapping Mode: Tip oscillates near surface
+3. Non-contact Mode: Measures van der Waals forces
+
+Key Specifications:
+• Resolution: Atomic vertical, 1nm lateral
+• Scan range: 1μm to 100μm
+• Force sensitivity: <1nN
+• Environment: Air, liquid, or vacuum
+
+Measurement Capabilities:
+• Topography (3D surface profile)
+• Roughness (Ra, Rq, Rz)
+• Mechanical properties (modulus, adhesion)
+• Electrical properties (conductivity, potential)
+• Magnetic properties
+
+Advantages:
+• Atomic-level resolution
+• No sample coating required
+• Works in various environments
+• Quantitative height data
+
+Limitations:
+• Slow scan speed
+• Tip convolution effects
+• Limited field of view
+• Sample damage possible
+
+Applications:
+• Surface roughness measurement
+• Nanostructure characterization
+• Biological samples
+• Thin film analysis
+• Semiconductor metrology"""
+,
+    },
+    "X-ray Diffraction": {
+        "image": "xrd_equipment.png",
+        "image_dir": "char_images",
+        "description": """X-RAY DIFFRACTION (XRD): Crystal Structure Analysis
+
+Fundamentals:
+XRD measures diffraction patterns from crystalline materials to determine atomic structure and phase composition.
+
+Key Techniques:
+1. Powder XRD: Polycrystalline samples
+2. Thin Film XRD: Grazing incidence
+3. High-Resolution XRD: Rocking curves
+4. XRR: Reflectivity for thin films
+
+Information Obtained:
+• Crystal structure identification
+• Lattice parameters
+• Crystallite size
+• Strain/stress analysis
+• Texture/preferred orientation
+
+Instrument Parameters:
+• X-ray source: Cu Kα (1.54Å) typical
+• Detector: Point, linear, or 2D
+• Angular range: 5-140° 2θ
+• Resolution: <0.01° 2θ
+
+Data Analysis:
+• Peak position → d-spacing
+• Peak width → crystallite size
+• Peak intensity → texture
+• Peak shifts → strain
+
+Applications:
+• Phase identification
+• Thin film characterization
+• Quality control
+• Semiconductor epitaxy
+• Materials research"""
+,
+    },
+    "Raman Spectroscopy": {
+        "image": "raman_spectrometer.png",
+        "image_dir": "char_images",
+        "description": """RAMAN SPECTROSCOPY: Molecular Vibrational Fingerprinting
+
+Fundamentals:
+Measures inelastic scattering of light to probe molecular vibrations and crystal phonons.
+
+Key Features:
+• Chemical identification
+• Crystal structure analysis
+• Strain measurement
+• Temperature mapping
+• Non-destructive
+
+Technical Specifications:
+• Excitation wavelength: 325-785nm
+• Resolution: <1cm⁻¹
+• Spatial resolution: ~1μm
+• Depth profiling capability
+• Mapping/imaging possible
+
+Information Obtained:
+• Chemical bonds present
+• Crystal phases
+• Stress/strain state
+• Defect density
+• Layer thickness
+
+Advantages:
+• Minimal sample prep
+• Works through transparent media
+• No vacuum required
+• Complementary to FTIR
+
+Applications:
+• Material identification
+• Carbon nanotube characterization
+• Semiconductor strain analysis
+• Pharmaceutical analysis
+• Art conservation"""
+,
+    },
+    "Ellipsometry": {
+        "image": "ellipsometer.png",
+        "image_dir": "char_images",
+        "description": """ELLIPSOMETRY: Thin Film Optical Characterization
+
+Fundamentals:
+Measures polarization changes in reflected light to determine thin film properties.
+
+Key Measurements:
+• Thickness (sub-nm to μm)
+• Refractive index (n and k)
+• Optical constants
+• Interface quality
+• Anisotropy
+
+Technique Variants:
+1. Spectroscopic Ellipsometry
+2. Imaging Ellipsometry
+3. In-situ Ellipsometry
+4. Mueller Matrix Ellipsometry
+
+Technical Specifications:
+• Wavelength range: 190-1700nm
+• Angle range: 45-90°
+• Thickness accuracy: <0.1nm
+• Measurement speed: ms to s
+• Spot size: 10μm to mm
+
+Data Analysis:
+• Optical model construction
+• Layer-by-layer fitting
+• Dispersion relations
+• Anisotropy modeling
+
+Applications:
+• Semiconductor thin films
+• Optical coatings
+• Organic layers
+• Surface roughness
+• Process monitoring"""
+,
+    },
+}
+
+LITHO_TECHNIQUES = ("Optical Lithography", "Electron-beam Lithography", "Nanoimprint Lithography",
+                    "X-ray Lithography", "UV Lithography")
+CHAR_TECHNIQUES = ("Scanning Electron Microscopy", "Atomic Force Microscopy", "X-ray Diffraction",
+                   "Raman Spectroscopy", "Ellipsometry")
+
+
+def image_path(image_dir, name):
+    return os.path.join(BASE_DIR, image_dir, name)
+
+
+def illustrations():
+    """(image dir, file name, display width) of every illustration on the pages."""
+    found = []
+    for process in PROCESSES.values():
+        found += [(process["image_dir"], image, STEP_IMAGE_WIDTH)
+                  for _, _, image in process["steps"] if image]
+    found += [(page["image_dir"], page["image"], TECHNIQUE_IMAGE_WIDTH) for page in TECHNIQUES.values()]
+    return found
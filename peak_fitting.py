@@ -0,0 +1,51 @@
+"""Peak detection and pseudo-Voigt fitting shared by the spectral analyses.
+
+    pV(x) = A [eta L(x) + (1 - eta) G(x)]
+with a Lorentzian L and Gaussian G of the same FWHM, both of unit height.
+"""
+import numpy as np
+from scipy.optimize import curve_fit
+from scipy.signal import find_peaks, savgol_filter
+
+
+def pseudo_voigt(x, amplitude, centre, fwhm, eta):
+    sigma = fwhm / (2 * np.sqrt(2 * np.log(2)))
+    gauss = np.exp(-0.5 * ((x - centre) / sigma) ** 2)
+    lorentz = 1 / (1 + ((x - centre) / (fwhm / 2)) ** 2)
+    return amplitude * (eta * lorentz + (1 - eta) * gauss)
+
+
+def fit_peaks(x, signal, min_snr=5.0, max_peaks=30, smooth=7):
+    """Detect peaks in a background-free trace and fit each with a pseudo-Voigt.
+
+    Peaks are found on a Savitzky-Golay smoothed copy so counting noise does
+    not split or mimic peaks; fits weaker than `min_snr` times the
+    noise, or centred inside a stronger peak, are dropped.
+    """
+    noise = 1.4826 * np.median(np.abs(np.diff(signal))) / np.sqrt(2) + 1e-12
+    step = np.median(np.diff(x))
+    smoothed = savgol_filter(signal, smooth, 2) if len(signal) > smooth else signal
+    indices, props = find_peaks(smoothed, prominence=min_snr * noise, width=1.0)
+    order = np.argsort(props['prominences'])[::-1][:max_peaks]
+    peaks = []
+    for k in sorted(order, key=lambda k: indices[k]):
+        i = indices[k]
+        fwhm0 = max(props['widths'][k] * step, 2 * step)
+        window = np.abs(x - x[i]) <= 3 * fwhm0
+        if window.sum() < 5:
+            continue
+        p0 = (smoothed[i], x[i], fwhm0, 0.5)
+        bounds = ([0, x[i] - fwhm0, step / 2, 0], [np.inf, x[i] + fwhm0, 10 * fwhm0, 1])
+        try:
+            params, _ = curve_fit(pseudo_voigt, x[window], signal[window], p0=p0,
+                                  bounds=bounds, maxfev=2000)
+        except (RuntimeError, ValueError):
+            params = p0
+        if params[0] >= min_snr * noise:
+            peaks.append(dict(zip(("amplitude", "centre", "fwhm", "eta"), map(float, params))))
+
+    kept = []
+    for peak in sorted(peaks, key=lambda p: -p["amplitude"]):
+        if all(abs(peak["centre"] - other["centre"]) > other["fwhm"] / 2 for other in kept):
+            kept.append(peak)
+    return sorted(kept, key=lambda p: p["centre"])
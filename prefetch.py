@@ -0,0 +1,257 @@
+"""Predictive prefetch of the process and technique pages.
+
+Opening a page decodes and rescales its illustrations (about half a second
+for the lithography process page) and, for step 9, simulates the etch
+animation (about a second). The main window offers only twelve pages, so the
+next one is easy to guess: pages the pointer or keyboard focus is on come
+first, then the pages that have followed the current one before, then the
+most opened, then the main window order. The Prefetcher does that work ahead
+of time in short slices the GUI runs while idle: every job is a generator
+that yields after each frame. A frame can take up to 70 ms (decoding and
+rescaling the largest PNGs) or 30 ms (one etch step), so prefetch jobs
+produce their frames on a decoder thread and the Tk thread only polls it.
+
+Results go to an LRU cache of scaled PIL frames that the page windows read
+through `frames` and `etch_frames`, which also count hits and misses.
+Prefetching fills the cache only to `fill` of its byte budget, and when the
+system runs low on memory it drops half the cache and pauses with an
+exponential back-off.
+"""
+import os
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from PIL import Image, ImageSequence
+
+import etch_sim
+import pages
+
+PAGES = ("Lithography", "Characterization") + pages.LITHO_TECHNIQUES + pages.CHAR_TECHNIQUES
+
+# The material the step 9 animation starts with
+ETCH_MATERIAL = "Si"
+
+
+def scale(frame, width):
+    return frame.resize((width, int(width * frame.height / frame.width)), Image.LANCZOS)
+
+
+def image_key(path, width, animated=False):
+    return ("image", os.path.abspath(path), width, animated)
+
+
+def page_items(name):
+    """Cache keys of everything page `name` loads when it opens."""
+    if name in pages.PROCESSES:
+        process = pages.PROCESSES[name]
+        return [image_key(pages.image_path(process["image_dir"], image), pages.STEP_IMAGE_WIDTH,
+                          image.lower().endswith('.gif')) if image else ("etch", ETCH_MATERIAL)
+                for _, _, image in process["steps"]]
+    page = pages.TECHNIQUES[name]
+    return [image_key(pages.image_path(page["image_dir"], page["image"]), pages.TECHNIQUE_IMAGE_WIDTH)]
+
+
+def _frames(key):
+    """Frames of `key`, each decoded, scaled or simulated when requested."""
+    if key[0] == "etch":
+        yield from etch_sim.etch_frames(key[1])
+        return
+    _, path, width, animated = key
+    with Image.open(path) as image:
+        for frame in ImageSequence.Iterator(image):
+            yield scale(frame.copy(), width)
+            if not animated:
+                break
+
+
+def _load(key, decoder=None):
+    """Generator yielding after each frame of `key`; returns the frame list.
+
+    With a `decoder` executor each frame is produced there, and the
+    generator yields the pending future until it is done."""
+    frames = []
+    steps = _frames(key)
+    while True:
+        if decoder is None:
+            frame = next(steps, None)
+        else:
+            future = decoder.submit(next, steps, None)
+            while not future.done():
+                yield future
+            frame = future.result()
+        if frame is None:
+            return frames
+        frames.append(frame)
+        yield
+
+
+def _nbytes(frames):
+    return sum(frame.width * frame.height * len(frame.getbands()) for frame in frames)
+
+
+def available_memory():
+    """Bytes of memory available to new allocations, None where unknown."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class Prefetcher:
+    """Cache of page frames filled ahead of demand; see the module docstring."""
+
+    def __init__(self, budget_mb=256, fill=0.9, min_available_mb=256, max_backoff_s=60.0):
+        self.budget = budget_mb * 2 ** 20
+        self.fill = fill
+        self.min_available = min_available_mb * 2 ** 20
+        self.max_backoff = max_backoff_s
+        self.cache = OrderedDict()
+        self.nbytes = 0
+        self.jobs = {}
+        self.failed = set()
+        self.hints = []
+        self.opens = Counter()
+        self.follows = Counter()
+        self.last_page = None
+        self.backoff = 0.0
+        self.paused_until = 0.0
+        self.stats = Counter()
+        self.decoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+
+    # Demand side: the page windows
+
+    def _lookup(self, key):
+        frames = self.cache.get(key)
+        if frames is None:
+            self.stats["misses"] += 1
+            return None
+        self.cache.move_to_end(key)
+        self.stats["hits"] += 1
+        return frames
+
+    def frames(self, path, width, animated=False):
+        """Scaled frames of an illustration (only the first unless `animated`),
+        from the cache or loaded now and cached."""
+        key = image_key(path, width, animated)
+        frames = self._lookup(key)
+        if frames is None:
+            # A half-done prefetch job finishes here rather than starting over
+            job = self.jobs.pop(key, None) or _load(key)
+            frames = self._finish(job)
+            self._store(key, frames)
+        return frames
+
+    def etch_frames(self, material):
+        """Cached frames of the step 9 etch animation, or None to simulate it live."""
+        return self._lookup(("etch", material))
+
+    def opened(self, name):
+        """Record that page `name` opened and whether it was already warm."""
+        self.stats["pages"] += 1
+        if all(key in self.cache for key in page_items(name)):
+            self.stats["warm_pages"] += 1
+        if self.last_page is not None:
+            self.follows[self.last_page, name] += 1
+        self.opens[name] += 1
+        self.last_page = name
+        self.hints = [page for page in self.hints if page != name]
+
+    def hint(self, name):
+        """Page `name` is under the pointer or has focus: warm it next."""
+        self.hints = [name] + [page for page in self.hints if page != name][:3]
+
+    def hit_rate(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else None
+
+    def summary(self):
+        return {"hit_rate": self.hit_rate(), "pages": self.stats["pages"], "warm_pages": self.stats["warm_pages"],
+                "cached_mb": self.nbytes / 2 ** 20, "evictions": self.stats["evictions"],
+                "backoffs": self.stats["backoffs"]}
+
+    # Supply side: idle-time slices
+
+    def ranking(self):
+        """Pages from most to least likely to open next."""
+        order = {name: rank for rank, name in enumerate(PAGES)}
+        rest = sorted((page for page in PAGES if page not in self.hints),
+                      key=lambda page: (-self.follows[self.last_page, page], -self.opens[page], order[page]))
+        return self.hints + rest
+
+    def _next_job(self):
+        for page in self.ranking():
+            for key in page_items(page):
+                if key not in self.cache and key not in self.failed:
+                    if key not in self.jobs:
+                        self.jobs[key] = _load(key, self.decoder)
+                    return key
+        return None
+
+    def run(self, seconds=0.01):
+        """Prefetch for about `seconds`. Returns the seconds to wait before
+        the next slice (0 to continue when idle again), or None when
+        everything is cached or the cache is full."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self._memory_pressure():
+            return self.paused_until - now
+        deadline = now + seconds
+        while time.monotonic() < deadline:
+            if self.nbytes >= self.fill * self.budget:
+                return None
+            key = self._next_job()
+            if key is None:
+                return None
+            try:
+                if next(self.jobs[key]) is not None:
+                    # The decoder thread has the frame; check again next slice
+                    return 0.0
+            except StopIteration as done:
+                del self.jobs[key]
+                self._store(key, done.value)
+            except Exception as e:
+                del self.jobs[key]
+                self.failed.add(key)
+                print(f"Error prefetching {key[1]}: {e}")
+        return 0.0
+
+    def _finish(self, job):
+        try:
+            while True:
+                pending = next(job)
+                if pending is not None:
+                    wait([pending])
+        except StopIteration as done:
+            return done.value
+
+    def _store(self, key, frames):
+        self.cache[key] = frames
+        self.nbytes += _nbytes(frames)
+        while self.nbytes > self.budget and len(self.cache) > 1:
+            self._evict()
+
+    def _evict(self):
+        _, frames = self.cache.popitem(last=False)
+        self.nbytes -= _nbytes(frames)
+        self.stats["evictions"] += 1
+
+    def _memory_pressure(self):
+        """Drop half the cache and pause when the system is short of memory."""
+        available = available_memory()
+        if available is None or available >= self.min_available:
+            self.backoff = 0.0
+            return False
+        target = self.nbytes / 2
+        while self.cache and self.nbytes > target:
+            self._evict()
+        self.jobs.clear()
+        self.backoff = min(self.max_backoff, max(1.0, 2 * self.backoff))
+        self.paused_until = time.monotonic() + self.backoff
+        self.stats["backoffs"] += 1
+        return True
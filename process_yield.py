@@ -0,0 +1,213 @@
+"""Monte Carlo process-window and yield estimation.
+
+Every sample is one die. The process parameters quoted on the process page
+(bake temperatures, development temperature, hard-bake CD change, overlay)
+plus exposure dose and focus are drawn from their distributions and pushed
+through first-order CD response models:
+    CD = target + dose slope x dose error - Bossung curvature x defocus^2
+         + bake and develop slopes x temperature errors
+         - (hard-bake flow - mean flow) + local CD noise
+(the mean hard-bake shrink is assumed to be biased out on the mask). A die
+passes when its CD is within tolerance of target, its radial overlay is
+below the overlay spec, the soft bake stayed inside its window and it
+caught no killer defect (Poisson with the page's defect density).
+
+Samples are generated in fixed-size vectorized batches, each with its own
+stream spawned from one SeedSequence, so results depend only on the seed
+and batch size, never on how many worker processes ran the batches.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bake_thermal import PROFILES
+
+# Tolerances from the process page are read as +-3 sigma
+PARAMETERS = {
+    "Dose": {"mean": 0.0, "sigma": 1.0, "unit": "%"},
+    "Focus": {"mean": 0.0, "sigma": 25.0, "unit": "nm"},
+    "Soft bake": {"mean": PROFILES["Soft bake"]["setpoint"],
+                  "sigma": PROFILES["Soft bake"]["tolerance"] / 3, "unit": "°C"},
+    "PEB": {"mean": PROFILES["PEB"]["setpoint"], "sigma": PROFILES["PEB"]["tolerance"] / 3, "unit": "°C"},
+    "Develop": {"mean": 23.0, "sigma": 0.5 / 3, "unit": "°C"},
+    "Hard bake flow": {"low": 5.0, "high": 20.0, "unit": "nm"},
+    "Overlay": {"mean": 0.0, "sigma": 2.0 / 3, "unit": "nm"},
+    "Local CD": {"mean": 0.0, "sigma": 1.5, "unit": "nm"},
+}
+
+# CD change per unit parameter error (nm per % dose, nm per °C);
+# "Focus" is the Bossung curvature: CD falls 10% of a 100 nm line at 150 nm defocus
+SENSITIVITY = {
+    "Dose": -1.5,
+    "Focus": 10.0 / 150.0 ** 2,
+    "Soft bake": -0.5,
+    "PEB": -5.0,
+    "Develop": -1.0,
+}
+
+SPEC = {
+    "target_cd_nm": 100.0,
+    "cd_tolerance": 0.10,
+    "overlay_nm": 2.0,
+    "soft_bake_window": PROFILES["Soft bake"]["window"],
+    "defect_density_cm2": 0.01,
+    "die_area_cm2": 1.0,
+}
+
+CAUSES = ("CD", "Overlay", "Soft bake window", "Defects")
+
+# Across-wafer signatures reaching these values at the wafer edge, growing
+# with radius squared: defocus from wafer bow and PEB plate non-uniformity
+WAFER_SIGNATURE = {"Focus": 60.0, "PEB": PROFILES["PEB"]["tolerance"]}
+
+
+def sample(rng, n, scale=1.0):
+    """Draw `n` dies of every parameter; `scale` multiplies all spreads."""
+    out = {}
+    for name, p in PARAMETERS.items():
+        if "sigma" in p:
+            out[name] = rng.normal(p["mean"], p["sigma"] * scale, n)
+        else:
+            middle, half = (p["high"] + p["low"]) / 2, (p["high"] - p["low"]) / 2 * scale
+            out[name] = rng.uniform(middle - half, middle + half, n)
+    out["Overlay y"] = rng.normal(PARAMETERS["Overlay"]["mean"], PARAMETERS["Overlay"]["sigma"] * scale, n)
+    return out
+
+
+def critical_dimension(params, target=SPEC["target_cd_nm"], dose_offset=0.0, focus_offset=0.0):
+    """CD of every sampled die, nm, with the exposure centred at (dose_offset %, focus_offset nm)."""
+    flow = PARAMETERS["Hard bake flow"]
+    defocus = params["Focus"] + focus_offset
+    cd = target * (1 - SENSITIVITY["Focus"] / 100 * defocus ** 2)
+    cd += SENSITIVITY["Dose"] * (params["Dose"] + dose_offset)
+    for name in ("Soft bake", "PEB", "Develop"):
+        cd += SENSITIVITY[name] * (params[name] - PARAMETERS[name]["mean"])
+    cd -= params["Hard bake flow"] - (flow["low"] + flow["high"]) / 2
+    return cd + params["Local CD"]
+
+
+def failures(params, cd, spec, rng):
+    """Boolean fail mask per cause; a die can fail for several causes."""
+    low, high = spec["soft_bake_window"]
+    mean_defects = spec["defect_density_cm2"] * spec["die_area_cm2"]
+    return {
+        "CD": np.abs(cd - spec["target_cd_nm"]) > spec["cd_tolerance"] * spec["target_cd_nm"],
+        "Overlay": np.hypot(params["Overlay"], params["Overlay y"]) > spec["overlay_nm"],
+        "Soft bake window": (params["Soft bake"] < low) | (params["Soft bake"] > high),
+        "Defects": rng.poisson(mean_defects, len(cd)) > 0,
+    }
+
+
+def wafer_cd(columns, rows, die_size=(10.0, 10.0), diameter=300.0, scale=1.0, seed=0):
+    """CD (nm) of the dies at die grid (columns, rows), with the wafer signatures.
+
+    The hard bake is one oven run, so its CD change is shared by the wafer.
+    """
+    params = sample(np.random.default_rng(seed), len(columns), scale)
+    params["Hard bake flow"] = np.full(len(columns), params["Hard bake flow"][0])
+    x = (np.asarray(columns) + 0.5) * die_size[0]
+    y = (np.asarray(rows) + 0.5) * die_size[1]
+    edge = (x ** 2 + y ** 2) / (diameter / 2) ** 2
+    for name, amplitude in WAFER_SIGNATURE.items():
+        params[name] = params[name] + amplitude * edge
+    return critical_dimension(params)
+
+
+def wafer_defects(diameter=300.0, density=SPEC["defect_density_cm2"], seed=0):
+    """Positions (x, y mm) of killer defects scattered uniformly over a wafer."""
+    rng = np.random.default_rng(seed)
+    count = rng.poisson(density * np.pi * (diameter / 20) ** 2)
+    radius = diameter / 2 * np.sqrt(rng.uniform(0, 1, count))
+    angle = rng.uniform(0, 2 * np.pi, count)
+    return radius * np.cos(angle), radius * np.sin(angle)
+
+
+def _yield_batch(seed, n, scale, spec, tolerance_edges, cd_edges):
+    rng = np.random.default_rng(seed)
+    params = sample(rng, n, scale)
+    cd = critical_dimension(params, spec["target_cd_nm"])
+    fails = failures(params, cd, spec, rng)
+    other = ~(fails["Overlay"] | fails["Soft bake window"] | fails["Defects"])
+    error = np.abs(cd - spec["target_cd_nm"]) / spec["target_cd_nm"]
+    return {"samples": n, "passed": int((other & ~fails["CD"]).sum()),
+            "fails": {cause: int(mask.sum()) for cause, mask in fails.items()},
+            "tolerance_counts": np.histogram(error[other], tolerance_edges)[0],
+            "cd_counts": np.histogram(cd, cd_edges)[0]}
+
+
+def _window_column(seed, n, scale, spec, dose_offsets, focus):
+    rng = np.random.default_rng(seed)
+    params = sample(rng, n, scale)
+    fails = failures(params, critical_dimension(params, spec["target_cd_nm"]), spec, rng)
+    other = ~(fails["Overlay"] | fails["Soft bake window"] | fails["Defects"])
+    limit = spec["cd_tolerance"] * spec["target_cd_nm"]
+    column = np.empty(len(dose_offsets))
+    for i, dose in enumerate(dose_offsets):
+        # The same dies at every dose, so the column is smooth in dose
+        cd = critical_dimension(params, spec["target_cd_nm"], dose, focus)
+        column[i] = (other & (np.abs(cd - spec["target_cd_nm"]) <= limit)).mean()
+    return column
+
+
+def _map(func, tasks, max_workers):
+    if len(tasks) == 1 or max_workers == 1:
+        return [func(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(func, *zip(*tasks)))
+
+
+def run(samples=1_000_000, scale=1.0, spec=None, seed=0, batch=1 << 17, max_workers=None):
+    """Monte Carlo yield of `samples` dies.
+
+    Returns the yield, fail counts per cause, the yield against CD tolerance
+    (`tolerance_curve`: tolerance fraction, yield, with the other criteria
+    applied) and the CD histogram (`cd_histogram`: bin edges nm, counts).
+    """
+    spec = dict(SPEC, **(spec or {}))
+    tolerance_edges = np.linspace(0, 0.3, 301)
+    target = spec["target_cd_nm"]
+    cd_edges = np.linspace(0.7 * target, 1.3 * target, 121)
+    sizes = [min(batch, samples - start) for start in range(0, samples, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    parts = _map(_yield_batch, [(s, n, scale, spec, tolerance_edges, cd_edges) for s, n in zip(seeds, sizes)],
+                 max_workers)
+    passed = sum(part["passed"] for part in parts)
+    tolerance_counts = sum(part["tolerance_counts"] for part in parts)
+    return {"samples": samples, "yield": passed / samples,
+            "fails": {cause: sum(part["fails"][cause] for part in parts) / samples for cause in CAUSES},
+            "tolerance_curve": (tolerance_edges[1:], np.cumsum(tolerance_counts) / samples),
+            "cd_histogram": (cd_edges, sum(part["cd_counts"] for part in parts)),
+            "spec": spec, "scale": scale}
+
+
+def _widest_run(flags, values):
+    """Width of the longest run of True flags along evenly spaced `values`,
+    from its first to its last passing point (0 for a single point)."""
+    best = length = 0
+    for flag in flags:
+        length = length + 1 if flag else 0
+        best = max(best, length)
+    step = values[1] - values[0] if len(values) > 1 else 0.0
+    return max(best - 1, 0) * step
+
+
+def process_window(dose_offsets=None, focus_offsets=None, samples=4096, scale=1.0, spec=None, seed=0,
+                   threshold=0.9, min_latitude=3.0, max_workers=None):
+    """Yield over a dose (%) x focus (nm) grid of exposure centres.
+
+    Each focus column samples its own dies from a spawned stream. Returns
+    the (dose, focus) yield map, the exposure latitude (% dose range with
+    yield >= `threshold`) at every focus and the depth of focus over which
+    the latitude is at least `min_latitude` %.
+    """
+    spec = dict(SPEC, **(spec or {}))
+    dose_offsets = np.linspace(-10, 10, 41) if dose_offsets is None else np.asarray(dose_offsets, dtype=float)
+    focus_offsets = np.linspace(-200, 200, 41) if focus_offsets is None else np.asarray(focus_offsets, dtype=float)
+    seeds = np.random.SeedSequence(seed).spawn(len(focus_offsets))
+    columns = _map(_window_column, [(s, samples, scale, spec, dose_offsets, f)
+                                    for s, f in zip(seeds, focus_offsets)], max_workers)
+    window = np.column_stack(columns)
+    latitude = np.array([_widest_run(column >= threshold, dose_offsets) for column in window.T])
+    return {"dose": dose_offsets, "focus": focus_offsets, "yield": window, "latitude": latitude,
+            "dof": _widest_run(latitude >= min_latitude, focus_offsets),
+            "threshold": threshold, "min_latitude": min_latitude}
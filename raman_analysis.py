@@ -0,0 +1,368 @@
+"""Raman spectra and maps: ALS baseline, normalisation, peaks and library matching.
+
+Baselines use asymmetric least squares (Eilers and Boelens), minimising
+    sum w_i (y_i - z_i)^2 + lam sum (z_i-1 - 2 z_i + z_i+1)^2
+with w = p where the spectrum lies above the baseline and 1 - p below, for a
+few re-weighting passes. Identification ranks library references by their
+Pearson correlation with the baseline-corrected spectrum, which is a cosine
+similarity against a precomputed index of centred, unit-length references.
+"""
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+import measurement_io
+import peak_fitting
+from result_cache import CACHE_ROOT, file_digest
+
+SPECTRUM_EXTENSIONS = ('.csv', '.txt', '.dat', '.xy')
+
+
+def load_spectrum(path):
+    """(Raman shift cm^-1, intensity) of a single spectrum file."""
+    measurement = measurement_io.open_measurement(path)
+    sweep = measurement.sweep(measurement.devices[0])
+    shift = np.asarray(sweep[measurement.columns[-2]], dtype=float)
+    intensity = np.asarray(sweep[measurement.columns[-1]], dtype=float)
+    keep = np.isfinite(shift) & np.isfinite(intensity)
+    shift, intensity = shift[keep], intensity[keep]
+    order = np.argsort(shift)
+    return shift[order], intensity[order]
+
+
+def _unique(values, chunk=1 << 22):
+    axis = np.empty(0)
+    for start in range(0, len(values), chunk):
+        block = np.asarray(values[start:start + chunk], dtype=float)
+        axis = np.union1d(axis, block[np.isfinite(block)])
+    return axis
+
+
+def load_map(path, chunk=1 << 22):
+    """(shift axis, (rows, cols, bands) float32 cube) of a hyperspectral map.
+
+    Accepts .npz files holding "shift" and "spectra" arrays, and long-format
+    "x y shift intensity" exports, which go through measurement_io so large
+    maps are converted once and then read memory-mapped, chunk by chunk.
+    """
+    if path.lower().endswith('.npz'):
+        with np.load(path) as data:
+            return np.asarray(data['shift'], dtype=float), np.asarray(data['spectra'], dtype=np.float32)
+
+    measurement = measurement_io.open_measurement(path)
+    columns = [measurement.column(name) for name in measurement.columns]
+    if len(columns) >= 4:
+        x, y, shift, intensity = columns[-4:]
+    else:
+        # Headerless exports carry x in the device label column
+        y, shift, intensity = columns[-3:]
+        x = np.empty(measurement.rows)
+        for device, start, stop in measurement.sweep_ranges():
+            x[start:stop] = float(device)
+    x_axis, y_axis, shift_axis = _unique(x, chunk), _unique(y, chunk), _unique(shift, chunk)
+    cube = np.zeros((len(y_axis), len(x_axis), len(shift_axis)), dtype=np.float32)
+    for start in range(0, measurement.rows, chunk):
+        stop = start + chunk
+        keep = np.isfinite(x[start:stop]) & np.isfinite(y[start:stop]) & np.isfinite(shift[start:stop])
+        cube[np.searchsorted(y_axis, y[start:stop][keep]),
+             np.searchsorted(x_axis, x[start:stop][keep]),
+             np.searchsorted(shift_axis, shift[start:stop][keep])] = intensity[start:stop][keep]
+    return shift_axis, cube
+
+
+def _penalty(n, lam):
+    D = sparse.diags([1.0, -2.0, 1.0], [0, 1, 2], shape=(n - 2, n))
+    return (lam * (D.T @ D)).tocsc()
+
+
+def als_baseline(intensity, lam=1e5, p=0.01, iterations=10):
+    """ALS baseline of one spectrum, one sparse solve per re-weighting."""
+    y = np.asarray(intensity, dtype=float)
+    penalty = _penalty(len(y), lam)
+    w = np.ones(len(y))
+    for _ in range(iterations):
+        z = spsolve(sparse.diags(w, format='csc') + penalty, w * y)
+        w = np.where(y > z, p, 1 - p)
+    return z
+
+
+def _solve_pentadiagonal(a, b, c, rhs):
+    """Solve symmetric positive definite pentadiagonal systems side by side.
+
+    `a` and `rhs` are (n, batch): every system has its own main diagonal but
+    they share the off-diagonals `b` (n - 1) and `c` (n - 2). The LDL^T
+    factorisation and both substitutions step along n, each step vectorized
+    over the batch; with f_i d_i = c_i the factor needs 1/d, e and f only.
+    """
+    n, batch = a.shape
+    inv_d = np.empty_like(a)
+    e = np.zeros_like(a)
+    f = np.zeros_like(a)
+    z = np.empty_like(rhs)
+    g = np.full(batch, b[0] if n > 1 else 0.0)
+    for i in range(n):
+        d = a[i].copy()
+        zi = z[i]
+        zi[:] = rhs[i]
+        if i >= 1:
+            d -= g * e[i - 1]
+            zi -= e[i - 1] * z[i - 1]
+        if i >= 2:
+            d -= c[i - 2] * f[i - 2]
+            zi -= f[i - 2] * z[i - 2]
+        np.divide(1.0, d, out=inv_d[i])
+        if i < n - 1:
+            if i >= 1:
+                g = b[i] - c[i - 1] * e[i - 1]
+            np.multiply(g, inv_d[i], out=e[i])
+        if i < n - 2:
+            np.multiply(inv_d[i], c[i], out=f[i])
+    x = z * inv_d
+    for i in range(n - 2, -1, -1):
+        x[i] -= e[i] * x[i + 1]
+        if i < n - 2:
+            x[i] -= f[i] * x[i + 2]
+    return x
+
+
+def als_baseline_batch(spectra, lam=1e5, p=0.01, iterations=10, chunk=2048):
+    """ALS baselines of every spectrum along the last axis of `spectra`.
+
+    W + lam D^T D is pentadiagonal with the same off-diagonals for every
+    spectrum, so a chunk of spectra is one batched banded solve per
+    re-weighting pass. Spectra whose weights stop changing drop out of
+    later passes.
+    """
+    spectra = np.asarray(spectra)
+    flat = spectra.reshape(-1, spectra.shape[-1])
+    penalty = _penalty(flat.shape[1], lam)
+    main, first, second = penalty.diagonal(0), penalty.diagonal(1), penalty.diagonal(2)
+    baseline = np.empty(flat.shape, dtype=float)
+    for start in range(0, len(flat), chunk):
+        y = np.ascontiguousarray(flat[start:start + chunk].T, dtype=float)
+        z = np.empty_like(y)
+        active = np.arange(y.shape[1])
+        ya = y
+        wa = np.ones_like(y)
+        for _ in range(iterations):
+            za = _solve_pentadiagonal(wa + main[:, None], first, second, wa * ya)
+            updated = np.where(ya > za, p, 1 - p)
+            changed = (updated != wa).any(axis=0)
+            if not changed.all():
+                # Converged spectra keep this solve; the rest are compacted
+                z[:, active[~changed]] = za[:, ~changed]
+                active, ya, za, updated = active[changed], ya[:, changed], za[:, changed], updated[:, changed]
+            wa = updated
+            if not len(active):
+                break
+        z[:, active] = za
+        baseline[start:start + chunk] = z.T
+    return baseline.reshape(spectra.shape)
+
+
+def normalise(spectra, method="area"):
+    """Scale spectra along the last axis.
+
+    "area" gives unit integral, "max" unit peak, "l2" unit length and "snv"
+    zero mean with unit standard deviation.
+    """
+    spectra = np.asarray(spectra, dtype=float)
+    if method == "snv":
+        centred = spectra - spectra.mean(axis=-1, keepdims=True)
+        return centred / np.maximum(centred.std(axis=-1, keepdims=True), 1e-12)
+    scale = {"area": lambda s: np.abs(s).sum(axis=-1, keepdims=True),
+             "max": lambda s: np.abs(s).max(axis=-1, keepdims=True),
+             "l2": lambda s: np.linalg.norm(s, axis=-1, keepdims=True)}[method](spectra)
+    return spectra / np.maximum(scale, 1e-12)
+
+
+def fit_peaks(shift, corrected, min_snr=5.0, max_peaks=30):
+    """Pseudo-Voigt bands of a baseline-corrected spectrum keyed by shift."""
+    peaks = peak_fitting.fit_peaks(shift, corrected, min_snr, max_peaks)
+    return [{"amplitude": p["amplitude"], "shift": p["centre"], "fwhm": p["fwhm"], "eta": p["eta"]}
+            for p in peaks]
+
+
+def load_library(path):
+    """Reference spectra as a list of (name, shift, intensity).
+
+    A directory holds one spectrum file per reference, named after the file;
+    a single file is a table of shift followed by one column per reference.
+    """
+    if os.path.isdir(path):
+        references = []
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith(SPECTRUM_EXTENSIONS):
+                shift, intensity = load_spectrum(os.path.join(path, name))
+                references.append((os.path.splitext(name)[0], shift, intensity))
+        return references
+    measurement = measurement_io.open_measurement(path)
+    shift = np.asarray(measurement.column(measurement.columns[0]), dtype=float)
+    order = np.argsort(shift)
+    references = []
+    for name in measurement.columns[1:]:
+        intensity = np.asarray(measurement.column(name), dtype=float)[order]
+        # A reference that does not cover the whole table has empty cells there
+        keep = np.isfinite(shift[order]) & np.isfinite(intensity)
+        references.append((name, shift[order][keep], intensity[keep]))
+    return references
+
+
+class SpectralIndex:
+    """Cosine-similarity index of reference spectra on a fixed shift axis.
+
+    Reference vectors are baseline-corrected, mean-centred and unit length,
+    so their dot product with a query prepared the same way is the Pearson
+    correlation. Libraries with more references than `dims` also keep their
+    leading principal directions: queries are ranked in that subspace first
+    and only the best candidates are re-scored exactly.
+    """
+
+    def __init__(self, names, shift, vectors, basis=None):
+        self.names = list(names)
+        self.shift = shift
+        self.vectors = vectors
+        self.basis = basis
+        self.reduced = vectors @ basis.T if basis is not None else None
+
+    @classmethod
+    def build(cls, references, shift, lam=1e5, p=0.01, dims=64):
+        raw = np.array([np.interp(shift, s, i, left=np.nan, right=np.nan) for _, s, i in references])
+        # Bands a reference does not cover carry no information for it
+        covered = np.isfinite(raw)
+        raw = np.where(covered, raw, 0.0)
+        corrected = np.where(covered, raw - als_baseline_batch(raw, lam, p), 0.0)
+        vectors = cls._prepare(corrected)
+        basis = None
+        if len(vectors) > dims:
+            _, _, vt = np.linalg.svd(vectors, full_matrices=False)
+            basis = np.ascontiguousarray(vt[:dims], dtype=np.float32)
+        return cls([name for name, _, _ in references], shift, vectors, basis)
+
+    @staticmethod
+    def _prepare(corrected):
+        corrected = np.asarray(corrected, dtype=np.float32)
+        centred = corrected - corrected.mean(axis=-1, keepdims=True)
+        return centred / np.maximum(np.linalg.norm(centred, axis=-1, keepdims=True), 1e-12)
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, names=np.array(self.names), shift=self.shift, vectors=self.vectors,
+                 basis=self.basis if self.basis is not None else np.empty((0, len(self.shift)), np.float32))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            basis = data['basis'] if len(data['basis']) else None
+            return cls(data['names'].tolist(), data['shift'], data['vectors'], basis)
+
+    def query(self, corrected, k=3, chunk=8192, candidates=16):
+        """Top-k (reference indices, correlations) of each baseline-corrected
+        spectrum along the last axis; the leading axes are kept."""
+        corrected = np.asarray(corrected)
+        flat = corrected.reshape(-1, corrected.shape[-1])
+        k = min(k, len(self.names))
+        indices = np.empty((len(flat), k), dtype=np.int32)
+        scores = np.empty((len(flat), k), dtype=np.float32)
+        for start in range(0, len(flat), chunk):
+            q = self._prepare(flat[start:start + chunk])
+            if self.basis is None:
+                similarity = q @ self.vectors.T
+                top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+                top_scores = np.take_along_axis(similarity, top, axis=1)
+            else:
+                approximate = (q @ self.basis.T) @ self.reduced.T
+                count = min(max(candidates, 4 * k), len(self.names))
+                shortlist = np.argpartition(-approximate, count - 1, axis=1)[:, :count]
+                exact = np.einsum('bn,bcn->bc', q, self.vectors[shortlist])
+                best = np.argpartition(-exact, k - 1, axis=1)[:, :k]
+                top = np.take_along_axis(shortlist, best, axis=1)
+                top_scores = np.take_along_axis(exact, best, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            indices[start:start + len(q)] = np.take_along_axis(top, order, axis=1)
+            scores[start:start + len(q)] = np.take_along_axis(top_scores, order, axis=1)
+        return indices.reshape(corrected.shape[:-1] + (k,)), scores.reshape(corrected.shape[:-1] + (k,))
+
+
+def _library_digest(path, params):
+    if not os.path.isdir(path):
+        return file_digest(path, params)
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith(SPECTRUM_EXTENSIONS):
+            digest.update(name.encode())
+            digest.update(file_digest(os.path.join(path, name)).encode())
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+
+def library_index(path, shift, lam=1e5, p=0.01, root=None):
+    """SpectralIndex of a library on `shift`, built once and cached on disk."""
+    params = {"shift": [float(shift[0]), float(shift[-1]), len(shift)], "lam": lam, "p": p}
+    directory = root or os.path.join(CACHE_ROOT, "raman_index")
+    cached = os.path.join(directory, _library_digest(path, params) + ".npz")
+    if os.path.exists(cached):
+        return SpectralIndex.load(cached)
+    index = SpectralIndex.build(load_library(path), shift, lam, p)
+    os.makedirs(directory, exist_ok=True)
+    index.save(cached)
+    return index
+
+
+def analyze_spectrum(shift, intensity, index=None, lam=1e5, p=0.01, k=3):
+    """Baseline, peaks and (with an index) library matches of one spectrum."""
+    baseline = als_baseline(intensity, lam, p)
+    corrected = intensity - baseline
+    result = {"shift": shift, "intensity": intensity, "baseline": baseline,
+              "peaks": fit_peaks(shift, corrected), "matches": []}
+    if index is not None:
+        indices, scores = index.query(np.interp(index.shift, shift, corrected), k)
+        result["matches"] = [(index.names[i], float(s)) for i, s in zip(indices, scores)]
+    return result
+
+
+# The library index of a classify_map worker, sent once by the pool initializer
+_worker_index = None
+
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _classify_chunk(shift, spectra, lam, p, k):
+    index = _worker_index
+    if len(shift) != len(index.shift) or not np.allclose(shift, index.shift):
+        spectra = np.array([np.interp(index.shift, shift, s) for s in spectra])
+    corrected = spectra - als_baseline_batch(spectra, lam, p)
+    return index.query(corrected, k)
+
+
+def classify_map(shift, cube, index, lam=1e5, p=0.01, k=1, chunk=2048, max_workers=None):
+    """Best `k` library matches of every pixel of a (rows, cols, bands) map.
+
+    Pixel chunks are baseline-corrected and matched in a process pool that
+    receives the index once per worker; at most two chunks per worker are in
+    flight, so memory does not grow with the map. Returns (reference
+    indices, correlations), each (rows, cols, k).
+    """
+    flat = cube.reshape(-1, cube.shape[-1])
+    k = min(k, len(index.names))
+    indices = np.empty((len(flat), k), dtype=np.int32)
+    scores = np.empty((len(flat), k), dtype=np.float32)
+    limit = 2 * (max_workers or os.cpu_count() or 1)
+    running = {}
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(index,)) as pool:
+        for start in range(0, len(flat), chunk):
+            running[pool.submit(_classify_chunk, shift, flat[start:start + chunk], lam, p, k)] = start
+            while len(running) >= limit or (running and start + chunk >= len(flat)):
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for job in done:
+                    begin = running.pop(job)
+                    indices[begin:begin + chunk], scores[begin:begin + chunk] = job.result()
+    return indices.reshape(cube.shape[:-1] + (k,)), scores.reshape(cube.shape[:-1] + (k,))
@@ -0,0 +1,91 @@
+"""Content-hash keyed result cache and a streaming process-pool runner.
+
+Per-file analyses (C-V, XRD, ...) store their JSON results under the SHA-256
+of the file contents plus the analysis parameters, so re-running a lab's
+dataset only processes files that are new or were analysed differently.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".microfab_cache")
+
+
+def file_digest(path, params=None, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    if params:
+        digest.update(json.dumps(params, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, name, root=CACHE_ROOT):
+        self.directory = os.path.join(root, name)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(value, f)
+        os.replace(tmp, path)
+
+
+def stream_analysis(paths, worker, cache, params=None, max_workers=None):
+    """Yield (path, result, from_cache) for every path as results become ready.
+
+    Paths are consumed lazily and at most two jobs per worker are in flight,
+    so arbitrarily long file lists stream in bounded memory. `worker(path,
+    **params)` must be a picklable module-level function returning a JSON
+    object. The cache is keyed by content, so the stored object leaves out
+    the path and every result is yielded with its own "file" added.
+    """
+    params = params or {}
+    limit = 2 * (max_workers or os.cpu_count() or 1)
+    running = {}
+    pool = None
+    try:
+        for path in paths:
+            key = file_digest(path, params)
+            hit = cache.get(key)
+            if hit is not None:
+                yield path, dict(hit, file=path), True
+                continue
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+            running[pool.submit(worker, path, **params)] = (path, key)
+            while len(running) >= limit:
+                yield from _collect(running, cache)
+        while running:
+            yield from _collect(running, cache)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+def _collect(running, cache):
+    done, _ = wait(running, return_when=FIRST_COMPLETED)
+    for future in done:
+        path, key = running.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            # Failed files are reported but not cached, so they are retried next run
+            yield path, {"error": str(e)}, False
+            continue
+        cache.put(key, result)
+        yield path, dict(result, file=path), False
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import ebeam_writetime
+
+# A 2 um^2 triangle in 1 nm database units
+TRIANGLE = np.array([[0, 0], [2000, 0], [1000, 2000]])
+
+
+def test_rounding_noise_does_not_split_off_slivers():
+    # 0.1 + 0.2 != 0.3: the top edge must still be one level
+    trapezoid = np.array([[0, 0], [1, 0], [0.8, 0.1 + 0.2], [0.2, 0.3]])
+    areas, rectangles = ebeam_writetime.figure_stats(trapezoid)
+    assert len(areas) == 1
+    assert rectangles == 0
+    assert areas[0] == 0.24
+
+
+def test_repeated_shapes_are_counted_once_per_copy_and_field():
+    # 12 x 12 copies at a 30 um pitch, scaled from database units as a GDS reader does
+    polygons = [(0, (TRIANGLE + [i * 30000 + 7, j * 30000 + 11]) * 1e-3) for i in range(12) for j in range(12)]
+    totals = ebeam_writetime.summarize(iter(polygons), [(100.0, 10.0), (250.0, 10.0)])
+    assert totals[100.0]["figures"] == totals[250.0]["figures"] == 144
+    assert totals[100.0]["fields"] == 16
+    assert totals[250.0]["fields"] == 4
+    assert totals[100.0]["stitched_shapes"] == totals[250.0]["stitched_shapes"] == 0
+    # 2 um^2 at a 10 nm step is exactly 20000 pixels per copy
+    assert totals[100.0]["pixels"] == {10.0: 144 * 20000}
+    assert totals[100.0]["area_um2"] == 288.0
+
+
+def test_pending_counts_flush_without_changing_totals():
+    # Some copies straddle the 100 um field edge and are stitched
+    polygons = [(0, (TRIANGLE * (1 + k % 5) + [k * 3000, 0]) * 1e-3) for k in range(50)]
+    tallies = []
+    for limit in (1, 4096):
+        tally = ebeam_writetime._FieldTally(100.0, [10.0], pending_limit=limit)
+        for _, points in polygons:
+            low, high = points.min(axis=0), points.max(axis=0)
+            key = np.round(points - points[0], 6).tobytes()
+            tally.add_polygon(points, (*low, *high), key, ebeam_writetime.figure_stats(points))
+        tallies.append(tally.summary())
+    assert tallies[0] == tallies[1]
+    assert tallies[0]["stitched_shapes"] > 0
+    assert tallies[0]["area_um2"] == pytest.approx(sum(2 * (1 + k % 5) ** 2 for k in range(50)))
+
+
+def test_batched_fracture_matches_single_polygons():
+    rng = np.random.default_rng(4)
+    angles = np.linspace(0, 2 * np.pi, 9)[:-1]
+    points = rng.uniform(0, 50, (100, 1, 2)) + rng.uniform(1, 5, (100, 8, 1)) * np.stack(
+        [np.cos(angles), np.sin(angles)], axis=1)
+    points[::4] = np.round(points[::4])
+    owner, traps = ebeam_writetime.fracture_batch(points, max_cells=1000)
+    for k, polygon in enumerate(points):
+        np.testing.assert_array_equal(traps[owner == k], ebeam_writetime.fracture(polygon))
+    assert ebeam_writetime.figure_stats_batch(points)[5][0].sum() == pytest.approx(
+        ebeam_writetime.trapezoid_area(ebeam_writetime.fracture(points[5])).sum())
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import ellipsometry
+
+
+def airy(film, thickness, substrate, wavelength, angle):
+    """Psi, Delta (degrees) of one film from the closed-form Airy sum of
+    Fresnel coefficients, N = n - ik."""
+    sin0 = np.sin(np.radians(angle))
+
+    def cos(n):
+        c = np.sqrt(1 - (sin0 / n) ** 2 + 0j)
+        return -c if (n * c).imag > 0 else c
+
+    def r_s(a, b):
+        return (a * cos(a) - b * cos(b)) / (a * cos(a) + b * cos(b))
+
+    def r_p(a, b):
+        return (b * cos(a) - a * cos(b)) / (b * cos(a) + a * cos(b))
+
+    phase = np.exp(-4j * np.pi * thickness * film * cos(film) / wavelength)
+    r = [(f(1.0, film) + f(film, substrate) * phase) / (1 + f(1.0, film) * f(film, substrate) * phase)
+         for f in (r_p, r_s)]
+    rho = r[0] / r[1]
+    return np.degrees(np.arctan(abs(rho))), np.degrees(np.angle(rho))
+
+
+@pytest.mark.parametrize("thickness", [0.0, 2.0, 10.0, 100.0, 450.0])
+@pytest.mark.parametrize("wavelength, angle", [(633.0, 70.0), (400.0, 65.0), (900.0, 75.0)])
+def test_single_film_matches_airy(thickness, wavelength, angle):
+    silicon = complex(ellipsometry.SILICON(wavelength))
+    oxide = complex(ellipsometry.MATERIALS["SiO2"](wavelength))
+    psi, delta = ellipsometry.psi_delta([(oxide, thickness)], silicon, wavelength, angle)
+    expected_psi, expected_delta = airy(oxide, thickness, silicon, wavelength, angle)
+    assert psi == pytest.approx(expected_psi, abs=1e-9)
+    assert ellipsometry._wrap(delta - expected_delta) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_silicon_absorbs_with_negative_imaginary_index():
+    assert complex(ellipsometry.SILICON(400.0)).imag < 0
+
+
+def test_fit_skips_missing_measurements():
+    model = ellipsometry.FilmModel("SiO2")
+    wavelength, angle = np.linspace(400, 900, 6), np.array([65.0, 70.0, 75.0])
+    psi, delta = model.evaluate(np.array([123.0, 50.0]), np.array([1.47, 1.46]), wavelength, angle)
+    psi[0, 3, 1] = np.nan
+    delta[0, :2] = np.nan
+    psi[1] = np.nan
+    table = ellipsometry.LookupTable.build(model, wavelength, angle, thickness=np.arange(0.0, 400.1, 2.0))
+    result = ellipsometry.fit(model, wavelength, angle, psi, delta, table)
+    assert result["thickness"][0] == pytest.approx(123.0, abs=1e-3)
+    assert result["index"][0] == pytest.approx(1.47, abs=1e-4)
+    assert np.isnan(result["thickness"][1])
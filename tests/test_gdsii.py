@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import gdsii
+import mask_view
+
+
+def shapes():
+    rng = np.random.default_rng(0)
+    polygons = []
+    for k in range(200):
+        x, y = rng.integers(0, 500, 2).astype(float)
+        if k % 3 == 0:
+            polygons.append((1 + k % 2, [(x, y), (x + 2, y), (x + 1, y + 2)]))
+        else:
+            polygons.append((1 + k % 2, [(x, y), (x + 1.5, y), (x + 1.5, y + 1), (x, y + 1)]))
+    return polygons
+
+
+def canonical(polygons):
+    return sorted((int(layer), np.round(np.asarray(points, dtype=float), 6).tobytes()) for layer, points in polygons)
+
+
+@pytest.fixture
+def gds(tmp_path):
+    path = str(tmp_path / "flat.gds")
+    gdsii.write(path, shapes())
+    return path
+
+
+def test_cells_hold_stacks_by_layer_and_vertex_count(gds):
+    library = gdsii.Library(gds)
+    stacks = library.cells["TOP"]["polygons"]
+    assert sorted((layer, stack.shape[1]) for layer, stack in stacks) == [(1, 3), (1, 4), (2, 3), (2, 4)]
+    assert sum(len(stack) for _, stack in stacks) == 200
+
+
+def test_flatten_round_trips_every_polygon(gds):
+    library = gdsii.Library(gds)
+    assert canonical(library.flatten()) == canonical(shapes())
+    batches = list(library.flatten_batches(batch=16))
+    assert all(len(placements) <= 16 for _, placements in batches)
+    assert sum(len(placements) for _, placements in batches) == 200
+
+
+def test_from_gds_matches_from_polygons(gds):
+    from_gds = mask_view.MaskLayout.from_gds(gds)
+    from_polygons = mask_view.MaskLayout.from_polygons(shapes())
+    assert canonical(from_gds.polygons()) == canonical(from_polygons.polygons())
+    assert from_gds.rectangles.sum() == from_polygons.rectangles.sum() == 133
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import imprint_flow
+
+
+def volume(flow, result):
+    """Resist per unit area (nm) in the film and the filled cavities."""
+    h = result["rlt_nm"][flow.mask]
+    fill = result["fill_map"][flow.mask]
+    return (h + flow.rho * flow.depth * 1e9 * fill).sum()
+
+
+@pytest.mark.parametrize("name", imprint_flow.TEST_TEMPLATES)
+@pytest.mark.parametrize("variant", ["UV-NIL", "Thermal NIL"])
+def test_closed_edges_conserve_volume(name, variant):
+    tool = imprint_flow.VARIANTS[variant]
+    flow = imprint_flow.ImprintFlow(imprint_flow.test_template(name, cell_mm=2.0), cell_mm=2.0, open_edges=False)
+    result = flow.run(tool["pressure"], tool["stiffness"], initial_nm=100.0)
+    assert result["steps"] > 0
+    assert volume(flow, result) == pytest.approx(100.0 * flow.size, rel=1e-9)
+
+
+def test_open_edges_only_lose_volume():
+    tool = imprint_flow.VARIANTS["UV-NIL"]
+    flow = imprint_flow.ImprintFlow(imprint_flow.test_template("Radial gradient", cell_mm=2.0), cell_mm=2.0)
+    result = flow.run(tool["pressure"], tool["stiffness"], initial_nm=100.0)
+    assert volume(flow, result) <= 100.0 * flow.size
+    assert np.nanmax(result["fill_map"]) <= 1.0
@@ -0,0 +1,17 @@
+import numpy as np
+
+import layout
+
+
+def test_batched_spans_match_single_polygon_spans():
+    rng = np.random.default_rng(3)
+    angles = np.linspace(0, 2 * np.pi, 7)[:-1]
+    centres = rng.uniform(-5, 45, (300, 2))
+    radii = rng.uniform(0.5, 6, (300, 6))
+    points = centres[:, None, :] + radii[..., None] * np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    expected = [layout.polygon_spans(p, (0, 0), 0.5, (60, 80)) for p in points]
+    expected = [np.concatenate(parts) for parts in zip(*(s for s in expected if s is not None))]
+    for max_rows in (1 << 18, 7):
+        got = layout.polygon_spans_batch(points, (0, 0), 0.5, (60, 80), max_rows=max_rows)
+        for part, reference in zip(got, expected):
+            np.testing.assert_array_equal(part, reference)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import measurement_io
+
+LOG = """device,V,I
+d1,0,1e-9
+d1,0.1,
+d1,0.2,3e-9,extra
+d1,,4e-9
+
+d2,0,2e-9
+d2,0.1
+"""
+
+
+def test_empty_cells_are_nan_and_malformed_rows_counted(tmp_path):
+    path = tmp_path / "log.csv"
+    path.write_text(LOG)
+    parsed = measurement_io.MeasurementFile.from_csv(str(path))
+    converted = measurement_io.MeasurementFile.from_binary(measurement_io.convert_csv(str(path)))
+    for measurement in (parsed, converted):
+        assert measurement.columns == ["V", "I"]
+        assert measurement.rejected == 2
+        assert measurement.index == {"d1": [[0, 3]], "d2": [[3, 4]]}
+        np.testing.assert_array_equal(measurement.column("V"), [0.0, 0.1, np.nan, 0.0])
+        np.testing.assert_array_equal(measurement.column("I"), [1e-9, np.nan, 4e-9, 2e-9])
+
+
+@pytest.mark.parametrize("text", ["V,I,\n0.1,1e-9,\n0.2,,\n0.3,3e-9,,\n", "0.1,1e-9,\n0.2,,\n0.3,3e-9,,\n"])
+def test_trailing_delimiter_adds_no_column(tmp_path, text):
+    path = tmp_path / "trail.csv"
+    path.write_text(text)
+    measurement = measurement_io.MeasurementFile.from_csv(str(path))
+    assert len(measurement.columns) == 2
+    assert measurement.rejected == 0
+    np.testing.assert_array_equal(measurement.column(measurement.columns[0]), [0.1, 0.2, 0.3])
+    np.testing.assert_array_equal(measurement.column(measurement.columns[1]), [1e-9, np.nan, 3e-9])
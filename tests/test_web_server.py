@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+
+import pytest
+
+import web_server
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = web_server.PageServer()
+    yield server
+    server.close()
+
+
+async def fetch(reader, writer, method="GET", path="/", **headers):
+    """(status, headers, body) of one keep-alive request."""
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost"]
+    lines += [f"{name.replace('_', '-')}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status_line, *header_lines = head.rstrip("\r\n").split("\r\n")
+    reply = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        reply[name.strip().lower()] = value.strip()
+    length = int(reply.get("content-length", 0)) if method != "HEAD" else 0
+    body = await reader.readexactly(length) if length else b""
+    return int(status_line.split()[1]), reply, body
+
+
+def run(server, scenario):
+    """Run scenario(port) against the server listening on a free port."""
+    async def main():
+        listener = await server.start("127.0.0.1", 0)
+        async with listener:
+            return await scenario(listener.sockets[0].getsockname()[1])
+    return asyncio.run(main())
+
+
+def session(server, *requests):
+    """Replies to `requests` ((method, path, headers)) sent over one connection."""
+    async def scenario(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            return [await fetch(reader, writer, method, path, **headers) for method, path, headers in requests]
+        finally:
+            writer.close()
+    return run(server, scenario)
+
+
+def test_page_is_gzipped_for_clients_that_accept_it(server):
+    identity, compressed = session(server, ("GET", "/", {}), ("GET", "/", {"Accept_Encoding": "gzip, br"}))
+    assert identity[0] == compressed[0] == 200
+    assert "content-encoding" not in identity[1]
+    assert compressed[1]["content-encoding"] == "gzip"
+    assert gzip.decompress(compressed[2]) == identity[2] == server.assets["/"]["body"]
+    assert identity[1]["etag"] == server.assets["/"]["etag"]
+    assert compressed[1]["etag"] == server.assets["/"]["gzip_etag"] != identity[1]["etag"]
+
+
+def test_conditional_requests_are_not_modified(server):
+    asset = server.assets["/style.css"]
+    replies = session(server, ("GET", "/style.css", {"If_None_Match": asset["etag"]}),
+                      ("GET", "/style.css", {"Accept_Encoding": "gzip", "If_None_Match": asset["gzip_etag"]}),
+                      ("GET", "/style.css", {"If_Modified_Since": asset["last_modified"]}),
+                      ("GET", "/style.css", {"Accept_Encoding": "gzip", "If_None_Match": asset["etag"]}))
+    assert [status for status, _, _ in replies] == [304, 304, 304, 200]
+    assert all(body == b"" for _, _, body in replies[:3])
+
+
+def test_range_is_served_from_identity_body_with_its_etag(server):
+    asset = server.assets["/index.html"]
+    (status, reply, body), = session(server, ("GET", "/index.html", {"Accept_Encoding": "gzip", "Range": "bytes=10-19"}))
+    assert status == 206
+    assert body == asset["body"][10:20]
+    assert reply["content-range"] == f"bytes 10-19/{len(asset['body'])}"
+    assert reply["etag"] == asset["etag"]
+    assert "content-encoding" not in reply
+
+
+def test_if_range_with_stale_etag_sends_whole_body(server):
+    asset = server.assets["/index.html"]
+    (status, reply, body), = session(server, ("GET", "/index.html", {"Range": "bytes=0-9", "If_Range": '"stale"'}))
+    assert status == 200
+    assert body == asset["body"]
+
+
+def test_unsatisfiable_range(server):
+    length = len(server.assets["/"]["body"])
+    (status, reply, body), = session(server, ("GET", "/", {"Range": f"bytes={length}-"}))
+    assert status == 416
+    assert reply["content-range"] == f"bytes */{length}"
+    assert body == b""
+
+
+def test_head_has_headers_without_body(server):
+    get, head = session(server, ("GET", "/", {"Accept_Encoding": "gzip"}), ("HEAD", "/", {"Accept_Encoding": "gzip"}))
+    assert head[0] == 200
+    assert head[1]["content-length"] == get[1]["content-length"]
+    assert head[1]["etag"] == get[1]["etag"]
+    assert head[2] == b""
+
+
+def test_unknown_path_and_method(server):
+    missing, post = session(server, ("GET", "/missing.html", {}), ("DELETE", "/", {}))
+    assert missing[0] == 404
+    assert post[0] == 405
+
+
+def test_many_concurrent_clients(server):
+    paths = [path for path in server.assets if not path.startswith("/images/")][:5]
+
+    async def client(port, number):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            replies = [await fetch(reader, writer, "GET", paths[(number + i) % len(paths)], Accept_Encoding="gzip")
+                       for i in range(5)]
+        finally:
+            writer.close()
+        return all(status == 200 and gzip.decompress(body) == server.assets[paths[(number + i) % len(paths)]]["body"]
+                   for i, (status, _, body) in enumerate(replies))
+
+    async def scenario(port):
+        return await asyncio.gather(*(client(port, number) for number in range(300)))
+
+    assert all(run(server, scenario))
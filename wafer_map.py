@@ -0,0 +1,191 @@
+"""Wafer maps of per-die values.
+
+Dies sit on an integer (column, row) grid, die (i, j) spanning
+[i w, (i + 1) w) x [j h, (j + 1) h) mm from the wafer centre. The values are
+held in one 2-D array with a pyramid of 2x2 reductions, and every view is
+rasterized straight from the level that has about one die per screen pixel,
+so a map of hundreds of thousands of dies costs one gather and one colour
+lookup per redraw. Colour bins are edges over the values: re-binning only
+changes the edges and palette, never the arrays. A grid of die indices
+answers hover queries by lookup.
+"""
+import re
+
+import numpy as np
+
+from image_pyramid import VIRIDIS
+
+NO_DIE = (225, 225, 225)
+EDGE = (90, 90, 90)
+
+
+def die_grid(diameter=300.0, die_size=(10.0, 10.0), edge_exclusion=3.0):
+    """(columns, rows) of the complete dies inside the wafer's usable radius."""
+    w, h = die_size
+    radius = diameter / 2 - edge_exclusion
+    i = np.arange(int(np.floor(-radius / w)), int(np.ceil(radius / w)))
+    j = np.arange(int(np.floor(-radius / h)), int(np.ceil(radius / h)))
+    columns, rows = np.meshgrid(i, j)
+    # The corner farthest from the centre decides
+    far_x = np.maximum(np.abs(columns * w), np.abs((columns + 1) * w))
+    far_y = np.maximum(np.abs(rows * h), np.abs((rows + 1) * h))
+    keep = far_x ** 2 + far_y ** 2 <= radius ** 2
+    return columns[keep], rows[keep]
+
+
+def _block(a, func, fill):
+    """Combine 2x2 blocks with `func`, padding odd edges with `fill`."""
+    if a.shape[0] % 2:
+        a = np.concatenate([a, np.full((1, a.shape[1]), fill)], axis=0)
+    if a.shape[1] % 2:
+        a = np.concatenate([a, np.full((a.shape[0], 1), fill)], axis=1)
+    return func(func(a[0::2, 0::2], a[1::2, 0::2]), func(a[0::2, 1::2], a[1::2, 1::2]))
+
+
+class WaferMap:
+    """Per-die values rasterized on demand.
+
+    `reduce` is how dies are merged when several share a screen pixel:
+    "mean", or "max" so that isolated bad dies stay visible. The map has
+    the `shape` and `render_view` of an image pyramid (one pixel per die),
+    so it can be shown in any pan/zoom image viewer. Without a `diameter`
+    the wafer outline is the smallest circle around all dies.
+    """
+
+    def __init__(self, columns, rows, values, die_size=(10.0, 10.0), diameter=None, reduce="mean",
+                 bins=16, binning="linear", colormap=VIRIDIS):
+        self.columns = np.asarray(columns, dtype=np.int64)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.values = np.asarray(values, dtype=float)
+        if not len(self.values):
+            raise ValueError("a wafer map needs at least one die")
+        self.die_size = tuple(float(v) for v in die_size)
+        if diameter is None:
+            w, h = self.die_size
+            far_x = np.maximum(np.abs(self.columns * w), np.abs((self.columns + 1) * w))
+            far_y = np.maximum(np.abs(self.rows * h), np.abs((self.rows + 1) * h))
+            diameter = 2 * np.hypot(far_x, far_y).max()
+        self.diameter = float(diameter)
+        self.colormap = colormap
+        self.col0, self.row0 = int(self.columns.min()), int(self.rows.max())
+        self.shape = (self.row0 - int(self.rows.min()) + 1, int(self.columns.max()) - self.col0 + 1)
+        r, c = self.row0 - self.rows, self.columns - self.col0
+        self.ids = np.full(self.shape, -1, dtype=np.int32)
+        self.ids[r, c] = np.arange(len(self.values))
+        grid = np.full(self.shape, np.nan)
+        grid[r, c] = self.values
+        self.levels = [grid]
+        total, count = np.nan_to_num(grid), (~np.isnan(grid)).astype(float)
+        while max(grid.shape) > 1:
+            if reduce == "max":
+                grid = _block(grid, np.fmax, np.nan)
+            else:
+                total, count = _block(total, np.add, 0.0), _block(count, np.add, 0.0)
+                with np.errstate(invalid='ignore'):
+                    grid = total / count
+            self.levels.append(grid)
+        self.set_bins(bins, binning)
+
+    def set_bins(self, bins=16, binning="linear", limits=None):
+        """Colour bins: `bins` equal-width ("linear") or equal-count
+        ("quantile") classes over `limits` or the value range."""
+        finite = self.values[np.isfinite(self.values)]
+        if not len(finite):
+            finite = np.zeros(1)
+        if binning == "quantile":
+            self.edges = np.quantile(finite, np.linspace(0, 1, bins + 1))
+        else:
+            low, high = limits if limits else (finite.min(), finite.max())
+            self.edges = np.linspace(low, high if high > low else low + 1, bins + 1)
+        self.palette = self.colormap[np.linspace(0, 255, bins).astype(int)]
+
+    def classes(self, values):
+        return np.clip(np.searchsorted(self.edges, values, side='right') - 1, 0, len(self.palette) - 1)
+
+    def legend(self):
+        """(low, high, RGB colour) of every bin."""
+        return [(self.edges[k], self.edges[k + 1], tuple(int(v) for v in colour))
+                for k, colour in enumerate(self.palette)]
+
+    def summary(self):
+        finite = self.values[np.isfinite(self.values)]
+        if not len(finite):
+            return {"dies": len(self.values), "measured": 0}
+        return {"dies": len(self.values), "measured": len(finite), "mean": finite.mean(), "std": finite.std(),
+                "min": finite.min(), "max": finite.max()}
+
+    def die_at(self, row, col):
+        """(column, row, value) of the die under grid position (row, col), or None."""
+        r, c = int(np.floor(row)), int(np.floor(col))
+        if not (0 <= r < self.shape[0] and 0 <= c < self.shape[1]) or self.ids[r, c] < 0:
+            return None
+        k = self.ids[r, c]
+        return int(self.columns[k]), int(self.rows[k]), float(self.values[k])
+
+    def render_view(self, x0, y0, scale, width, height, background=(255, 255, 255)):
+        """RGB view with grid position (y0, x0) at the top left and `scale`
+        screen pixels per die; die outlines are drawn once dies are large."""
+        level = int(np.clip(np.floor(np.log2(max(1.0, 1 / scale))), 0, len(self.levels) - 1))
+        grid = self.levels[level]
+        factor = 2 ** level
+        x = x0 + (np.arange(width) + 0.5) / scale
+        y = y0 + (np.arange(height) + 0.5) / scale
+        c = np.floor(x / factor).astype(np.int64)
+        r = np.floor(y / factor).astype(np.int64)
+        valid_c = (c >= 0) & (c < grid.shape[1])
+        valid_r = (r >= 0) & (r < grid.shape[0])
+        v = grid[np.clip(r, 0, grid.shape[0] - 1)[:, None], np.clip(c, 0, grid.shape[1] - 1)[None, :]]
+        present = ~np.isnan(v) & valid_r[:, None] & valid_c[None, :]
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        out[:] = NO_DIE
+        out[present] = self.palette[self.classes(v[present])]
+        if scale >= 6:
+            outline = ((x % 1) < 1 / scale)[None, :] | ((y % 1) < 1 / scale)[:, None]
+            out[outline & present] = out[outline & present] * 0.6
+        w, h = self.die_size
+        xm = (self.col0 + x) * w
+        ym = (self.row0 + 1 - y) * h
+        radius = np.hypot(xm[None, :], ym[:, None])
+        out[radius > self.diameter / 2] = background
+        out[np.abs(radius - self.diameter / 2) <= 0.6 * max(w, h) / scale] = EDGE
+        return out
+
+
+def from_defects(x, y, die_size=(10.0, 10.0), diameter=300.0, edge_exclusion=3.0, **options):
+    """Defect density map (per cm^2) of the dies in `die_grid` from defect
+    positions in mm."""
+    w, h = die_size
+    columns, rows = die_grid(diameter, die_size, edge_exclusion)
+    col0, row0 = columns.min(), rows.min()
+    lookup = np.full((rows.max() - row0 + 1, columns.max() - col0 + 1), -1, dtype=np.int64)
+    lookup[rows - row0, columns - col0] = np.arange(len(columns))
+    i = np.floor(np.asarray(x) / w).astype(np.int64) - col0
+    j = np.floor(np.asarray(y) / h).astype(np.int64) - row0
+    inside = (i >= 0) & (i < lookup.shape[1]) & (j >= 0) & (j < lookup.shape[0])
+    die = lookup[j[inside], i[inside]]
+    counts = np.bincount(die[die >= 0], minlength=len(columns))
+    return WaferMap(columns, rows, counts / (w * h / 100), die_size, diameter, **options)
+
+
+def die_coordinates(names):
+    """Die (column, row) parsed from device names like "X3Y-5" or "x3_y-5";
+    returns columns, rows and a mask of the names that carried them."""
+    pattern = re.compile(r'[xX]\s*(-?\d+)\D*?[yY]\s*(-?\d+)')
+    columns, rows, found = [], [], []
+    for name in names:
+        match = pattern.search(str(name))
+        found.append(match is not None)
+        columns.append(int(match.group(1)) if match else 0)
+        rows.append(int(match.group(2)) if match else 0)
+    return np.array(columns), np.array(rows), np.array(found, dtype=bool)
+
+
+def load(path):
+    """(columns, rows, values) from a text file of die column, die row, value lines."""
+    data = np.genfromtxt(path, delimiter=',' if path.lower().endswith('.csv') else None, usecols=(0, 1, 2))
+    data = np.atleast_2d(data)
+    if data.size:
+        data = data[np.isfinite(data[:, :2]).all(axis=1)]
+    if data.size == 0:
+        raise ValueError("no die values in file")
+    return data[:, 0].astype(np.int64), data[:, 1].astype(np.int64), data[:, 2]
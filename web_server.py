@@ -0,0 +1,382 @@
+"""Headless web server for the process and technique pages.
+
+One asyncio process serves the lithography and characterization process
+pages and the ten technique pages of pages.py, with the same text and
+illustrations as the Tk windows, to many browsers at once. Everything a
+client can ask for is prepared up front: the HTML pages, the stylesheet and
+every illustration scaled to its display width (animated GIFs keep all
+their frames). Each asset is held in memory with its ETag, Last-Modified
+date and, for text, a gzip copy, so answering a request is a dictionary
+lookup and one socket write. Conditional requests get 304 Not Modified and
+byte-range requests 206 Partial Content, so animations can be fetched in
+pieces and resumed.
+
+The etch animation of step 9 is simulated like in the Tk window; each
+material is rendered to a GIF once, in a worker process, on first request.
+
+    python web_server.py --host 0.0.0.0 --port 8000
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import html
+import io
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import unquote, urlsplit
+
+from PIL import Image, ImageSequence
+
+import etch_sim
+import pages
+
+# The Tk pages advance animations every 100 ms whatever the file says
+FRAME_MS = 100
+
+STATUS = {200: "OK", 206: "Partial Content", 304: "Not Modified", 400: "Bad Request",
+          404: "Not Found", 405: "Method Not Allowed", 416: "Range Not Satisfiable",
+          500: "Internal Server Error"}
+
+STYLE = """body { font-family: Arial, sans-serif; background: white; margin: 0 auto; max-width: 1100px; padding: 10px 20px; }
+h1 { font-size: 22px; } h2 { font-size: 18px; }
+.columns { display: flex; gap: 40px; flex-wrap: wrap; }
+.columns > div { flex: 1; min-width: 280px; }
+.step, .technique { display: flex; gap: 20px; align-items: flex-start; border-bottom: 1px solid #ccc; padding-bottom: 10px; }
+.text { flex: 1; white-space: pre-wrap; font-family: Arial, sans-serif; font-size: 14px; margin: 0; }
+figure { margin: 0; } figcaption { font-size: 12px; text-align: center; }
+"""
+
+
+def slug(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def process_url(name):
+    return f"/process/{slug(name)}.html"
+
+
+def technique_url(name):
+    return f"/technique/{slug(name)}.html"
+
+
+def image_url(image_dir, name, width):
+    return f"/images/{width}/{image_dir}/{name}"
+
+
+def etch_url(material):
+    return f"/animations/etch-{material}.gif"
+
+
+def scaled_image(path, width):
+    """(bytes, content type) of the image at `path` resized to `width` as the
+    Tk pages show it: animated GIFs stay animated, everything else is PNG."""
+    with Image.open(path) as image:
+        height = max(1, int(width * image.height / image.width))
+        if getattr(image, "n_frames", 1) > 1:
+            frames = [_flatten(frame).resize((width, height), Image.LANCZOS)
+                      for frame in ImageSequence.Iterator(image)]
+            return _gif(frames), "image/gif"
+        out = io.BytesIO()
+        _flatten(image).resize((width, height), Image.LANCZOS).save(out, "PNG", optimize=True)
+        return out.getvalue(), "image/png"
+
+
+def _flatten(frame):
+    """RGB copy of a frame on the white page background."""
+    rgba = frame.convert("RGBA")
+    background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+    return Image.alpha_composite(background, rgba).convert("RGB")
+
+
+def _gif(frames):
+    out = io.BytesIO()
+    frames[0].save(out, "GIF", save_all=True, append_images=frames[1:], duration=FRAME_MS, loop=0)
+    return out.getvalue()
+
+
+def etch_animation(material, width=pages.STEP_IMAGE_WIDTH):
+    """GIF bytes of the simulated step 9 etch of `material`."""
+    frames = [frame.resize((width, int(width * frame.height / frame.width)), Image.LANCZOS)
+              for frame in etch_sim.etch_frames(material)]
+    return _gif(frames)
+
+
+def make_asset(body, content_type, mtime, compress=False):
+    """A servable response body with its validators, plus a gzip copy for text."""
+    digest = hashlib.sha1(body).hexdigest()[:20]
+    asset = {"body": body, "type": content_type, "mtime": int(mtime), "etag": f'"{digest}"',
+             "last_modified": formatdate(int(mtime), usegmt=True), "gzip": None}
+    if compress:
+        asset["gzip"] = gzip.compress(body, 6, mtime=0)
+        asset["gzip_etag"] = f'"{digest}-gzip"'
+    return asset
+
+
+def _document(title, body):
+    return (f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<link rel="stylesheet" href="/style.css"></head>\n<body>\n<p><a href="/">Home</a></p>\n'
+            f'{body}\n</body></html>\n').encode("utf-8")
+
+
+def _figure(src, width, caption=""):
+    caption = f"<figcaption>{caption}</figcaption>" if caption else ""
+    return f'<figure><img src="{src}" width="{width}" alt="">{caption}</figure>'
+
+
+def index_page():
+    columns = []
+    for process, description, techniques in (("Lithography", pages.LITHOGRAPHY_DESCRIPTION, pages.LITHO_TECHNIQUES),
+                                             ("Characterization", pages.CHARACTERIZATION_DESCRIPTION,
+                                              pages.CHAR_TECHNIQUES)):
+        links = "".join(f'<li><a href="{technique_url(name)}">{html.escape(name)}</a></li>' for name in techniques)
+        columns.append(f'<div><h2>{process}</h2><p>{html.escape(description)}</p>'
+                       f'<p><a href="{process_url(process)}">Process</a></p><ul>{links}</ul></div>')
+    return _document("Characterization and Lithography",
+                     f'<h1>Characterization and Lithography</h1>\n<div class="columns">{"".join(columns)}</div>')
+
+
+def process_page(name):
+    process = pages.PROCESSES[name]
+    width = pages.STEP_IMAGE_WIDTH
+    parts = [f"<h1>{html.escape(process['title'])}</h1>"]
+    for title, description, image in process["steps"]:
+        if image:
+            figure = _figure(image_url(process["image_dir"], image, width), width)
+        else:
+            # The only simulated illustration is the etch of step 9
+            links = " | ".join(f'<a href="{etch_url(material)}">{material}</a>' for material in etch_sim.MATERIALS)
+            material, recipe = next(iter(etch_sim.MATERIALS.items()))
+            figure = _figure(etch_url(material), width,
+                             f"{recipe['chemistry']}, Resist:{material} = 1:{recipe['selectivity']:g}<br>{links}")
+        parts.append(f'<h2>{html.escape(title)}</h2>\n<div class="step"><pre class="text">'
+                     f'{html.escape(description)}</pre>{figure}</div>')
+    return _document(process["window"], "\n".join(parts))
+
+
+def technique_page(name):
+    page = pages.TECHNIQUES[name]
+    width = pages.TECHNIQUE_IMAGE_WIDTH
+    figure = _figure(image_url(page["image_dir"], page["image"], width), width)
+    return _document(name, f'<h1>{html.escape(name)}</h1>\n<div class="technique"><pre class="text">'
+                           f'{html.escape(page["description"])}</pre>{figure}</div>')
+
+
+def build_assets(base_dir=pages.BASE_DIR):
+    """{path: asset} of every page, the stylesheet and every scaled illustration."""
+    content_mtime = max(os.path.getmtime(pages.__file__), os.path.getmtime(__file__))
+    text = {"/": index_page(), "/index.html": index_page(), "/style.css": STYLE.encode("utf-8")}
+    text.update({process_url(name): process_page(name) for name in pages.PROCESSES})
+    text.update({technique_url(name): technique_page(name) for name in pages.TECHNIQUES})
+    assets = {path: make_asset(body, "text/css; charset=utf-8" if path.endswith(".css")
+                               else "text/html; charset=utf-8", content_mtime, compress=True)
+              for path, body in text.items()}
+    for image_dir, name, width in pages.illustrations():
+        path = os.path.join(base_dir, image_dir, name)
+        if os.path.exists(path):
+            body, content_type = scaled_image(path, width)
+            assets[image_url(image_dir, name, width)] = make_asset(body, content_type, os.path.getmtime(path))
+    return assets
+
+
+def parse_range(header, length):
+    """(start, end) inclusive of a single "bytes=" range, None to send the
+    whole body, or "unsatisfiable"."""
+    match = re.fullmatch(r'\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*', header)
+    if not match or not any(match.groups()):
+        # Malformed and multi-range requests are answered with the whole body
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(0, length - int(last)), length - 1
+        if int(last) == 0:
+            return "unsatisfiable"
+    else:
+        start, end = int(first), min(int(last), length - 1) if last else length - 1
+    if start >= length or start > end:
+        return "unsatisfiable"
+    return start, end
+
+
+def _accepts_gzip(header):
+    for coding in header.split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            quality = re.search(r'q\s*=\s*([\d.]+)', params)
+            return quality is None or float(quality.group(1)) > 0
+    return False
+
+
+def _not_modified(asset, etag, headers):
+    match = headers.get("if-none-match")
+    if match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in match.split(",")]
+        return "*" in tags or etag in tags
+    since = headers.get("if-modified-since")
+    if since:
+        try:
+            return parsedate_to_datetime(since).timestamp() >= asset["mtime"]
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class PageServer:
+    """Serves the in-memory assets of `build_assets` over HTTP/1.1 with keep-alive."""
+
+    def __init__(self, base_dir=pages.BASE_DIR, idle_timeout=15.0):
+        self.assets = build_assets(base_dir)
+        self.idle_timeout = idle_timeout
+        self.started = time.time()
+        self.animations = {}
+        self.pool = None
+        self.requests = 0
+        self.clients = 0
+
+    async def animation(self, path):
+        """Asset of an etch animation path, rendered once and shared by all requests."""
+        material = path.removeprefix("/animations/etch-").removesuffix(".gif")
+        if material not in etch_sim.MATERIALS or path != etch_url(material):
+            return None
+        if material not in self.animations:
+            if self.pool is None:
+                # Spawned, not forked: a forked worker would hold open the client sockets
+                self.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            future = asyncio.get_running_loop().run_in_executor(self.pool, etch_animation, material)
+            self.animations[material] = asyncio.ensure_future(self._store(path, material, future))
+        return await asyncio.shield(self.animations[material])
+
+    async def _store(self, path, material, future):
+        try:
+            self.assets[path] = make_asset(await future, "image/gif", self.started)
+        except Exception as e:
+            # Let the next request try again, in a fresh pool if this one died
+            del self.animations[material]
+            if isinstance(e, BrokenProcessPool):
+                self.pool = None
+            raise
+        return self.assets[path]
+
+    async def respond(self, method, target, headers):
+        """(status, headers, body) for one request; the body is empty for HEAD."""
+        if method not in ("GET", "HEAD"):
+            return 405, {"Allow": "GET, HEAD"}, b""
+        path = unquote(urlsplit(target).path)
+        asset = self.assets.get(path)
+        if asset is None and path.startswith("/animations/"):
+            try:
+                asset = await self.animation(path)
+            except Exception as e:
+                print(f"Error rendering {path}: {e}")
+                return 500, {"Content-Type": "text/plain; charset=utf-8"}, b"Animation failed\n"
+        if asset is None:
+            return 404, {"Content-Type": "text/plain; charset=utf-8"}, b"Not found\n"
+        body = asset["body"]
+        span = None
+        requested = headers.get("range")
+        if requested and headers.get("if-range", asset["etag"]) in (asset["etag"], asset["last_modified"]):
+            span = parse_range(requested, len(body))
+        # Ranges are served from the identity body, never the gzip copy, so they carry its ETag
+        compressed = (span is None and asset["gzip"] is not None
+                      and _accepts_gzip(headers.get("accept-encoding", "")))
+        etag = asset["gzip_etag"] if compressed else asset["etag"]
+        reply = {"ETag": etag, "Last-Modified": asset["last_modified"], "Accept-Ranges": "bytes",
+                 "Cache-Control": "no-cache" if asset["gzip"] is not None else "public, max-age=3600"}
+        if asset["gzip"] is not None:
+            reply["Vary"] = "Accept-Encoding"
+        if _not_modified(asset, etag, headers):
+            return 304, reply, b""
+        reply["Content-Type"] = asset["type"]
+        if span == "unsatisfiable":
+            reply["Content-Range"] = f"bytes */{len(body)}"
+            return 416, reply, b""
+        if span is not None:
+            start, end = span
+            reply["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            reply["Content-Length"] = str(end - start + 1)
+            return 206, reply, body[start:end + 1] if method == "GET" else b""
+        if compressed:
+            body = asset["gzip"]
+            reply["Content-Encoding"] = "gzip"
+        reply["Content-Length"] = str(len(body))
+        return 200, reply, body if method == "GET" else b""
+
+    async def handle(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idle_timeout)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ConnectionError):
+                    break
+                request_line, *lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {}
+                for line in lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                parts = request_line.split()
+                if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+                    status, reply, body, keep_alive = 400, {}, b"", False
+                elif headers.get("content-length", "0") != "0" or "transfer-encoding" in headers:
+                    # Only bodiless GET and HEAD requests are served; the unread body ends the connection
+                    status, reply, body, keep_alive = 405, {"Allow": "GET, HEAD"}, b"", False
+                else:
+                    method, target, version = parts
+                    self.requests += 1
+                    status, reply, body = await self.respond(method, target, headers)
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                reply.setdefault("Content-Length", str(len(body)) if status != 304 else None)
+                reply["Date"] = formatdate(usegmt=True)
+                reply["Connection"] = "keep-alive" if keep_alive else "close"
+                lines = [f"HTTP/1.1 {status} {STATUS[status]}"]
+                lines += [f"{name}: {value}" for name, value in reply.items() if value is not None]
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8000):
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+async def _serve(host, port):
+    server = PageServer()
+    listener = await server.start(host, port)
+    print(f"Serving {len(server.assets)} pages and images on http://{host}:{port}/")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def serve(host="127.0.0.1", port=8000):
+    try:
+        asyncio.run(_serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the lithography and characterization pages over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    options = parser.parse_args()
+    serve(options.host, options.port)